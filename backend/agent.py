@@ -1,104 +1,264 @@
-from langchain_ollama import ChatOllama
-import yfinance as yf
-import re
+import hashlib
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
 
+import numpy as np
 
-llm = ChatOllama(model="phi3")
+from glossary import glossary
+from lazy import lazy
+from metrics import upstream
+from news import news_cache
+from retrieval import RAG_MIN_SCORE, RAG_TOP_K, TOKEN, news_index
+from tickers import find_tickers
 
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 512))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 600))
+# Cosine similarity needed for a near-duplicate question to reuse an answer; 0 disables fuzzy matching
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", 0.9))
+EMBEDDING_DIM = 256
+# Filler and interrogatives that don't change the answer ("what is the news on tesla" == "tesla news");
+# why/will/should/when... do, so unlike the retrieval stopwords they stay in the key
+QUESTION_STOPWORDS = frozenset("""
+a an the is are of on for about me tell show give please latest today news any what what's whats how
+""".split())
+# Direction words: "buy"/"sell" questions look alike but must never share an answer
+POLARITY_WORDS = frozenset("""
+buy sell bought sold up down rise fall rising falling higher lower gain gains loss losses bull bullish bear bearish
+long short over under overvalued undervalued overbought oversold beat miss not no never don't isn't won't
+""".split())
+
+
+def _load_llm():
+    from langchain_ollama import ChatOllama
+    return ChatOllama(model="phi3")
 
-tools = []
 
-finance_glossary = {
-    "ebitda": "EBITDA stands for Earnings Before Interest, Taxes, Depreciation, and Amortization. It measures operating profitability.",
-    "liquidity ratio": "Liquidity ratios measure a company's ability to pay short-term financial obligations.",
-    "derivatives": "Derivatives are financial contracts whose value is linked to an underlying asset like stocks, bonds, or commodities.",
-    "repo rate": "Repo rate is the rate at which a central bank lends short-term funds to commercial banks."
-}
+# Built on first chat request (or /api/warmup), not at import
+llm = lazy("llm", _load_llm)
+
+
+tools = []
 
 def fetch_stock_news(symbol: str):
+    # Served from the news cache; watchlist symbols and SPY are kept warm in the background
     try:
-        ticker = yf.Ticker(symbol)
-        news_items = ticker.news
-        if not news_items:
-            return []
-        
-        formatted_news = []
-        for item in news_items[:5]: # Top 5 news
-            # Handle different structure versions of yfinance news
-            title = item.get("title")
-            publisher = item.get("publisher")
-            if not title and "content" in item:
-                 # Backup for complex objects
-                 title = item["content"].get("title")
-            
-            if title:
-                formatted_news.append(f"- {title} (Source: {publisher})")
-        
-        return formatted_news
+        news_items = news_cache.get(symbol)
+        return [f"- {item['title']} (Source: {item['publisher']})" for item in news_items[:5]] # Top 5 news
     except Exception as e:
         return [f"Error fetching news: {str(e)}"]
 
-def get_agent_response(message: str) -> str:
-    key = message.lower().strip()
-    
+def glossary_reply(message: str):
     # 1. Glossary Check
-    if key in finance_glossary:
-        return f"📚 Glossary Result: {finance_glossary[key]}"
+    definition = glossary.get().lookup(message)
+    if definition:
+        return f"📚 Glossary Result: {definition}"
+    return None
+
+
+def find_news_symbols(message: str):
+    """Tickers whose news should be fetched for this message; empty if it isn't a news question."""
+    key = message.lower().strip()
 
     # 2. News Intent Check
+    if "news" not in key:
+        return []
+
+    # Symbols and company names from the ticker universe, e.g. "Apple and $MSFT" -> ["AAPL", "MSFT"]
+    symbols = find_tickers(message)
+    if symbols:
+        return symbols[:3] # news for at most 3 tickers per message
+
+    # Default to SPY (Market) if no symbol found but 'market' is mentioned
+    if "market" in key or key == "news":
+        return ["SPY"]
+    return []
+
+
+def related_articles(message: str):
+    """Archived articles most similar to the message, restricted to the tickers it mentions."""
+    return news_index.get().search(message, RAG_TOP_K, tickers=find_tickers(message), min_score=RAG_MIN_SCORE)
+
+
+def build_prompt(message: str, news=None, articles=None):
+    """news: {symbol: [headline, ...]}, articles: related_articles() results; both go in front of the question."""
+    # 3. LLM Prompt
     context = ""
-    if "news" in key:
-        # Extract potential ticker: look for uppercase words len 2-5
-        # Exclude common words like "THE", "FOR" if they match, but simple regex is fine for now
-        # Default to SPY (Market) if no symbol found but 'market' is mentioned
-        
-        # Extract potential ticker: look for words len 2-6
-        # Exclude common words like "THE", "FOR" if they match
-        
-        # Use case-insensitive search
-        potential_symbols = re.findall(r'\b[a-zA-Z]{2,6}\b', message)
-        
-        target_symbol = "SPY" # Default market
-        
-        # Simple filter for common non-tickers
-        ignore_list = {"what", "show", "tell", "news", "about", "this", "that", "market", "stock", "price", "real", "time"}
-        
-        found = None
-        for s in potential_symbols:
-            if s.lower() not in ignore_list:
-                found = s.upper()
-                break
-        
-        if found:
-            target_symbol = found
-        elif "market" in key:
-            target_symbol = "SPY"
-        else:
-             # If just "news" and no symbol, maybe default to SPY or nothing?
-             if "news" == key: 
-                 target_symbol = "SPY"
-             else:
-                 target_symbol = None
-             
-        if target_symbol:
-            news_list = fetch_stock_news(target_symbol)
-            if news_list:
-                context = f"\n\n[Real-time News for {target_symbol}]:\n" + "\n".join(news_list)
+    for symbol, news_list in (news or {}).items():
+        if news_list:
+            context += f"\n\n[Real-time News for {symbol}]:\n" + "\n".join(news_list)
+    if articles:
+        context += "\n\n[Related articles from the news archive]:\n" + "\n".join(
+            f"- {a['date']} {a['ticker']} ({a['label'] or 'unlabeled'}): {a['text'][:300]}" for a in articles
+        )
 
-    # 3. LLM Generation
-    try:
-        prompt = message
-        if context:
-            prompt = f"""You are a helpful financial assistant with access to real-time news.
+    prompt = message
+    if context:
+        prompt = f"""You are a helpful financial assistant with access to real-time news.
 Use the following news to answer the user's question if relevant.
 
 {context}
 
 User Question: {message}"""
-        
-        response = llm.invoke(prompt)
+    return prompt
+
+
+def _llm_error(e):
+    if "No connection could be made" in str(e) or "10061" in str(e):
+         return "🧠 AI Offline: Please start Ollama on your machine (run `ollama run phi3`)."
+    return f"Error communicating with AI: {str(e)}"
+
+
+def normalize_question(message: str):
+    # "What is the latest news on Tesla?" and "tesla news" both become "tesla"; word order is kept
+    # so "buy tesla sell apple" and "sell tesla buy apple" stay different questions
+    tokens = [t for t in TOKEN.findall(message.lower()) if t not in QUESTION_STOPWORDS]
+    return " ".join(tokens) if tokens else " ".join(message.lower().split())
+
+
+def answer_signature(message: str):
+    """
+    Numbers, tickers and direction words of a question. A near-duplicate may only
+    reuse an answer when these match exactly: "price target 2025" vs "2026",
+    "buy" vs "sell" and "overvalued" vs "undervalued" embed close together.
+    """
+    tokens = TOKEN.findall(message.lower())
+    numbers = {t for t in tokens if any(c.isdigit() for c in t)}
+    polarity = {t for t in tokens if t in POLARITY_WORDS or t.endswith("n't")}
+    return tuple(sorted(numbers | polarity | set(find_tickers(message))))
+
+
+def embed(text: str):
+    """Cheap embedding: hashed character trigram counts, L2-normalized."""
+    vec = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    padded = f" {text} "
+    for i in range(len(padded) - 2):
+        vec[zlib.crc32(padded[i:i + 3].encode("utf-8")) % EMBEDDING_DIM] += 1
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def context_key(news=None, articles=None):
+    """Hash of the live news and archive articles an answer was built from; answers are only reused with the same context."""
+    parts = [f"{symbol}:{line}" for symbol, news_list in sorted((news or {}).items()) for line in news_list]
+    parts += [f"article:{a['date']}:{a['ticker']}:{a['text']}" for a in articles or []]
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    LLM answers keyed on (context hash of the news and archive articles in
+    the prompt, answer_signature, normalized question). Questions that
+    normalize differently but embed within RESPONSE_CACHE_SIMILARITY of a
+    cached one with the same context and signature reuse its answer too.
+    Entries expire with the news they were built from, and the least
+    recently used go first.
+    """
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL, similarity=RESPONSE_CACHE_SIMILARITY):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.similarity = similarity
+        self._data = OrderedDict()  # (context, signature, question) -> (expires_at, created_at, vector, response)
+        self._buckets = {}  # (context, signature) -> set of questions cached under it
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl_for(self, news=None):
+        # Never outlive the freshness of the headlines in the prompt
+        return min([self.ttl] + [news_cache.fresh_for(symbol) for symbol in news or {}])
+
+    def lookup(self, message, news=None, articles=None):
+        """(response, meta) for a cached answer, or (None, {"hit": False})."""
+        bucket = (context_key(news, articles), answer_signature(message))
+        question = normalize_question(message)
+        now = time.monotonic()
+        with self._lock:
+            match, similarity = None, 1.0
+            entry = self._data.get((*bucket, question))
+            if entry is not None and entry[0] > now:
+                match = "exact"
+            elif self.similarity > 0 and self._buckets.get(bucket):
+                vec = embed(question)
+                best, best_question = 0.0, None
+                for other in self._buckets[bucket]:
+                    candidate = self._data[(*bucket, other)]
+                    if candidate[0] > now:
+                        score = float(vec @ candidate[2])
+                        if score > best:
+                            best, best_question = score, other
+                if best >= self.similarity:
+                    entry, question, match, similarity = self._data[(*bucket, best_question)], best_question, "similar", best
+
+            if match is None:
+                self.misses += 1
+                return None, {"hit": False}
+            self._data.move_to_end((*bucket, question))
+            if match == "exact":
+                self.hits += 1
+            else:
+                self.similar_hits += 1
+            return entry[3], {"hit": True, "match": match, "similarity": round(similarity, 3), "age_s": round(now - entry[1], 1)}
+
+    def store(self, message, news, response, articles=None):
+        ttl = self.ttl_for(news)
+        if ttl <= 0:
+            return
+        bucket = (context_key(news, articles), answer_signature(message))
+        question = normalize_question(message)
+        now = time.monotonic()
+        with self._lock:
+            self._data[(*bucket, question)] = (now + ttl, now, embed(question), response)
+            self._data.move_to_end((*bucket, question))
+            self._buckets.setdefault(bucket, set()).add(question)
+            while len(self._data) > self.maxsize:
+                (*old_bucket, old_question), _ = self._data.popitem(last=False)
+                old_bucket = tuple(old_bucket)
+                self._buckets[old_bucket].discard(old_question)
+                if not self._buckets[old_bucket]:
+                    del self._buckets[old_bucket]
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.similar_hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.similar_hits) / lookups, 3) if lookups else 0.0
+            }
+
+
+response_cache = ResponseCache()
+
+
+def get_agent_response(message: str) -> str:
+    reply = glossary_reply(message)
+    if reply is not None:
+        return reply
+
+    news = {symbol: fetch_stock_news(symbol) for symbol in find_news_symbols(message)}
+    articles = related_articles(message)
+    cached, _ = response_cache.lookup(message, news, articles)
+    if cached is not None:
+        return cached
+    prompt = build_prompt(message, news, articles)
+
+    # 3. LLM Generation
+    try:
+        model = llm.get()
+        with upstream("ollama"):
+            response = model.invoke(prompt)
+        response_cache.store(message, news, response.content, articles)
         return response.content
     except Exception as e:
-        if "No connection could be made" in str(e) or "10061" in str(e):
-             return "🧠 AI Offline: Please start Ollama on your machine (run `ollama run phi3`)."
-        return f"Error communicating with AI: {str(e)}"
+        return _llm_error(e)
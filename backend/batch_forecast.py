@@ -0,0 +1,80 @@
+"""
+Forecast a whole watchlist in parallel.
+
+    python batch_forecast.py AAPL MSFT NVDA --days 7 --workers 8 > forecasts.ndjson
+
+Histories are fetched with one bulk download, fits are spread over a process
+pool and every symbol's result is written as one JSON line as soon as it is
+ready, so 100 symbols cost roughly 100 / cores fits of wall time.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from forecast import forecast_history, load_histories
+from marketdata import WATCHLIST, parse_symbols
+
+
+def batch_error_results(symbols, error):
+    # One line per symbol, so a failed download still ends the stream cleanly
+    return [{"symbol": symbol, "error": str(error), "forecast": []} for symbol in symbols]
+
+
+def iter_batch_forecasts(executor, symbols, days, max_inflight):
+    """
+    Yield one result dict per symbol in completion order. At most
+    max_inflight fits are handed to the executor at once so a big batch
+    doesn't bury other work queued on the same pool.
+    """
+    try:
+        histories = load_histories(symbols)
+    except Exception as e:
+        yield from batch_error_results(symbols, e)
+        return
+    todo = iter(symbols)
+    pending = {}  # future -> (symbol, submitted_at)
+
+    def submit_next():
+        for symbol in todo:
+            pending[executor.submit(forecast_history, symbol, histories[symbol], days)] = (symbol, time.perf_counter())
+            return
+
+    for _ in range(max_inflight):
+        submit_next()
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            symbol, submitted_at = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"error": str(e), "forecast": []}
+            result = {**result, "symbol": symbol, "seconds": round(time.perf_counter() - submitted_at, 3)}
+            submit_next()
+            yield result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast many symbols in parallel and print NDJSON.")
+    parser.add_argument("symbols", nargs="*", help="ticker symbols (default: the dashboard watchlist)")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    symbols = parse_symbols(",".join(args.symbols)) or WATCHLIST
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for result in iter_batch_forecasts(executor, symbols, args.days, args.workers):
+            sys.stdout.write(json.dumps(result) + "\n")
+            sys.stdout.flush()
+
+    print(f"{len(symbols)} symbols in {time.perf_counter() - start:.1f}s with {args.workers} workers", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
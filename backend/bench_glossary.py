@@ -0,0 +1,103 @@
+"""
+Benchmark glossary search latency at a given index size.
+
+    python bench_glossary.py                    # 10k terms, 20k queries
+    python bench_glossary.py --terms 50000 --output bench_glossary.json
+
+The index holds the real glossary.csv terms padded with synthetic terms
+built from their vocabulary. Queries mix prefixes, typos (one character
+dropped or swapped) and definition keywords, the way the search box and
+the chat agent use it.
+"""
+import argparse
+import json
+import random
+import time
+
+from glossary import GLOSSARY_PATH, TOKEN, Glossary, load_entries
+
+
+def synthetic_entries(entries, n, rng):
+    """entries padded to n with made-up terms/definitions from the same words."""
+    words = sorted({w for term, _ in entries for w in TOKEN.findall(term.lower())})
+    definition_words = [w for _, d in entries for w in TOKEN.findall(d.lower())]
+    out = list(entries)
+    seen = {term for term, _ in entries}
+    while len(out) < n:
+        term = " ".join(rng.sample(words, rng.randint(1, 3))) + f" {rng.choice(['index', 'ratio', 'rate', 'spread', 'yield', str(rng.randint(1, 999))])}"
+        if term in seen:
+            continue
+        seen.add(term)
+        out.append((term, " ".join(rng.choices(definition_words, k=rng.randint(8, 25))).capitalize() + "."))
+    return out
+
+
+def typo(term, rng):
+    if len(term) < 4:
+        return term
+    i = rng.randrange(1, len(term) - 1)
+    if rng.random() < 0.5:
+        return term[:i] + term[i + 1:]
+    return term[:i - 1] + term[i] + term[i - 1] + term[i + 1:]
+
+
+def build_queries(glossary, n, rng):
+    queries = []
+    for _ in range(n):
+        term = rng.choice(glossary.terms)
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(term[:rng.randint(1, len(term))])
+        elif kind < 0.7:
+            queries.append(typo(term, rng))
+        else:
+            queries.append(" ".join(rng.sample(TOKEN.findall(glossary.definitions[glossary.terms.index(term)].lower()), 2)))
+    return queries
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--terms", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--glossary", default=GLOSSARY_PATH)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    entries = synthetic_entries(load_entries(args.glossary), args.terms, rng)
+    start = time.perf_counter()
+    glossary = Glossary(entries)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    queries = build_queries(glossary, args.queries, rng)
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        glossary.search(query)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    latencies.sort()
+
+    report = {
+        "n_terms": len(glossary),
+        "n_queries": len(queries),
+        "build_ms": round(build_ms, 1),
+        "p50_us": round(percentile(latencies, 0.50), 1),
+        "p95_us": round(percentile(latencies, 0.95), 1),
+        "p99_us": round(percentile(latencies, 0.99), 1),
+        "max_us": round(latencies[-1], 1)
+    }
+    print(f"{report['n_terms']} terms indexed in {report['build_ms']} ms")
+    print(f"search over {report['n_queries']} queries: p50 {report['p50_us']} us, p95 {report['p95_us']} us, p99 {report['p99_us']} us")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
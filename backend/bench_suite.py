@@ -0,0 +1,222 @@
+"""
+Offline latency/throughput benchmarks for the API and its hot functions.
+
+    python bench_suite.py --output bench.json
+    python bench_suite.py --only quote daily glossary --requests 200 --compare bench.json
+
+Market data comes from fakes.FakeMarket (--recorded DIR replays SYMBOL.csv
+files, otherwise seeded random walks), the LLM is fakes.StubChatOllama and
+FinBERT is fakes.stub_finbert, so nothing touches the network or needs
+downloaded weights and results only move when our code does. Stores, caches
+and fitted models live in a fresh temp directory.
+
+Every benchmark runs twice: "cold" uses keys nothing has seen yet (cache
+misses, store backfills, model fits), "warm" repeats the same keys. Each
+phase reports mean/p50/p95/p99/max latency in ms, requests per second
+(sequential) and errors. Endpoints go through FastAPI's TestClient; the
+backtest through the Flask app in chatbot/file1.py.
+
+--compare prints p50/p95 against an earlier --output file and exits 1 when
+a p50 got slower by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+import fakes
+
+# Before anything imports yfinance; spawned forecast workers re-run this
+# module, so they get the fakes too
+fakes.install()
+
+BENCHMARKS = ["quote", "daily", "predict", "chat", "glossary", "sentiment", "agent", "backtest"]
+GLOSSARY_TERMS = ["ebitda", "sharpe ratio", "beta", "yield curve", "market capitalization", "short squeeze", "moving average", "bond"]
+# Cashtags, so each made-up symbol gets its own news context (and response cache key)
+CHAT_QUESTIONS = [
+    "What's the latest news on ${s}?",
+    "Is ${s} a buy after the recent earnings?",
+    "How is ${s} stock doing today?",
+    "Give me the outlook for ${s} this quarter"
+]
+SENTIMENT_TEXTS = [
+    "{s} shares surge after record quarterly revenue",
+    "{s} misses estimates and cuts full-year guidance",
+    "{s} trades flat as investors await the Fed",
+    "Analysts upgrade {s} on strong cloud demand"
+]
+
+
+def symbols(n, offset=0):
+    # Made-up tickers (not in tickers.csv) so every cold key is new
+    return [f"BX{i:03d}" for i in range(offset, offset + n)]
+
+
+def summarize(latencies, errors, elapsed):
+    ms = np.array(latencies) * 1000
+    if not len(ms):
+        return {"n": 0, "errors": errors}
+    return {
+        "n": len(ms),
+        "errors": errors,
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "rps": round(len(ms) / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+def run_phase(call, inputs):
+    """Time call(x) for every input; call returns False (or raises) on an error response."""
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for x in inputs:
+        t = time.perf_counter()
+        try:
+            ok = call(x)
+        except Exception:
+            ok = False
+        latencies.append(time.perf_counter() - t)
+        errors += ok is False
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def json_ok(response):
+    return response.status_code == 200 and "error" not in response.json()
+
+
+def build_benchmarks(client, args):
+    """name -> (kind, call, cold inputs, warm inputs)."""
+    from agent import get_agent_response
+    from sentiment import analyze_sentiment
+
+    n = args.requests
+    quote_symbols = symbols(n)
+    daily_symbols = symbols(n, 1000)
+    predict_symbols = symbols(args.predict_requests, 2000)
+    chat_symbols = symbols(n, 3000)
+    chat_messages = [CHAT_QUESTIONS[i % len(CHAT_QUESTIONS)].format(s=s) for i, s in enumerate(chat_symbols)]
+    texts = [SENTIMENT_TEXTS[i % len(SENTIMENT_TEXTS)].format(s=s) for i, s in enumerate(symbols(n, 4000))]
+    agent_messages = [CHAT_QUESTIONS[i % len(CHAT_QUESTIONS)].format(s=s) for i, s in enumerate(symbols(n, 5000))]
+    terms = [GLOSSARY_TERMS[i % len(GLOSSARY_TERMS)] for i in range(n)]
+
+    benchmarks = {
+        "quote": ("endpoint", lambda s: json_ok(client.get("/api/quote", params={"symbol": s})), quote_symbols, quote_symbols),
+        "daily": ("endpoint", lambda s: json_ok(client.get("/api/daily", params={"symbol": s})), daily_symbols, daily_symbols),
+        "predict": ("endpoint", lambda s: json_ok(client.get("/api/predict", params={"symbol": s, "days": 7})), predict_symbols, predict_symbols),
+        "chat": ("endpoint", lambda m: json_ok(client.post("/api/chat", json={"message": m})), chat_messages, chat_messages),
+        # The glossary is built on first use: cold is the first lookups, warm the same terms again
+        "glossary": ("endpoint", lambda t: json_ok(client.get("/api/glossary", params={"term": t})), terms, terms),
+        "sentiment": ("function", lambda t: analyze_sentiment(t) is not None, texts, texts),
+        "agent": ("function", lambda m: not get_agent_response(m).startswith("🧠"), agent_messages, agent_messages)
+    }
+
+    try:
+        sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "chatbot"))
+        from file1 import app as flask_app
+        flask_client = flask_app.test_client()
+        sizes = [{"mode": "synthetic", "days": d, "sma_short": 10, "sma_long": 50} for d in (365, 2520, 25200)]
+        payloads = [sizes[i % len(sizes)] for i in range(n)]
+        benchmarks["backtest"] = ("function", lambda p: flask_client.post("/backtest", json=p).status_code == 200, payloads, payloads)
+    except ImportError as e:
+        benchmarks["backtest"] = ("function", e, [], [])
+    return benchmarks
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(report, baseline_path, tolerance):
+    """Print p50/p95 ratios against an earlier report; returns the regressed (benchmark, phase) names."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    before = {(r["name"], r["phase"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\nvs {baseline_path} ({baseline.get('git') or 'unknown revision'})")
+    for r in report["results"]:
+        old = before.get((r["name"], r["phase"]))
+        if not old or not old.get("p50_ms") or not r.get("p50_ms"):
+            continue
+        p50, p95 = r["p50_ms"] / old["p50_ms"], r["p95_ms"] / old["p95_ms"]
+        regressed = p50 > 1 + tolerance
+        if regressed:
+            regressions.append(f"{r['name']}/{r['phase']}")
+        print(f"  {r['name'] + '/' + r['phase']:<20} p50 {p50:6.2f}x  p95 {p95:6.2f}x{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="benchmarks to run (default: all)")
+    parser.add_argument("--requests", type=int, default=50, help="calls per phase")
+    parser.add_argument("--predict-requests", type=int, default=5, help="calls per phase for /api/predict (each cold call is a Prophet fit)")
+    parser.add_argument("--recorded", help="directory of recorded SYMBOL.csv daily bars")
+    parser.add_argument("--upstream-latency-ms", type=float, default=0.0, help="sleep per fake yfinance call")
+    parser.add_argument("--llm-first-token-ms", type=float, default=0.0)
+    parser.add_argument("--llm-tokens-per-s", type=float, default=0.0, help="stub LLM pacing (0 = instant)")
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--compare", help="earlier --output file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown for --compare")
+    args = parser.parse_args()
+
+    market = fakes.install(
+        fakes.FakeMarket(args.recorded, latency_ms=args.upstream_latency_ms),
+        first_token_ms=args.llm_first_token_ms,
+        tokens_per_s=args.llm_tokens_per_s
+    )
+    scratch = fakes.scratch_environment("marketvision-bench-", NEWS_PREFETCH="0")
+
+    start = time.perf_counter()
+    import main as api
+    from fastapi.testclient import TestClient
+    import_s = time.perf_counter() - start
+
+    report = {
+        "git": git_revision(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "options": vars(args),
+        "import_s": round(import_s, 3),
+        "results": []
+    }
+    print(f"backend imported in {import_s:.2f}s; scratch dir {scratch}")
+    print(f"{'benchmark':<12}{'phase':<6}{'n':>5}{'err':>5}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+
+    with TestClient(api.app) as client:
+        benchmarks = build_benchmarks(client, args)
+        for name in args.only or BENCHMARKS:
+            kind, call, cold, warm = benchmarks[name]
+            if isinstance(call, Exception):
+                report["results"].append({"name": name, "kind": kind, "phase": "cold", "error": str(call)})
+                print(f"{name:<12}skipped: {call}")
+                continue
+            for phase, inputs in (("cold", cold), ("warm", warm)):
+                stats = run_phase(call, inputs)
+                report["results"].append({"name": name, "kind": kind, "phase": phase, **stats})
+                cells = [f"{stats.get(k, 0):.2f}" for k in ("mean_ms", "p50_ms", "p95_ms", "p99_ms")]
+                print(f"{name:<12}{phase:<6}{stats['n']:>5}{stats['errors']:>5}{cells[0]:>10}{cells[1]:>10}{cells[2]:>10}{cells[3]:>10}{stats.get('rps') or 0:>9}")
+
+    report["upstream_calls"] = market.calls
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare and compare(report, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark ticker extraction on a large message corpus.
+
+    python bench_tickers.py                      # 100k messages
+    python bench_tickers.py --messages 500000 --output bench_tickers.json
+
+The corpus mixes the headlines in stock_sentiment_dataset.csv with
+templated chat questions whose expected ticker is known, so the report
+covers both speed (messages/s, MB/s, us/message) and hit rate for the
+automaton and for the old regex + ignore_list extractor. CASES are messages
+with an exact expected result (capitalized English-word symbols, cashtags);
+any the automaton gets wrong are printed.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import re
+import time
+
+from tickers import CASHTAG_ONLY, TICKER_UNIVERSE_PATH, TickerMatcher, load_universe
+
+DATASET = os.path.join(os.path.dirname(__file__), "..", "stock_sentiment_dataset.csv")
+
+TEMPLATES = [
+    "what is the latest news on {name}?",
+    "give me news about {symbol} today",
+    "Show me {name} stock news and the price",
+    "any news for ${symbol} after earnings",
+    "Tell me the news: is {name} a buy?",
+    "compare {name} news with the market",
+]
+
+# (message, exact find() result); also run by test_tickers.py
+CASES = [
+    ("A quick news update on Apple", ["AAPL"]),
+    ("Any news? ON tesla", ["TSLA"]),
+    ("IT stocks and NOW: what about microsoft?", ["MSFT"]),
+    ("WHAT IS THE NEWS ON ALL BANKS", []),
+    ("news on $ON and $A", ["ON", "A"]),
+    ("Is Agilent a buy? How about $NOW", ["A", "NOW"]),
+    ("news for KO and GS", ["KO", "GS"]),
+    ("ko is down, gs too", []),
+    ("Bank of America vs america movil", ["BAC"]),
+    ("$PLTR and nvda news", ["PLTR", "NVDA"]),
+    ("news on BRK.B", ["BRK-B"]),
+    ("$brk.b vs $BRK-B vs Berkshire", ["BRK-B"]),
+    ("Shopify on the TSX: $SHOP.TO", ["SHOP", "SHOP.TO"]),
+    ("news on PLUG", []),
+]
+
+
+def legacy_extract(message):
+    # The regex + ignore_list extractor agent.py used before tickers.py
+    ignore_list = {"what", "show", "tell", "news", "about", "this", "that", "market", "stock", "price", "real", "time"}
+    for s in re.findall(r'\b[a-zA-Z]{2,6}\b', message):
+        if s.lower() not in ignore_list:
+            return [s.upper()]
+    return []
+
+
+def build_corpus(n, entries, dataset=DATASET, seed=0):
+    """[(message, expected symbol or None)] with n messages."""
+    rng = random.Random(seed)
+    headlines = []
+    if os.path.exists(dataset):
+        with open(dataset, newline="", encoding="utf-8") as f:
+            headlines = [row["text"] for row in csv.DictReader(f) if row.get("text")]
+
+    corpus = []
+    for _ in range(n):
+        if headlines and rng.random() < 0.5:
+            corpus.append((rng.choice(headlines), None))
+            continue
+        symbol, aliases, strict = rng.choice(entries)
+        name = rng.choice(aliases) if aliases and (strict or rng.random() < 0.5) else symbol
+        template = rng.choice(TEMPLATES)
+        if strict == CASHTAG_ONLY:
+            # People write these as $ON, $NOW; bare they are just words
+            template = template.replace("${symbol}", "{symbol}").replace("{symbol}", "${symbol}")
+        corpus.append((template.format(name=name, symbol=symbol), symbol))
+    return corpus
+
+
+def run(extract, corpus):
+    start = time.perf_counter()
+    results = [extract(message) for message, _ in corpus]
+    elapsed = time.perf_counter() - start
+
+    labelled = [(found, expected) for found, (_, expected) in zip(results, corpus) if expected]
+    chars = sum(len(message) for message, _ in corpus)
+    return {
+        "messages_per_sec": round(len(corpus) / elapsed),
+        "mb_per_sec": round(chars / elapsed / 1e6, 2),
+        "us_per_message": round(elapsed / len(corpus) * 1e6, 2),
+        "hit_rate": round(sum(expected in found for found, expected in labelled) / len(labelled), 4) if labelled else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--universe", default=TICKER_UNIVERSE_PATH)
+    parser.add_argument("--dataset", default=DATASET)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    entries = load_universe(args.universe)
+    start = time.perf_counter()
+    matcher = TickerMatcher(entries)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    corpus = build_corpus(args.messages, entries, args.dataset, args.seed)
+    report = {
+        "automaton": {**run(matcher.find, corpus), "build_ms": round(build_ms, 2), "states": len(matcher._goto)},
+        "legacy_regex": run(legacy_extract, corpus)
+    }
+
+    failures = [(message, expected, matcher.find(message)) for message, expected in CASES if matcher.find(message) != expected]
+    report["automaton"]["cases_failed"] = len(failures)
+
+    print(f"{len(corpus)} messages, {len(entries)} symbols in universe")
+    for message, expected, found in failures:
+        print(f"case failed: {message!r}: expected {expected}, got {found}")
+    print(f"{'extractor':<14}{'msgs/s':>10}{'MB/s':>8}{'us/msg':>9}{'hit rate':>10}")
+    for name, row in report.items():
+        print(f"{name:<14}{row['messages_per_sec']:>10}{row['mb_per_sec']:>8}{row['us_per_message']:>9}{str(row['hit_rate']):>10}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"n_messages": len(corpus), "n_symbols": len(entries), "extractors": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
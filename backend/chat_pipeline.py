@@ -0,0 +1,194 @@
+"""
+Async /api/chat pipeline.
+
+Sentiment scoring and context retrieval (news plus archive articles) run
+concurrently, and the LLM call starts as soon as its prompt is ready instead
+of waiting for sentiment. Every blocking stage has its own timeout; a stage
+that times out or fails is reported in `degraded` and the answer is built
+without it.
+"""
+import asyncio
+import logging
+import os
+import time
+
+import metrics
+from agent import _llm_error, build_prompt, fetch_stock_news, find_news_symbols, glossary_reply, llm, related_articles, response_cache
+from sentiment import analyze_sentiment
+
+SENTIMENT_TIMEOUT = float(os.getenv("CHAT_SENTIMENT_TIMEOUT", 10))
+NEWS_TIMEOUT = float(os.getenv("CHAT_NEWS_TIMEOUT", 3))
+RETRIEVAL_TIMEOUT = float(os.getenv("CHAT_RETRIEVAL_TIMEOUT", 2))
+# Applies to the first token and to every gap between tokens
+LLM_TIMEOUT = float(os.getenv("CHAT_LLM_TIMEOUT", 60))
+
+LLM_TIMEOUT_REPLY = "🧠 AI timed out: the model took too long to answer, please try again."
+
+logger = logging.getLogger("marketvision.chat")
+
+
+class ChatRun:
+    """Stage timings (ms), degraded stages and response cache outcome for one chat request."""
+
+    def __init__(self, message):
+        self.message = message
+        self.timings = {}
+        self.degraded = []
+        self.cache = {"hit": False}
+        self.llm_failed = False
+
+    async def stage(self, name, func, *args, timeout, default=None):
+        # Blocking work runs in a thread; a timeout abandons the result, not the thread
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(func, *args), timeout)
+        except Exception as e:  # includes asyncio.TimeoutError
+            self.degraded.append(name)
+            logger.warning("chat stage %s degraded: %s", name, str(e) or type(e).__name__)
+            return default
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = round(elapsed * 1000, 1)
+            # news:AAPL -> news, so the histogram isn't split per symbol
+            metrics.observe(name.split(":")[0], elapsed)
+
+    async def context(self):
+        """
+        (news, articles) for the prompt: {symbol: headlines}, empty if it isn't
+        a news question, and related archive articles; fetched concurrently.
+        """
+        symbols = find_news_symbols(self.message)
+        articles, *news_lists = await asyncio.gather(
+            self.stage("retrieval", related_articles, self.message, timeout=RETRIEVAL_TIMEOUT, default=[]),
+            *(self.stage(f"news:{symbol}", fetch_stock_news, symbol, timeout=NEWS_TIMEOUT, default=[]) for symbol in symbols)
+        )
+        return dict(zip(symbols, news_lists)), articles
+
+    def cached_reply(self, news, articles):
+        # Near-duplicate questions over the same news and articles reuse an earlier answer instead of calling the LLM
+        reply, self.cache = response_cache.lookup(self.message, news, articles)
+        return reply
+
+    async def complete(self, prompt):
+        start = time.perf_counter()
+        called = None
+        try:
+            model = await asyncio.to_thread(llm.get)
+            called = time.perf_counter()
+            response = await asyncio.wait_for(model.ainvoke(prompt), LLM_TIMEOUT)
+            return response.content
+        except asyncio.TimeoutError:
+            self.degraded.append("llm")
+            self.llm_failed = True
+            return LLM_TIMEOUT_REPLY
+        except Exception as e:
+            self.llm_failed = True
+            return _llm_error(e)
+        finally:
+            end = time.perf_counter()
+            self.timings["llm"] = round((end - start) * 1000, 1)
+            if called is not None:
+                metrics.count_upstream("ollama", end - called, self.llm_failed)
+
+    async def stream(self, prompt, stats):
+        """Yield text chunks as the LLM produces them; fills stats with ttft_ms, tokens, tokens_per_sec."""
+        start = time.perf_counter()
+        first = None
+        called = None
+        tokens = 0
+        try:
+            model = await asyncio.to_thread(llm.get)
+            called = time.perf_counter()
+            chunks = model.astream(prompt).__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), LLM_TIMEOUT)
+                except StopAsyncIteration:
+                    break
+                if not chunk.content:
+                    continue
+                if first is None:
+                    first = time.perf_counter()
+                tokens += 1  # Ollama streams one token per chunk
+                yield chunk.content
+        except asyncio.TimeoutError:
+            self.degraded.append("llm")
+            self.llm_failed = True
+            yield LLM_TIMEOUT_REPLY
+        except Exception as e:
+            self.llm_failed = True
+            yield _llm_error(e)
+        finally:
+            end = time.perf_counter()
+            self.timings["llm"] = round((end - start) * 1000, 1)
+            if called is not None:
+                metrics.count_upstream("ollama", end - called, self.llm_failed)
+                if first is not None:
+                    metrics.observe("ollama_first_token", first - called)
+            stats["ttft_ms"] = round((first - start) * 1000, 1) if first is not None else None
+            stats["tokens"] = tokens
+            stats["tokens_per_sec"] = round((tokens - 1) / (end - first), 1) if first is not None and end > first and tokens > 1 else None
+            logger.info("chat stream: ttft %s ms, %d tokens, %s tokens/s", stats["ttft_ms"], tokens, stats["tokens_per_sec"])
+
+
+async def respond(message):
+    """The /api/chat response: reply, sentiment, per-stage timings, degraded stages and cache outcome."""
+    run = ChatRun(message)
+    sentiment_task = asyncio.create_task(run.stage("sentiment", analyze_sentiment, message, timeout=SENTIMENT_TIMEOUT))
+
+    reply = glossary_reply(message)
+    if reply is None:
+        news, articles = await run.context()
+        reply = run.cached_reply(news, articles)
+        if reply is None:
+            reply = await run.complete(build_prompt(message, news, articles))
+            if not run.llm_failed:
+                response_cache.store(message, news, reply, articles)
+
+    sentiment = await sentiment_task
+    return {"response": reply, "sentiment": sentiment, "timings": run.timings, "degraded": run.degraded, "cache": run.cache}
+
+
+async def stream_events(message):
+    """
+    Async generator of (event, data) pairs for /api/chat/stream: sentiment as
+    soon as it is ready (usually before the first token), token chunks, then done.
+    """
+    run = ChatRun(message)
+    sentiment_task = asyncio.create_task(run.stage("sentiment", analyze_sentiment, message, timeout=SENTIMENT_TIMEOUT))
+    sentiment_sent = False
+
+    def sentiment_event():
+        nonlocal sentiment_sent
+        sentiment_sent = True
+        return "sentiment", sentiment_task.result()
+
+    reply = glossary_reply(message)
+    if reply is not None:
+        yield "token", {"text": reply}
+        stats = {}
+    else:
+        context_task = asyncio.create_task(run.context())
+        done, _ = await asyncio.wait({sentiment_task, context_task}, return_when=asyncio.FIRST_COMPLETED)
+        if sentiment_task in done:
+            yield sentiment_event()
+
+        news, articles = await context_task
+        stats = {}
+        reply = run.cached_reply(news, articles)
+        if reply is not None:
+            yield "token", {"text": reply}
+        else:
+            parts = []
+            async for text in run.stream(build_prompt(message, news, articles), stats):
+                if not sentiment_sent and sentiment_task.done():
+                    yield sentiment_event()
+                parts.append(text)
+                yield "token", {"text": text}
+            if not run.llm_failed:
+                response_cache.store(message, news, "".join(parts), articles)
+
+    if not sentiment_sent:
+        await sentiment_task
+        yield sentiment_event()
+    yield "done", {**stats, "timings": run.timings, "degraded": run.degraded, "cache": run.cache}
@@ -0,0 +1,5 @@
+# Unit tests run offline: fake market data, LLM and FinBERT, on-disk caches in a temp dir
+import fakes
+
+fakes.scratch_environment("marketvision-tests-")
+fakes.install()
@@ -0,0 +1,267 @@
+"""
+Walk-forward evaluation of the Prophet forecasts against naive baselines.
+
+    python eval_forecast.py AAPL MSFT --folds 8 --horizon 7 --workers 4
+    python eval_forecast.py --config cps05:changepoint_prior_scale=0.5 \
+        --config lean:daily_seasonality=false,uncertainty_samples=200 --budget 2 --output eval.json
+
+Histories come from the local OHLCV store (--refresh downloads new bars
+first). Every symbol is cut at --folds rolling origins --step bars apart;
+each fold trains on the bars before its origin and is scored on the next
+--horizon bars:
+
+    mape      mean absolute percentage error of yhat
+    coverage  share of actual closes inside [yhat_lower, yhat_upper]
+    width     mean interval width as a percentage of the actual close
+    fit_s     wall seconds to fit (predict_s to predict), cpu_s both
+              including the Stan child process
+
+Prophet fits run in a process pool, one fold per task. The naive (last
+close) and drift (straight line through the first and last close)
+baselines get intervals of the same nominal width from the one-step
+changes. With --budget the report recommends the most accurate Prophet
+setting whose p95 fit + predict time stays within it.
+
+Without --config only "default" runs: the settings /api/predict uses.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from forecast import prepare_history
+from marketdata import WATCHLIST, parse_symbols
+from store import ohlcv_store
+
+# /api/predict's Prophet(daily_seasonality=True); Prophet's default interval_width
+DEFAULT_PARAMS = {"daily_seasonality": True}
+INTERVAL_WIDTH = 0.8
+BASELINES = ("naive", "drift")
+
+
+def parse_config(text):
+    """
+    "name:key=value,key=value" -> (name, Prophet kwargs). Values are read as
+    JSON where possible (0.5, true, "additive"), otherwise kept as strings.
+    """
+    name, _, spec = text.partition(":")
+    params = dict(DEFAULT_PARAMS)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"expected key=value, got {item!r}")
+        try:
+            params[key.strip()] = json.loads(value)
+        except ValueError:
+            params[key.strip()] = value.strip()
+    return name.strip(), params
+
+
+def rolling_origins(n, folds, horizon, step, min_train):
+    """Origin indices (first test bar of each fold), oldest first, that leave min_train bars to fit on."""
+    last = n - horizon
+    origins = [last - i * step for i in range(folds)]
+    return sorted(o for o in origins if o >= min_train)
+
+
+def baseline_forecast(y, horizon, method, interval_width=INTERVAL_WIDTH):
+    """(yhat, yhat_lower, yhat_upper) arrays for the next horizon bars after y."""
+    steps = np.arange(1, horizon + 1)
+    n = len(y)
+    changes = np.diff(y)
+    if method == "naive":
+        yhat = np.full(horizon, y[-1])
+        sigma = changes.std() * np.sqrt(steps)
+    elif method == "drift":
+        slope = (y[-1] - y[0]) / (n - 1)
+        yhat = y[-1] + slope * steps
+        residuals = changes - slope
+        sigma = residuals.std() * np.sqrt(steps * (1 + steps / (n - 1)))
+    else:
+        raise ValueError(f"unknown baseline {method!r}")
+    z = NormalDist().inv_cdf(0.5 + interval_width / 2)
+    return yhat, yhat - z * sigma, yhat + z * sigma
+
+
+def score(actual, yhat, lower, upper):
+    actual = np.asarray(actual, dtype=float)
+    scores = {"mape": float(np.mean(np.abs(actual - yhat) / np.abs(actual)) * 100)}
+    if lower is None or np.isnan(lower).any():
+        # e.g. uncertainty_samples=0: Prophet returns no usable interval
+        scores.update(coverage=None, width=None)
+    else:
+        scores["coverage"] = float(np.mean((actual >= lower) & (actual <= upper)))
+        scores["width"] = float(np.mean((upper - lower) / np.abs(actual)) * 100)
+    return scores
+
+
+def _cpu_seconds():
+    # Children count too: cmdstanpy runs the Stan optimizer as a subprocess
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def prophet_fold(train, test_ds, params):
+    """
+    Fit Prophet on a ds/y frame and predict the test dates. Runs in a pool
+    worker; returns (yhat, yhat_lower, yhat_upper, fit_s, predict_s, cpu_s).
+    """
+    from prophet import Prophet
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+    # Uncertainty intervals are sampled; seed them so reruns score the same
+    np.random.seed(0)
+    cpu = _cpu_seconds()
+    start = time.perf_counter()
+    model = Prophet(**params)
+    model.fit(train)
+    fitted = time.perf_counter()
+    forecast = model.predict(pd.DataFrame({"ds": test_ds}))
+    done = time.perf_counter()
+
+    columns = [forecast[c].to_numpy(dtype=float) if c in forecast else None for c in ("yhat", "yhat_lower", "yhat_upper")]
+    return (*columns, fitted - start, done - fitted, _cpu_seconds() - cpu)
+
+
+def evaluate(executor, histories, configs, folds, horizon, step, min_train, window=None):
+    """
+    Yield one row per (symbol, fold, model): baselines are scored inline,
+    Prophet folds as the pool finishes them.
+    """
+    pending = {}
+    for symbol, df in histories.items():
+        for origin in rolling_origins(len(df), folds, horizon, step, min_train):
+            train = df.iloc[max(0, origin - window) if window else 0:origin].reset_index(drop=True)
+            test = df.iloc[origin:origin + horizon]
+            row = {"symbol": symbol, "origin": str(test["ds"].iloc[0].date()), "train_bars": len(train)}
+            actual = test["y"].to_numpy()
+
+            y = train["y"].to_numpy(dtype=float)
+            for method in BASELINES:
+                start = time.perf_counter()
+                yhat, lower, upper = baseline_forecast(y, horizon, method)
+                elapsed = time.perf_counter() - start
+                yield {**row, "model": method, **score(actual, yhat, lower, upper), "fit_s": elapsed, "predict_s": 0.0, "cpu_s": elapsed}
+
+            for name, params in configs:
+                future = executor.submit(prophet_fold, train, test["ds"].reset_index(drop=True), params)
+                pending[future] = ({**row, "model": name}, actual)
+
+    for future in as_completed(pending):
+        row, actual = pending.pop(future)
+        try:
+            yhat, lower, upper, fit_s, predict_s, cpu_s = future.result()
+        except Exception as e:
+            yield {**row, "error": str(e)}
+            continue
+        yield {**row, **score(actual, yhat, lower, upper), "fit_s": fit_s, "predict_s": predict_s, "cpu_s": cpu_s}
+
+
+def _mean(values):
+    values = [v for v in values if v is not None]
+    return round(float(np.mean(values)), 4) if values else None
+
+
+def summarize(rows, budget=None, candidates=None):
+    """
+    Per-model averages over the successful folds. With a budget, also the
+    most accurate of the candidates (default: every model) within it.
+    """
+    models = {}
+    for row in rows:
+        models.setdefault(row["model"], []).append(row)
+
+    summary = {}
+    for model, model_rows in models.items():
+        ok = [r for r in model_rows if "error" not in r]
+        seconds = np.array([r["fit_s"] + r["predict_s"] for r in ok])
+        summary[model] = {
+            "folds": len(ok),
+            "errors": len(model_rows) - len(ok),
+            "mape": _mean(r["mape"] for r in ok),
+            "mape_median": round(float(np.median([r["mape"] for r in ok])), 4) if ok else None,
+            "coverage": _mean(r["coverage"] for r in ok),
+            "width": _mean(r["width"] for r in ok),
+            "fit_s": _mean(r["fit_s"] for r in ok),
+            "p95_s": round(float(np.percentile(seconds, 95)), 4) if ok else None,
+            "cpu_s": round(sum(r["cpu_s"] for r in ok), 3)
+        }
+
+    report = {"interval_width": INTERVAL_WIDTH, "models": summary}
+    if budget is not None:
+        fits = [m for m, s in summary.items() if m in (candidates or summary) and s["folds"] and s["p95_s"] <= budget]
+        report["budget_s"] = budget
+        report["recommended"] = min(fits, key=lambda m: summary[m]["mape"]) if fits else None
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("symbols", nargs="*", help="ticker symbols (default: the dashboard watchlist)")
+    parser.add_argument("--config", action="append", default=[], help="name:key=value,... Prophet settings to compare")
+    parser.add_argument("--folds", type=int, default=8)
+    parser.add_argument("--horizon", type=int, default=7, help="bars forecast per fold")
+    parser.add_argument("--step", type=int, default=20, help="bars between fold origins")
+    parser.add_argument("--min-train", type=int, default=250)
+    parser.add_argument("--window", type=int, help="train on only the last N bars (default: expanding)")
+    parser.add_argument("--days", type=int, help="only use the last N calendar days of stored history")
+    parser.add_argument("--refresh", action="store_true", help="download new bars into the store first")
+    parser.add_argument("--budget", type=float, help="p95 seconds per fit + predict for the recommendation")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="also write the report and every fold as JSON")
+    args = parser.parse_args()
+
+    symbols = parse_symbols(",".join(args.symbols)) or WATCHLIST
+    configs = [parse_config(c) for c in args.config] or [("default", dict(DEFAULT_PARAMS))]
+    names = [name for name, _ in configs]
+    if len(set(names)) != len(names) or set(names) & set(BASELINES):
+        parser.error("config names must be unique and not clash with the baselines")
+
+    if args.refresh:
+        ohlcv_store.refresh(symbols)
+    histories = {}
+    for symbol in symbols:
+        df = prepare_history(ohlcv_store.history(symbol, args.days))
+        if len(df) < args.min_train + args.horizon:
+            print(f"{symbol}: {len(df)} stored bars, skipped (need {args.min_train + args.horizon})", file=sys.stderr)
+            continue
+        histories[symbol] = df
+    if not histories:
+        sys.exit("no symbol has enough stored history; try --refresh or a smaller --min-train")
+
+    start = time.perf_counter()
+    rows = []
+    # spawn, like the forecast jobs pool: prophet is only imported in the workers
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for row in evaluate(executor, histories, configs, args.folds, args.horizon, args.step, args.min_train, args.window):
+            rows.append(row)
+            if "error" in row:
+                print(f"{row['symbol']} {row['origin']} {row['model']}: {row['error']}", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    report = summarize(rows, args.budget, names)
+    report.update(symbols=list(histories), horizon=args.horizon, wall_s=round(elapsed, 1))
+    print(f"{'model':<14}{'folds':>6}{'MAPE %':>9}{'median':>9}{'cover':>7}{'width %':>9}{'fit s':>8}{'p95 s':>8}{'cpu s':>9}")
+    for model, s in report["models"].items():
+        cells = [s["mape"], s["mape_median"], s["coverage"], s["width"], s["fit_s"], s["p95_s"], s["cpu_s"]]
+        text = [f"{c:.3f}" if c is not None else "-" for c in cells]
+        print(f"{model:<14}{s['folds']:>6}{text[0]:>9}{text[1]:>9}{text[2]:>7}{text[3]:>9}{text[4]:>8}{text[5]:>8}{text[6]:>9}")
+    print(f"{len(histories)} symbols, {len(rows)} folds in {elapsed:.1f}s with {args.workers} workers (target coverage {INTERVAL_WIDTH})")
+    if args.budget is not None:
+        print(f"best within {args.budget}s p95: {report['recommended'] or 'none'}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"summary": report, "folds": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
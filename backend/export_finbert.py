@@ -0,0 +1,119 @@
+"""
+Export FinBERT to ONNX (fp32 and dynamic int8) and compare every inference
+backend against fp32 torch on the labeled headlines.
+
+    python export_finbert.py                 # export into FINBERT_ONNX_DIR
+    python export_finbert.py --evaluate      # export, then report agreement/speed
+    python export_finbert.py --evaluate --skip-export --limit 200
+
+Agreement is the share of texts whose dominant label matches the fp32 torch
+label; accuracy is against the dataset's own label column.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from finbert_backends import BACKENDS, FINBERT_MODEL, FINBERT_ONNX_DIR, load_finbert
+
+DATASET = os.path.join(os.path.dirname(__file__), "..", "stock_sentiment_dataset.csv")
+
+
+def export(onnx_dir, model_id=FINBERT_MODEL, opset=14):
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    os.makedirs(onnx_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    model = AutoModelForSequenceClassification.from_pretrained(model_id).eval()
+    tokenizer.save_pretrained(onnx_dir)
+    model.config.save_pretrained(onnx_dir)
+
+    sample = tokenizer(["Stocks rallied after earnings beat estimates"], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    fp32_path = os.path.join(onnx_dir, "model.onnx")
+    torch.onnx.export(
+        model,
+        tuple(sample[name] for name in names),
+        fp32_path,
+        input_names=names,
+        output_names=["logits"],
+        dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in names}, "logits": {0: "batch"}},
+        opset_version=opset,
+    )
+    print(f"wrote {fp32_path}")
+
+    int8_path = os.path.join(onnx_dir, "model.int8.onnx")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"wrote {int8_path}")
+
+
+def evaluate(texts, gold, backends, onnx_dir=FINBERT_ONNX_DIR, batch_size=32):
+    report = {}
+    reference = None
+    for backend in backends:
+        try:
+            model = load_finbert(backend, onnx_dir=onnx_dir)
+        except Exception as e:
+            report[backend] = {"error": str(e)}
+            continue
+
+        model.predict(texts[:batch_size])  # warm-up
+        start = time.perf_counter()
+        labels = []
+        for i in range(0, len(texts), batch_size):
+            labels += [label for label, _ in model.predict(texts[i:i + batch_size])]
+        elapsed = time.perf_counter() - start
+
+        labels = np.array(labels)
+        if reference is None and backend == "torch":
+            reference = labels
+        report[backend] = {
+            "texts_per_sec": round(len(texts) / elapsed, 1),
+            "accuracy": round(float((labels == gold).mean()), 4),
+            "agreement_with_fp32": round(float((labels == reference).mean()), 4) if reference is not None else None
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--onnx-dir", default=FINBERT_ONNX_DIR)
+    parser.add_argument("--skip-export", action="store_true")
+    parser.add_argument("--evaluate", action="store_true")
+    parser.add_argument("--dataset", default=DATASET)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--output", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        export(args.onnx_dir)
+
+    if args.evaluate:
+        df = pd.read_csv(args.dataset).dropna(subset=["text", "label"])
+        if args.limit:
+            df = df.head(args.limit)
+        texts = df["text"].astype(str).tolist()
+        gold = df["label"].str.lower().to_numpy()
+
+        # torch first so the others can be compared against it
+        report = evaluate(texts, gold, BACKENDS, args.onnx_dir, args.batch_size)
+        print(f"{'backend':<12}{'texts/s':>10}{'accuracy':>10}{'agree fp32':>12}")
+        for backend, row in report.items():
+            if "error" in row:
+                print(f"{backend:<12}  {row['error']}")
+            else:
+                print(f"{backend:<12}{row['texts_per_sec']:>10}{row['accuracy']:>10}{str(row['agreement_with_fp32']):>12}")
+
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({"n_texts": len(texts), "backends": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Offline stand-ins for the upstreams and downloaded models the backend
+uses, for benchmarks and load tests that must not depend on the network.
+
+    FakeMarket      deterministic daily/minute bars and headlines per symbol:
+                    recorded SYMBOL.csv files (Date,Open,High,Low,Close,Volume)
+                    when a directory is given, otherwise a random walk seeded
+                    from the symbol, so every run sees the same prices
+    StubChatOllama  answers any prompt with canned text derived from it,
+                    optionally paced like a local model (first token delay,
+                    tokens per second)
+    stub_finbert    FinBERT-shaped classifier with made-up but deterministic
+                    probabilities, so sentiment needs no downloaded weights
+                    (VADER is a pip package and runs offline as is)
+
+install() registers them as the yfinance and langchain_ollama modules and
+the FinBERT loader; call it before main, agent, news or sentiment are
+imported. scratch_environment() points every on-disk store at a temp dir.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+import zlib
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+PERIOD_DAYS = {"1d": 1, "2d": 2, "5d": 5, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731, "5y": 1827, "10y": 3653, "max": 36500}
+MINUTES_PER_SESSION = 390
+
+HEADLINES = [
+    "{s} shares rise after earnings beat estimates",
+    "{s} falls as analysts cut price target",
+    "{s} announces new buyback program",
+    "Investors weigh {s} guidance ahead of Fed decision",
+    "{s} rallies on strong quarterly revenue growth",
+    "{s} slips after downgrade to neutral",
+    "What {s}'s latest product launch means for margins",
+    "{s} expands partnership in cloud and AI push"
+]
+
+
+def _seed(symbol, salt=""):
+    return zlib.crc32(f"{symbol.upper()}|{salt}".encode("utf-8"))
+
+
+class FakeMarket:
+    """
+    Daily bars for about `years` of business days up to today plus one
+    session of minute bars, per symbol. latency_ms is slept on every
+    upstream call to model the real round trip; calls counts them.
+    """
+
+    def __init__(self, recorded_dir=None, years=5, latency_ms=0.0):
+        self.recorded_dir = recorded_dir
+        self.years = years
+        self.latency = latency_ms / 1000.0
+        self.calls = 0
+        self._daily = {}
+        self._lock = threading.Lock()
+
+    def _call(self):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _recorded(self, symbol):
+        path = os.path.join(self.recorded_dir, f"{symbol}.csv") if self.recorded_dir else None
+        if not path or not os.path.exists(path):
+            return None
+        df = pd.read_csv(path, parse_dates=["Date"], index_col="Date")
+        return df.reindex(columns=FIELDS).astype(float).sort_index()
+
+    def daily(self, symbol):
+        symbol = symbol.upper()
+        with self._lock:
+            df = self._daily.get(symbol)
+        if df is not None:
+            return df
+        df = self._recorded(symbol)
+        if df is None:
+            rng = np.random.default_rng(_seed(symbol))
+            index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=252 * self.years, name="Date")
+            close = rng.uniform(20, 500) * np.exp(np.cumsum(rng.normal(0.0003, 0.018, len(index))))
+            spread = np.abs(rng.normal(0, 0.008, len(index)))
+            df = pd.DataFrame({
+                "Open": close * (1 + rng.normal(0, 0.004, len(index))),
+                "High": close * (1 + spread),
+                "Low": close * (1 - spread),
+                "Close": close,
+                "Volume": rng.integers(1_000_000, 50_000_000, len(index)).astype(float)
+            }, index=index)
+        with self._lock:
+            self._daily[symbol] = df
+        return df
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        """Bars like yf.Ticker.history / yf.download: period ("5d", "1y", ...) or start date."""
+        daily = self.daily(symbol)
+        if interval == "1m":
+            return self.minutes(symbol, daily)
+        if start is not None:
+            return daily[daily.index >= pd.Timestamp(start)]
+        if period in ("1d", "2d", "5d"):
+            return daily.iloc[-PERIOD_DAYS[period]:]
+        days = PERIOD_DAYS.get(period or "1mo", 31)
+        return daily[daily.index >= daily.index[-1] - pd.Timedelta(days=days)]
+
+    def minutes(self, symbol, daily):
+        # One session around the last daily close, ending on it
+        rng = np.random.default_rng(_seed(symbol, "1m"))
+        last = daily.iloc[-1]
+        start = daily.index[-1] + pd.Timedelta(hours=9, minutes=30)
+        index = pd.date_range(start, periods=MINUTES_PER_SESSION, freq="min", name="Datetime")
+        path = np.cumsum(rng.normal(0, 0.0006, MINUTES_PER_SESSION))
+        close = last["Close"] * np.exp(path - path[-1])
+        return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1000.0}, index=index)
+
+    def news(self, symbol):
+        symbol = symbol.upper()
+        rng = np.random.default_rng(_seed(symbol, "news"))
+        picks = rng.choice(len(HEADLINES), size=5, replace=False)
+        return [
+            {"title": HEADLINES[i].format(s=symbol), "publisher": "Fake Wire", "link": f"https://example.com/{symbol.lower()}/{i}"}
+            for i in picks
+        ]
+
+
+def fake_yfinance(market):
+    """A module exposing the parts of yfinance the backend uses: Ticker(...).history/.news and download."""
+    module = types.ModuleType("yfinance")
+
+    class Ticker:
+        def __init__(self, symbol):
+            self.ticker = symbol.upper()
+
+        def history(self, period="1mo", interval="1d", start=None, **kwargs):
+            market._call()
+            return market.history(self.ticker, period, start, interval).copy()
+
+        @property
+        def news(self):
+            market._call()
+            return market.news(self.ticker)
+
+    def download(tickers, period=None, start=None, interval="1d", group_by="column", progress=False, **kwargs):
+        market._call()
+        symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {s.upper(): market.history(s, period, start, interval) for s in symbols}
+        df = pd.concat(frames, axis=1)  # (ticker, field) columns
+        if group_by != "ticker":
+            df = df.swaplevel(axis=1).sort_index(axis=1)
+        return df
+
+    module.Ticker = Ticker
+    module.download = download
+    module.market = market
+    return module
+
+
+class StubChatOllama:
+    """
+    langchain_ollama.ChatOllama look-alike. The answer is a fixed template
+    plus a digest of the prompt, about `tokens` words long; first_token_ms
+    and tokens_per_s (0 = instant) set the pacing.
+    """
+
+    first_token_ms = 0.0
+    tokens_per_s = 0.0
+    tokens = 60
+
+    def __init__(self, model="phi3", **kwargs):
+        self.model = model
+        self.calls = 0
+
+    def _words(self, prompt):
+        digest = f"{zlib.crc32(str(prompt).encode('utf-8')):08x}"
+        words = f"[stub {self.model} {digest}] Based on the headlines and sentiment above, here is a short market summary.".split()
+        filler = "Prices reflect recent news flow while volatility and positioning remain the key risks to watch.".split()
+        while len(words) < self.tokens:
+            words += filler
+        return [w + " " for w in words[:self.tokens]]
+
+    def _pacing(self):
+        # (seconds before the first token, seconds per token)
+        return self.first_token_ms / 1000.0, 1.0 / self.tokens_per_s if self.tokens_per_s else 0.0
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        words = self._words(prompt)
+        first, per_token = self._pacing()
+        time.sleep(first + per_token * len(words))
+        return types.SimpleNamespace(content="".join(words).strip())
+
+    async def ainvoke(self, prompt, **kwargs):
+        self.calls += 1
+        words = self._words(prompt)
+        first, per_token = self._pacing()
+        await asyncio.sleep(first + per_token * len(words))
+        return types.SimpleNamespace(content="".join(words).strip())
+
+    async def astream(self, prompt, **kwargs):
+        self.calls += 1
+        words = self._words(prompt)
+        first, per_token = self._pacing()
+        await asyncio.sleep(first)
+        for word in words:
+            if per_token:
+                await asyncio.sleep(per_token)
+            yield types.SimpleNamespace(content=word)
+
+
+def stub_finbert(*args, **kwargs):
+    """Drop-in for finbert_backends.load_finbert: probabilities seeded from each text's hash."""
+    from finbert_backends import FinBERT, softmax
+
+    def run(texts):
+        logits = np.array([np.random.default_rng(zlib.crc32(t.encode("utf-8"))).normal(0, 2, 3) for t in texts])
+        return softmax(logits.reshape(len(texts), 3))
+
+    return FinBERT("stub", None, ["positive", "negative", "neutral"], run)
+
+
+def install(market=None, first_token_ms=0.0, tokens_per_s=0.0):
+    """
+    Register FakeMarket (a default one if not given) as yfinance,
+    StubChatOllama with this pacing as langchain_ollama.ChatOllama and
+    stub_finbert as the FinBERT loader. Returns the market so callers can
+    read its call count.
+    """
+    import finbert_backends
+
+    market = market or FakeMarket()
+    sys.modules["yfinance"] = fake_yfinance(market)
+    llm_module = types.ModuleType("langchain_ollama")
+    llm_module.ChatOllama = type("ChatOllama", (StubChatOllama,), {"first_token_ms": first_token_ms, "tokens_per_s": tokens_per_s})
+    sys.modules["langchain_ollama"] = llm_module
+    # sentiment.py binds the loader at import, so this must run first
+    finbert_backends.load_finbert = stub_finbert
+    return market
+
+
+def scratch_environment(prefix, **overrides):
+    """
+    Point the OHLCV store, model cache, sentiment cache and backtest datasets
+    at a fresh temp directory and keep Hugging Face offline, via environment
+    variables that forecast workers inherit. Call before importing main.
+    Returns the directory.
+    """
+    scratch = tempfile.mkdtemp(prefix=prefix)
+    os.environ.update({
+        "OHLCV_STORE_DIR": os.path.join(scratch, "ohlcv"),
+        "MODEL_CACHE_DIR": os.path.join(scratch, "models"),
+        "SENTIMENT_CACHE_PATH": os.path.join(scratch, "sentiment.sqlite3"),
+        "BACKTEST_DATASET_DIR": os.path.join(scratch, "datasets"),
+        "HF_HUB_OFFLINE": "1",
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+        **overrides
+    })
+    return scratch
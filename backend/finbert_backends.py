@@ -0,0 +1,98 @@
+"""
+Interchangeable CPU inference backends for FinBERT.
+
+    torch       fp32 PyTorch (the reference)
+    torch-int8  PyTorch with dynamic int8 quantization of the Linear layers
+    onnx        ONNX Runtime on the graph exported by export_finbert.py
+    onnx-int8   ONNX Runtime on the dynamically quantized export
+
+Every backend is loaded as a FinBERT object whose predict_proba(texts)
+returns an (n_texts, n_labels) softmax array in the model's label order.
+"""
+import os
+
+import numpy as np
+
+FINBERT_MODEL = "ProsusAI/finbert"
+FINBERT_BACKEND = os.getenv("FINBERT_BACKEND", "torch")
+FINBERT_ONNX_DIR = os.getenv("FINBERT_ONNX_DIR", os.path.join(os.path.dirname(__file__), ".finbert_onnx"))
+
+BACKENDS = ["torch", "torch-int8", "onnx", "onnx-int8"]
+ONNX_FILES = {"onnx": "model.onnx", "onnx-int8": "model.int8.onnx"}
+
+
+def softmax(logits):
+    z = logits - logits.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+class FinBERT:
+    def __init__(self, backend, tokenizer, labels, run):
+        self.backend = backend
+        self.tokenizer = tokenizer
+        self.labels = labels
+        self._run = run
+
+    def predict_proba(self, texts):
+        return self._run(list(texts))
+
+    def predict(self, texts):
+        """[(label, confidence), ...] for the dominant label of each text."""
+        probs = self.predict_proba(texts)
+        idx = probs.argmax(axis=-1)
+        return [(self.labels[i], float(p[i])) for i, p in zip(idx, probs)]
+
+
+def _load_torch(model_id, revision, quantize):
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    tokenizer = AutoTokenizer.from_pretrained(model_id, revision=revision)
+    model = AutoModelForSequenceClassification.from_pretrained(model_id, revision=revision).eval()
+    if quantize:
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def run(texts):
+        inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True)
+        with torch.inference_mode():
+            logits = model(**inputs).logits
+        return torch.softmax(logits, dim=-1).numpy()
+
+    labels = [model.config.id2label[i] for i in range(model.config.num_labels)]
+    return tokenizer, labels, run
+
+
+def _load_onnx(onnx_dir, filename):
+    import onnxruntime as ort
+    from transformers import AutoConfig, AutoTokenizer
+
+    path = os.path.join(onnx_dir, filename)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; run `python export_finbert.py` first")
+
+    tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+    config = AutoConfig.from_pretrained(onnx_dir)
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+    input_names = [i.name for i in session.get_inputs()]
+
+    def run(texts):
+        inputs = tokenizer(texts, return_tensors="np", padding=True, truncation=True)
+        feeds = {name: inputs[name].astype(np.int64) for name in input_names}
+        return softmax(session.run(["logits"], feeds)[0])
+
+    labels = [config.id2label[i] for i in range(config.num_labels)]
+    return tokenizer, labels, run
+
+
+def load_finbert(backend=FINBERT_BACKEND, model_id=FINBERT_MODEL, revision="main", onnx_dir=FINBERT_ONNX_DIR):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown FinBERT backend {backend!r}, expected one of {BACKENDS}")
+
+    if backend in ONNX_FILES:
+        tokenizer, labels, run = _load_onnx(onnx_dir, ONNX_FILES[backend])
+    else:
+        tokenizer, labels, run = _load_torch(model_id, revision, quantize=backend == "torch-int8")
+    return FinBERT(backend, tokenizer, labels, run)
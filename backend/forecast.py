@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from marketdata import checked_symbol
+from store import ohlcv_store
+
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".model_cache"))
+
+
+def prepare_history(df):
+    """Turn a Date-indexed OHLCV frame (yf.download or the local store) into Prophet's ds/y layout."""
+    # Flatten columns if MultiIndex (fix for new yfinance)
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+
+    df = df.reset_index()
+    df = df.rename(columns={"Date": "ds", "Close": "y"})
+    df = df[["ds", "y"]]
+    df["y"] = pd.to_numeric(df["y"], errors="coerce")
+    df = df.dropna(subset=["y"])
+    return df
+
+
+def load_history(symbol, days=365):
+    # Read from the local store; the API process refreshes it before submitting work
+    df = ohlcv_store.history(symbol, days)
+    if df.empty:
+        return df
+    return prepare_history(df)
+
+
+def load_histories(symbols, days=365):
+    """Refresh every symbol with one bulk download and return {symbol: ds/y frame}."""
+    ohlcv_store.refresh(symbols)
+    return {symbol: load_history(symbol, days) for symbol in symbols}
+
+
+def warm_start_params(model):
+    # Prophet's documented warm-start recipe: reuse the fitted parameters
+    # as the optimizer's starting point instead of Stan's default init
+    res = {}
+    for pname in ["k", "m", "sigma_obs"]:
+        if model.mcmc_samples == 0:
+            res[pname] = model.params[pname][0][0]
+        else:
+            res[pname] = np.mean(model.params[pname])
+    for pname in ["delta", "beta"]:
+        if model.mcmc_samples == 0:
+            res[pname] = model.params[pname][0]
+        else:
+            res[pname] = np.mean(model.params[pname], axis=0)
+    return res
+
+
+def fit_model(df, init=None):
+    # prophet (and cmdstanpy) are imported in the pool workers only
+    from prophet import Prophet
+
+    model = Prophet(daily_seasonality=True)
+    if init is None:
+        model.fit(df)
+        return model
+
+    try:
+        model.fit(df, init=init)
+    except Exception:
+        # Shapes can change (e.g. fewer changepoints on short histories);
+        # fall back to a cold fit rather than failing the request
+        model = Prophet(daily_seasonality=True)
+        model.fit(df)
+    return model
+
+
+def make_forecast(model, days):
+    future = model.make_future_dataframe(periods=days)
+    forecast = model.predict(future)
+
+    results = forecast.tail(days)[["ds", "yhat", "yhat_lower", "yhat_upper"]].copy()
+    results["ds"] = results["ds"].dt.strftime('%Y-%m-%d')
+    return results.to_dict(orient="records")
+
+
+def last_bar(df):
+    """Date and close of the last row of a ds/y frame, e.g. "2024-05-03@189.87"."""
+    last = df.loc[df["ds"].idxmax()]
+    return f"{pd.Timestamp(last['ds']):%Y-%m-%d}@{float(last['y'])!r}"
+
+
+class ModelCache:
+    """
+    Fitted Prophet models keyed by symbol and the last bar (date and close)
+    they were trained on, kept in memory and serialized to MODEL_CACHE_DIR.
+
+    A model is reused as long as the last bar is unchanged; otherwise it is
+    refit, warm-started from the previous fit's parameters. The close is part
+    of the key because the OHLCV store rewrites today's partial bar in place
+    during the session: the date stays the same while the price moves.
+    """
+
+    def __init__(self, cache_dir=MODEL_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._models = {}  # symbol -> (last_bar, model)
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fits = 0
+        self.warm_fits = 0
+
+    def _symbol_lock(self, symbol):
+        with self._lock:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _path(self, symbol):
+        return os.path.join(self.cache_dir, f"{checked_symbol(symbol)}.json")
+
+    def _load(self, symbol):
+        from prophet.serialize import model_from_json
+        try:
+            with open(self._path(symbol)) as f:
+                saved = json.load(f)
+            return saved["last_bar"], model_from_json(saved["model"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save(self, symbol, bar, model):
+        from prophet.serialize import model_to_json
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._path(symbol) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"last_bar": bar, "model": model_to_json(model)}, f)
+        os.replace(tmp_path, self._path(symbol))
+
+    def get_model(self, symbol, df):
+        """Return a model fitted on df, refitting only if df's last bar is new or has changed."""
+        symbol = symbol.upper()
+        bar = last_bar(df)
+
+        # One fit per symbol at a time; other symbols are not blocked
+        with self._symbol_lock(symbol):
+            cached = self._models.get(symbol)
+            if cached is None or cached[0] != bar:
+                # Another worker may already have saved a model for this bar (jobs.py runs one fit per symbol at a time)
+                cached = self._load(symbol) or cached
+            if cached is not None and cached[0] == bar:
+                self._models[symbol] = cached
+                self.hits += 1
+                return cached[1]
+
+            init = warm_start_params(cached[1]) if cached is not None else None
+            model = fit_model(df, init=init)
+            self.fits += 1
+            if init is not None:
+                self.warm_fits += 1
+
+            self._models[symbol] = (bar, model)
+            try:
+                self._save(symbol, bar, model)
+            except OSError:
+                pass  # the in-memory copy is still usable
+            return model
+
+    def stats(self):
+        return {
+            "models": len(self._models),
+            "hits": self.hits,
+            "fits": self.fits,
+            "warm_fits": self.warm_fits
+        }
+
+
+def warm_up():
+    """Import prophet in a pool worker ahead of the first fit; returns the seconds it took."""
+    start = time.perf_counter()
+    import prophet.serialize  # noqa: F401
+    return round(time.perf_counter() - start, 3)
+
+
+# Per-process model cache used by pool workers; the disk tier is shared
+_worker_models = None
+
+
+def forecast_symbol(symbol, days):
+    """Load history, fit (or reuse) a model and forecast one symbol. Runs in a pool worker."""
+    return forecast_history(symbol, load_history(symbol), days)
+
+
+def forecast_history(symbol, df, days):
+    """Fit (or reuse) a model on an already loaded history. Runs in a pool worker."""
+    global _worker_models
+    if _worker_models is None:
+        _worker_models = ModelCache()
+
+    if df.empty:
+        return {"error": "No data available", "forecast": []}
+
+    if len(df) < 30:
+        return {"error": "Insufficient data for prediction (need at least 30 days)", "forecast": []}
+
+    # Timed here because the parent's metrics never see the worker's; fit only when one ran
+    fits = _worker_models.fits
+    start = time.perf_counter()
+    try:
+        model = _worker_models.get_model(symbol, df)
+    except Exception as model_error:
+        return {"error": f"Model training failed: {str(model_error)}", "forecast": []}
+    fitted = time.perf_counter()
+
+    forecast = make_forecast(model, days)
+    timings = {"prophet_predict": round((time.perf_counter() - fitted) * 1000, 1)}
+    if _worker_models.fits > fits:
+        timings["prophet_fit"] = round((fitted - start) * 1000, 1)
+    return {"symbol": symbol, "forecast": forecast, "timings": timings}
@@ -0,0 +1,195 @@
+"""
+Financial glossary shared by the API, the chat agent and the Streamlit apps.
+
+Terms come from glossary.csv (term,definition; GLOSSARY_PATH to swap in a
+bigger file) and are indexed once:
+
+    prefix trie      autocomplete; every node keeps its best few terms
+    trigram index    typo-tolerant term matching (Dice similarity)
+    BM25             full-text search over the definitions
+
+search() ranks exact matches first, then prefix, fuzzy and definition hits.
+"""
+import csv
+import heapq
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from itertools import chain
+
+from lazy import lazy
+
+GLOSSARY_PATH = os.getenv("GLOSSARY_PATH", os.path.join(os.path.dirname(__file__), "glossary.csv"))
+
+TRIE_TOP_K = 10
+FUZZY_MIN_SIMILARITY = 0.3
+# Candidates verified per fuzzy query, seeded from the rarest trigrams' postings up to this many ids
+FUZZY_CANDIDATES = 64
+FUZZY_SEED_BUDGET = 1024
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Postings keep only each token's highest-impact documents, so a query never walks a stopword's full list
+BM25_MAX_POSTING = 64
+
+# Matches of a better kind always rank above matches of a worse kind
+MATCH_RANK = {"exact": 0, "prefix": 1, "fuzzy": 2, "definition": 3}
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class Glossary:
+    def __init__(self, entries):
+        """entries: iterable of (term, definition)."""
+        self.terms = []
+        self.definitions = []
+        self._ids = {}  # normalized term -> id
+        for term, definition in entries:
+            key = normalize(term)
+            if not key or key in self._ids:
+                continue
+            self._ids[key] = len(self.terms)
+            self.terms.append(key)
+            self.definitions.append(definition.strip())
+
+        self._build_trie()
+        self._build_trigrams()
+        self._build_bm25()
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _build_trie(self):
+        # node = [children, top term ids]; shorter terms first so "bond" outranks "bond ladder"
+        self._trie = [{}, []]
+        for i in sorted(range(len(self.terms)), key=lambda i: (len(self.terms[i]), self.terms[i])):
+            node = self._trie
+            for c in self.terms[i]:
+                node = node[0].setdefault(c, [{}, []])
+                if len(node[1]) < TRIE_TOP_K:
+                    node[1].append(i)
+
+    def _build_trigrams(self):
+        self._grams = [trigrams(term) for term in self.terms]
+        self._postings = defaultdict(list)  # trigram -> term ids
+        for i, grams in enumerate(self._grams):
+            for gram in grams:
+                self._postings[gram].append(i)
+
+    def _build_bm25(self):
+        # Terms are part of their own document so "sharpe" finds "sharpe ratio" by text too
+        docs = [Counter(TOKEN.findall(f"{term} {definition}".lower())) for term, definition in zip(self.terms, self.definitions)]
+        doc_len = [sum(counts.values()) for counts in docs]
+        n = len(docs)
+        avgdl = sum(doc_len) / n if n else 0
+
+        tfs = defaultdict(list)  # token -> [(doc id, tf)]
+        for i, counts in enumerate(docs):
+            for token, tf in counts.items():
+                tfs[token].append((i, tf))
+
+        # Precomputed per-document BM25 contributions, highest first
+        self._impacts = {}
+        for token, postings in tfs.items():
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            impacts = [
+                (i, idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * doc_len[i] / avgdl)))
+                for i, tf in postings
+            ]
+            impacts.sort(key=lambda item: -item[1])
+            self._impacts[token] = impacts[:BM25_MAX_POSTING]
+
+    def lookup(self, term):
+        """Definition for an exact (case/whitespace-insensitive) term, or None."""
+        i = self._ids.get(normalize(term))
+        return self.definitions[i] if i is not None else None
+
+    def complete(self, prefix, limit=TRIE_TOP_K):
+        """Term ids starting with prefix, shortest first."""
+        node = self._trie
+        for c in normalize(prefix):
+            node = node[0].get(c)
+            if node is None:
+                return []
+        return node[1][:limit]
+
+    def fuzzy(self, query, limit=TRIE_TOP_K):
+        """[(term id, similarity)] for terms that look like query, best first."""
+        grams = trigrams(normalize(query))
+        postings = sorted((self._postings[g] for g in grams if g in self._postings), key=len)
+        if not postings:
+            return []
+        # Seed candidates from the rarest trigrams, then score them exactly
+        seeds = [postings[0]]
+        budget = FUZZY_SEED_BUDGET - len(postings[0])
+        for p in postings[1:]:
+            if len(p) > budget:
+                break
+            seeds.append(p)
+            budget -= len(p)
+        candidates = Counter(chain.from_iterable(seeds)).most_common(FUZZY_CANDIDATES)
+        scored = []
+        for i, _ in candidates:
+            similarity = 2 * len(grams & self._grams[i]) / (len(grams) + len(self._grams[i]))
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                scored.append((i, similarity))
+        scored.sort(key=lambda item: -item[1])
+        return scored[:limit]
+
+    def bm25(self, query, limit=TRIE_TOP_K):
+        """[(term id, score)] for definitions matching the query words, best first."""
+        scores = defaultdict(float)
+        for token in set(TOKEN.findall(query.lower())):
+            for i, impact in self._impacts.get(token, ()):
+                scores[i] += impact
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def search(self, query, limit=10):
+        """Ranked [{term, definition, match, score}] for a free-text query."""
+        query = normalize(query)
+        if not query:
+            return []
+
+        best = {}  # term id -> (match, score)
+
+        def offer(i, match, score):
+            current = best.get(i)
+            if current is None or (MATCH_RANK[match], -score) < (MATCH_RANK[current[0]], -current[1]):
+                best[i] = (match, score)
+
+        exact = self._ids.get(query)
+        if exact is not None:
+            offer(exact, "exact", 1.0)
+        for i in self.complete(query, limit):
+            offer(i, "prefix", len(query) / len(self.terms[i]))
+        # A worse kind of match can't reach the top `limit` once the better kinds fill it
+        if len(best) < limit:
+            for i, similarity in self.fuzzy(query, limit):
+                offer(i, "fuzzy", similarity)
+        if len(best) < limit:
+            for i, score in self.bm25(query, limit):
+                offer(i, "definition", score)
+
+        ranked = sorted(best.items(), key=lambda item: (MATCH_RANK[item[1][0]], -item[1][1]))[:limit]
+        return [
+            {"term": self.terms[i], "definition": self.definitions[i], "match": match, "score": round(score, 4)}
+            for i, (match, score) in ranked
+        ]
+
+
+def load_entries(path=GLOSSARY_PATH):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(row["term"], row["definition"]) for row in csv.DictReader(f)]
+
+
+# Indexed on first use (or /api/warmup)
+glossary = lazy("glossary", lambda: Glossary(load_entries()))
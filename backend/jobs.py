@@ -0,0 +1,249 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from batch_forecast import batch_error_results
+from forecast import forecast_history, forecast_symbol, load_histories, warm_up as warm_up_worker
+from metrics import observe_timings
+
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+FORECAST_QUEUE_LIMIT = int(os.getenv("FORECAST_QUEUE_LIMIT", 32))
+
+CANCELLED_RESULT = {"error": "Forecast job was cancelled", "forecast": []}
+
+
+class ForecastJobs:
+    """
+    Runs Prophet forecasts in a bounded process pool so CPU-bound fits never
+    occupy the FastAPI request threads.
+
+    Jobs wait in our own queue (not the executor's) so they can be cancelled
+    and counted; at most `workers` are handed to the pool at a time. A second
+    submit for a (symbol, days) pair that is still queued or running returns
+    the existing job. Fits are deduplicated per symbol: a job for a symbol
+    that is already being forecast (another horizon, or in a batch) stays
+    queued until that one is done, then reuses its model from the shared
+    disk cache instead of fitting the same history in a second worker.
+
+    Batch forecasts share the same slots: their fits queue behind every
+    interactive job and never take more than workers - 1 slots (one with a
+    single worker), so a big batch can't hold /api/predict back by more than
+    one fit.
+    """
+
+    def __init__(self, workers=FORECAST_WORKERS, max_queue=FORECAST_QUEUE_LIMIT, keep_finished=500):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.keep_finished = keep_finished
+        # spawn, not fork: the server process has threads (and possibly torch) loaded
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self._jobs = OrderedDict()  # job_id -> job dict
+        self._active = {}  # (symbol, days) -> job_id of a queued/running job
+        self._queue = deque()
+        self._batch_queue = deque()  # (symbol, history, days, results queue, submitted_at)
+        self._running = 0
+        self._batch_running = 0
+        self._busy = Counter()  # symbol -> fits running for it
+        self.max_batch_running = max(1, workers - 1)
+        self._lock = threading.RLock()
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.warm = False
+
+    def submit(self, symbol, days):
+        """Queue a forecast. Returns the job dict, or None if the queue is full."""
+        symbol = symbol.upper()
+        with self._lock:
+            job_id = self._active.get((symbol, days))
+            if job_id is not None:
+                self.deduplicated += 1
+                return self._jobs[job_id]
+
+            if len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                return None
+
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "symbol": symbol,
+                "days": days,
+                "status": "queued",
+                "created": time.time(),
+                "started": None,
+                "finished": None,
+                "result": None,
+                "future": Future()
+            }
+            self._jobs[job["job_id"]] = job
+            self._active[(symbol, days)] = job["job_id"]
+            self._queue.append(job["job_id"])
+            self.submitted += 1
+            self._prune()
+            self._dispatch()
+            return job
+
+    def _take(self, pending, symbol_of):
+        # Oldest entry whose symbol has no fit running, removed from pending; caller holds the lock
+        for entry in pending:
+            if not self._busy[symbol_of(entry)]:
+                pending.remove(entry)
+                return entry
+        return None
+
+    def _release(self, symbol):
+        # Caller holds the lock
+        self._busy[symbol] -= 1
+        if not self._busy[symbol]:
+            del self._busy[symbol]
+
+    def _dispatch(self):
+        # Caller holds the lock; interactive jobs always go before batch fits
+        while self._running < self.workers:
+            job_id = self._take(self._queue, lambda job_id: self._jobs[job_id]["symbol"])
+            if job_id is not None:
+                job = self._jobs[job_id]
+                job["status"] = "running"
+                job["started"] = time.time()
+                self._running += 1
+                self._busy[job["symbol"]] += 1
+                pool_future = self._executor.submit(forecast_symbol, job["symbol"], job["days"])
+                pool_future.add_done_callback(lambda f, job_id=job_id, symbol=job["symbol"]: self._finished(job_id, symbol, f))
+                continue
+
+            item = self._take(self._batch_queue, lambda item: item[0]) if self._batch_running < self.max_batch_running else None
+            if item is None:
+                break
+            symbol, history, days = item[:3]
+            self._running += 1
+            self._batch_running += 1
+            self._busy[symbol] += 1
+            pool_future = self._executor.submit(forecast_history, symbol, history, days)
+            pool_future.add_done_callback(lambda f, item=item: self._batch_finished(item, f))
+
+    def _finished(self, job_id, symbol, pool_future):
+        try:
+            result = pool_future.result()
+        except Exception as e:
+            result = {"error": str(e), "forecast": []}
+        observe_timings(result.get("timings"))
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            self._running -= 1
+            self._release(symbol)
+            if job is not None:
+                job["status"] = "failed" if "error" in result else "done"
+                job["finished"] = time.time()
+                job["result"] = result
+                self._active.pop((job["symbol"], job["days"]), None)
+            self._dispatch()
+
+        if job is not None:
+            job["future"].set_result(result)
+
+    def _batch_finished(self, item, pool_future):
+        symbol, _, _, results, submitted_at = item
+        try:
+            result = pool_future.result()
+        except Exception as e:
+            result = {"error": str(e), "forecast": []}
+        observe_timings(result.get("timings"))
+
+        with self._lock:
+            self._running -= 1
+            self._batch_running -= 1
+            self._release(symbol)
+            self._dispatch()
+        results.put({**result, "symbol": symbol, "seconds": round(time.perf_counter() - submitted_at, 3)})
+
+    def forecast_batch(self, symbols, days):
+        """
+        Stream forecasts for many symbols from one bulk download, in
+        completion order. If the download fails every symbol gets an error
+        result. Fits not started when the caller stops reading are dropped.
+        """
+        try:
+            histories = load_histories(symbols)
+        except Exception as e:
+            yield from batch_error_results(symbols, e)
+            return
+
+        results = queue.Queue()
+        now = time.perf_counter()
+        with self._lock:
+            self._batch_queue.extend((symbol, histories[symbol], days, results, now) for symbol in symbols)
+            self._dispatch()
+        try:
+            for _ in symbols:
+                yield results.get()
+        finally:
+            with self._lock:
+                self._batch_queue = deque(item for item in self._batch_queue if item[3] is not results)
+
+    def warm_up(self):
+        """Start the worker processes and import prophet in them; returns the slowest worker's seconds."""
+        futures = [self._executor.submit(warm_up_worker) for _ in range(self.workers)]
+        seconds = max(f.result() for f in futures)
+        self.warm = True
+        return seconds
+
+    def _prune(self):
+        # Caller holds the lock; drop the oldest finished jobs beyond keep_finished
+        finished = [jid for jid, j in self._jobs.items() if j["finished"] is not None]
+        for jid in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[jid]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a queued job. Running jobs cannot be interrupted and return False."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                return False
+            self._queue.remove(job_id)
+            self._active.pop((job["symbol"], job["days"]), None)
+            job["status"] = "cancelled"
+            job["finished"] = time.time()
+            job["result"] = CANCELLED_RESULT
+        job["future"].set_result(CANCELLED_RESULT)
+        return True
+
+    def describe(self, job):
+        info = {k: v for k, v in job.items() if k != "future"}
+        if job["status"] == "queued":
+            with self._lock:
+                info["position"] = self._queue.index(job["job_id"]) + 1 if job["job_id"] in self._queue else 0
+        return info
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "queued": len(self._queue),
+                "batch_running": self._batch_running,
+                "batch_queued": len(self._batch_queue),
+                "max_queue": self.max_queue,
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "rejected": self.rejected
+            }
+
+    def shutdown(self):
+        with self._lock:
+            cancelled = [self._jobs[job_id] for job_id in self._queue]
+            self._queue.clear()
+            self._batch_queue.clear()
+        for job in cancelled:
+            job["status"] = "cancelled"
+            job["future"].set_result(CANCELLED_RESULT)
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,61 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("marketvision.startup")
+
+# name -> LazyResource, for /api/ready and /api/warmup
+resources = {}
+
+# import/setup step -> seconds, filled in while main.py is imported
+startup_timings = {}
+
+
+class LazyResource:
+    """Builds an expensive object (model, client) on first use and records how long it took."""
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.load_seconds = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.load_seconds is not None
+
+    def get(self):
+        if self.load_seconds is None:
+            with self._lock:
+                if self.load_seconds is None:
+                    start = time.perf_counter()
+                    self._value = self.factory()
+                    self.load_seconds = round(time.perf_counter() - start, 3)
+                    logger.info("loaded %s in %.2fs", self.name, self.load_seconds)
+        return self._value
+
+
+def lazy(name, factory):
+    resource = LazyResource(name, factory)
+    resources[name] = resource
+    return resource
+
+
+def status():
+    return {name: {"loaded": r.loaded, "load_seconds": r.load_seconds} for name, r in resources.items()}
+
+
+@contextmanager
+def startup_timer(step):
+    start = time.perf_counter()
+    yield
+    startup_timings[step] = round(time.perf_counter() - start, 3)
+
+
+def log_startup_breakdown():
+    total = sum(startup_timings.values())
+    parts = ", ".join(f"{step} {seconds:.2f}s" for step, seconds in startup_timings.items())
+    deferred = [name for name, r in resources.items() if not r.loaded]
+    logger.info("startup %.2fs (%s); deferred until first use: %s", total, parts, ", ".join(deferred) or "none")
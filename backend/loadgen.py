@@ -0,0 +1,327 @@
+"""
+Load generator: simulated dashboard users against one uvicorn process.
+
+    python loadgen.py --users 10 50 100 --duration 60 --output load.json
+    python loadgen.py --url http://127.0.0.1:8000 --users 25    # a server you started
+    python loadgen.py --serve --port 8000                       # just the stubbed server
+
+Without --url a server is started on localhost (main:app under uvicorn, one
+process) with the upstreams replaced by fakes.py: yfinance answers after
+--upstream-latency-ms and the stub LLM streams at --llm-tokens-per-s after
+--llm-first-token-ms, roughly what Yahoo and a local phi3 cost. FinBERT is
+stubbed too, so no model weights are needed.
+
+Every user behaves like frontend/app.js: on load it fetches the watchlist
+quotes plus the first card's quote and daily chart, then polls
+/api/quotes every --poll seconds. On each poll it may also (MIX, --mix)
+open another card, type into the glossary search box, ask for a forecast
+or send a burst of chat messages over /api/chat/stream.
+
+Each --users value is one stage of --duration seconds. The report has
+p50/p95/p99 latency and error rate per endpoint (chat also as time to
+first byte), and requests/s, errors and p99 per --interval over time.
+Overall p99s use chat's first byte rather than the whole stream.
+--p99-budget-ms names the largest stage whose overall p99 stayed within it
+with an error rate of at most --max-error-rate.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import fakes
+
+# Before anything imports yfinance (marketdata below, main under --serve);
+# spawned forecast workers re-run this module, so they get the fakes too
+fakes.install()
+
+from marketdata import WATCHLIST  # noqa: E402
+
+GLOSSARY_TERMS = ["ebitda", "sharpe ratio", "beta", "dividend yield", "market capitalization", "moving average", "yield curve", "short squeeze"]
+CHAT_MESSAGES = [
+    "What's the latest news on {s}?",
+    "Is {s} overvalued right now?",
+    "what is ebitda",
+    "Summarize the market sentiment for {s}",
+    "How did {s} react to earnings?"
+]
+
+CHAT_STREAM = "/api/chat/stream"
+CHAT_FIRST_BYTE = "/api/chat/stream first byte"
+
+# Chance per poll that a user also does each action
+MIX = {"select": 0.25, "glossary": 0.08, "predict": 0.02, "chat": 0.05}
+
+
+def parse_mix(text):
+    mix = dict(MIX)
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        key, _, value = item.partition("=")
+        if key not in MIX:
+            raise ValueError(f"unknown action {key!r} (expected one of {', '.join(MIX)})")
+        mix[key] = float(value)
+    return mix
+
+
+class Recorder:
+    """Every request as (seconds since stage start, endpoint, latency seconds, ok)."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.samples = []
+
+    def add(self, endpoint, started, ok):
+        now = time.perf_counter()
+        self.samples.append((started - self.start, endpoint, now - started, ok))
+
+    async def get(self, client, endpoint, params=None):
+        started = time.perf_counter()
+        try:
+            response = await client.get(endpoint, params=params)
+            ok = response.status_code == 200 and "error" not in response.json()
+        except Exception:
+            ok = False
+        self.add(endpoint, started, ok)
+
+    async def chat(self, client, message):
+        # Time to the first event (what the user waits for) and to the end of the stream
+        started = time.perf_counter()
+        first, ok = False, True
+        try:
+            async with client.stream("POST", CHAT_STREAM, json={"message": message}) as response:
+                ok = response.status_code == 200
+                async for line in response.aiter_lines():
+                    if not first and line:
+                        self.add(CHAT_FIRST_BYTE, started, ok)
+                        first = True
+                    if line.startswith("event: error"):
+                        ok = False
+        except Exception:
+            ok = False
+        if not first:
+            self.add(CHAT_FIRST_BYTE, started, False)
+        self.add(CHAT_STREAM, started, ok)
+
+
+async def dashboard_user(client, recorder, deadline, mix, poll, rng):
+    watchlist = list(WATCHLIST)
+    symbol = watchlist[0]
+    await asyncio.gather(
+        recorder.get(client, "/api/quotes", {"symbols": ",".join(watchlist)}),
+        recorder.get(client, "/api/quote", {"symbol": symbol}),
+        recorder.get(client, "/api/daily", {"symbol": symbol, "outputsize": "compact"})
+    )
+    while True:
+        # Polls are jittered so users don't fire in lockstep
+        await asyncio.sleep(poll * rng.uniform(0.8, 1.2))
+        if time.perf_counter() >= deadline:
+            return
+        await recorder.get(client, "/api/quotes", {"symbols": ",".join(watchlist)})
+
+        if rng.random() < mix["select"]:
+            symbol = rng.choice(watchlist)
+            await asyncio.gather(
+                recorder.get(client, "/api/quote", {"symbol": symbol}),
+                recorder.get(client, "/api/daily", {"symbol": symbol, "outputsize": "compact"})
+            )
+        if rng.random() < mix["glossary"]:
+            # The search box fires (debounced) as the user types
+            term = rng.choice(GLOSSARY_TERMS)
+            for end in sorted(rng.sample(range(2, len(term) + 1), min(3, len(term) - 1))):
+                await recorder.get(client, "/api/glossary/search", {"q": term[:end], "limit": 8})
+                await asyncio.sleep(rng.uniform(0.15, 0.4))
+        if rng.random() < mix["predict"]:
+            await recorder.get(client, "/api/predict", {"symbol": symbol, "days": rng.choice([7, 14, 30])})
+        if rng.random() < mix["chat"]:
+            for _ in range(rng.randint(1, 3)):
+                await recorder.chat(client, rng.choice(CHAT_MESSAGES).format(s=symbol))
+                await asyncio.sleep(rng.uniform(1.0, 4.0))
+
+
+async def run_stage(url, users, duration, ramp, mix, poll, timeout, seed):
+    import httpx
+
+    recorder = Recorder()
+    deadline = recorder.start + duration
+    limits = httpx.Limits(max_connections=users * 4, max_keepalive_connections=users * 4)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        async def user(i):
+            await asyncio.sleep(ramp * i / max(1, users))
+            await dashboard_user(client, recorder, deadline, mix, poll, random.Random(seed * 100003 + i))
+
+        tasks = [asyncio.create_task(user(i)) for i in range(users)]
+        # Users finish their current action after the deadline; don't wait on slow stragglers forever
+        await asyncio.wait(tasks, timeout=duration + timeout)
+        for task in tasks:
+            task.cancel()
+    return recorder.samples
+
+
+def percentiles(latencies):
+    ms = np.array(latencies) * 1000
+    return {f"p{q}_ms": round(float(np.percentile(ms, q)), 1) for q in (50, 95, 99)} | {"max_ms": round(float(ms.max()), 1)}
+
+
+def stage_report(users, samples, duration, interval):
+    endpoints = {}
+    for _, endpoint, latency, ok in samples:
+        endpoints.setdefault(endpoint, []).append((latency, ok))
+
+    per_endpoint = {}
+    for endpoint, rows in sorted(endpoints.items()):
+        errors = sum(not ok for _, ok in rows)
+        per_endpoint[endpoint] = {
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate": round(errors / len(rows), 4),
+            **percentiles([latency for latency, _ in rows])
+        }
+
+    # Traffic counts each request once ("first byte" rows are a view of a chat
+    # request); latency uses chat's first byte, since a stream is long by design
+    requests = [s for s in samples if s[1] != CHAT_FIRST_BYTE]
+    waits = [s for s in samples if s[1] != CHAT_STREAM]
+    timeline = []
+    for start in np.arange(0, duration, interval):
+        bucket = [s for s in requests if start <= s[0] < start + interval]
+        bucket_waits = [s[2] for s in waits if start <= s[0] < start + interval]
+        timeline.append({
+            "t": round(float(start), 1),
+            "rps": round(len(bucket) / interval, 1),
+            "errors": sum(not s[3] for s in bucket),
+            "p99_ms": percentiles(bucket_waits)["p99_ms"] if bucket_waits else None
+        })
+
+    errors = sum(not s[3] for s in requests)
+    return {
+        "users": users,
+        "requests": len(requests),
+        "errors": errors,
+        "error_rate": round(errors / len(requests), 4) if requests else None,
+        "rps": round(len(requests) / duration, 1),
+        **(percentiles([s[2] for s in waits]) if waits else {}),
+        "endpoints": per_endpoint,
+        "timeline": timeline
+    }
+
+
+def print_stage(report):
+    print(f"\n{report['users']} users: {report['requests']} requests, {report['rps']} req/s, "
+          f"error rate {report['error_rate']}, p50 {report.get('p50_ms')} ms, p99 {report.get('p99_ms')} ms")
+    print(f"  {'endpoint':<30}{'requests':>9}{'err %':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for endpoint, s in report["endpoints"].items():
+        print(f"  {endpoint:<30}{s['requests']:>9}{s['error_rate'] * 100:>7.1f}{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}")
+    print("  over time: " + "  ".join(f"{b['t']:g}s {b['rps']}/s p99 {b['p99_ms'] or '-'}" for b in report["timeline"]))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(args):
+    """Run main:app under uvicorn with the upstreams replaced by fakes (blocks)."""
+    fakes.install(
+        fakes.FakeMarket(args.recorded, latency_ms=args.upstream_latency_ms),
+        first_token_ms=args.llm_first_token_ms,
+        tokens_per_s=args.llm_tokens_per_s
+    )
+    fakes.scratch_environment("marketvision-load-", NEWS_PREFETCH=os.getenv("NEWS_PREFETCH", "1"))
+    import uvicorn
+    import main as api
+    uvicorn.run(api.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def start_server(args):
+    port = free_port()
+    command = [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port),
+               "--upstream-latency-ms", str(args.upstream_latency_ms),
+               "--llm-first-token-ms", str(args.llm_first_token_ms),
+               "--llm-tokens-per-s", str(args.llm_tokens_per_s)]
+    if args.recorded:
+        command += ["--recorded", args.recorded]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)))
+    url = f"http://127.0.0.1:{port}"
+
+    import httpx
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"server exited with code {process.returncode}")
+        try:
+            if httpx.get(url + "/", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            time.sleep(0.25)
+    process.terminate()
+    sys.exit("server did not come up within 120s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[10, 25, 50, 100], help="concurrent users, one stage per value")
+    parser.add_argument("--duration", type=float, default=60, help="seconds per stage")
+    parser.add_argument("--ramp", type=float, default=5, help="seconds over which a stage's users start")
+    parser.add_argument("--poll", type=float, default=15, help="seconds between watchlist polls per user")
+    parser.add_argument("--mix", help="per-poll chances, e.g. select=0.3,chat=0.1 (default: MIX)")
+    parser.add_argument("--interval", type=float, default=5, help="seconds per throughput-over-time bucket")
+    parser.add_argument("--timeout", type=float, default=60, help="per-request timeout in seconds")
+    parser.add_argument("--p99-budget-ms", type=float)
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="for --p99-budget-ms")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--serve", action="store_true", help="only run the stubbed server")
+    parser.add_argument("--port", type=int, default=8000, help="port for --serve")
+    parser.add_argument("--recorded", help="directory of recorded SYMBOL.csv daily bars")
+    parser.add_argument("--upstream-latency-ms", type=float, default=80.0)
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--llm-tokens-per-s", type=float, default=25.0)
+    parser.add_argument("--output", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    process, url = (None, args.url) if args.url else start_server(args)
+    stages = []
+    try:
+        for users in args.users:
+            samples = asyncio.run(run_stage(url, users, args.duration, args.ramp, mix, args.poll, args.timeout, args.seed))
+            report = stage_report(users, samples, args.duration, args.interval)
+            stages.append(report)
+            print_stage(report)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    result = {"url": url, "options": vars(args), "mix": mix, "stages": stages}
+    if args.p99_budget_ms is not None:
+        within = [
+            s["users"] for s in stages
+            if s.get("p99_ms") is not None and s["p99_ms"] <= args.p99_budget_ms and s["error_rate"] <= args.max_error_rate
+        ]
+        result["max_users_within_budget"] = max(within) if within else None
+        print(f"\nlargest stage with p99 <= {args.p99_budget_ms} ms and error rate <= {args.max_error_rate}: "
+              f"{result['max_users_within_budget'] or 'none'} users")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,34 @@
-from fastapi import FastAPI, Query
-
-from fastapi.middleware.cors import CORSMiddleware
-import yfinance as yf
-import pandas as pd
-import uvicorn
-from prophet import Prophet
-import numpy as np
-from pydantic import BaseModel
-import random
-import datetime
+import logging
+import os
+
+from lazy import startup_timer, log_startup_breakdown, resources, status as model_status
+
+with startup_timer("fastapi"):
+    from fastapi import FastAPI, Query, Request
+    from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+    from fastapi.middleware.cors import CORSMiddleware
+    import uvicorn
+    from pydantic import BaseModel
+
+with startup_timer("yfinance"):
+    import yfinance as yf
+
+import time
+import asyncio
+import json
+
+with startup_timer("market data"):
+    import metrics
+    from metrics import upstream
+    from marketdata import checked_symbol, parse_symbols, get_bulk_quotes
+    from cache import TTLCache
+    from store import ohlcv_store
+
+with startup_timer("forecast jobs"):
+    from jobs import ForecastJobs
+
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
 
 app = FastAPI(title="MarketVision Pro Backend")
 
@@ -18,8 +38,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # So the frontend can read the per-stage breakdown
+    expose_headers=["Server-Timing"],
 )
 
+# TTLs in seconds, overridable from .env
+PRICE_TTL = float(os.getenv("PRICE_TTL", 15))
+DAILY_TTL = float(os.getenv("DAILY_TTL", 300))
+# Symbols per /api/quotes request (one bulk download, one cache key)
+QUOTES_LIMIT = int(os.getenv("QUOTES_LIMIT", 200))
+
+market_cache = TTLCache(maxsize=int(os.getenv("MARKET_CACHE_SIZE", 2048)))
+forecast_jobs = ForecastJobs()
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    # Route templates, not raw paths, so /api/predict/jobs/{job_id} is one series
+    timings = metrics.start_request() if metrics.SERVER_TIMING else None
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    metrics.request_seconds.observe(elapsed, request.method, path)
+    metrics.requests_total.inc(request.method, path, str(response.status_code))
+    if timings is not None:
+        # Streaming responses only carry what ran before their headers were sent
+        response.headers["Server-Timing"] = metrics.server_timing(timings, elapsed)
+        response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
+
+def _cacheable(result):
+    # Never keep error payloads around for a whole TTL
+    return "error" not in result
+
+
+def _any_quote(quotes):
+    # Per-symbol errors are fine to cache, but not a result where every symbol failed
+    return any("error" not in quote for quote in quotes.values())
+
 
 
 @app.get("/")
@@ -29,16 +89,23 @@ def root():
 
 @app.get("/api/quote")
 def get_realtime_quote(symbol: str = Query(...)):
+    key = ("quote", symbol.upper(), ())
+    return market_cache.get_or_fetch(key, lambda: fetch_realtime_quote(symbol), PRICE_TTL, _cacheable)
+
+
+def fetch_realtime_quote(symbol):
     try:
         ticker = yf.Ticker(symbol)
-        info = ticker.history(period="1d", interval="1m")
+        with upstream("yfinance"):
+            info = ticker.history(period="1d", interval="1m")
 
         if info.empty:
             return {"error": "No recent data available"}
 
         latest = info.iloc[-1]
         
-        prev_data = ticker.history(period="2d")
+        with upstream("yfinance"):
+            prev_data = ticker.history(period="2d")
         if len(prev_data) < 2:
             return {"error": "Insufficient historical data for comparison"}
         
@@ -58,97 +125,252 @@ def get_realtime_quote(symbol: str = Query(...)):
         return {"error": str(e)}
 
 
+@app.get("/api/quotes")
+def get_realtime_quotes(symbols: str = Query(...)):
+    # Whole watchlist in one bulk download; errors are reported per symbol
+    try:
+        symbol_list = parse_symbols(symbols)
+        if not symbol_list:
+            return {"error": "No symbols given"}
+        if len(symbol_list) > QUOTES_LIMIT:
+            return {"error": f"At most {QUOTES_LIMIT} symbols per request"}
+        symbol_list = [checked_symbol(s) for s in symbol_list]
+
+        key = ("quotes", ",".join(sorted(symbol_list)), ())
+        quotes = market_cache.get_or_fetch(key, lambda: get_bulk_quotes(symbol_list), PRICE_TTL, _any_quote)
+        return {"quotes": quotes}
+
+    except Exception as e:
+        return {"error": str(e)}
+
+
 @app.get("/api/daily")
 def get_historical_data(symbol: str = Query(...), outputsize: str = "compact"):
+    key = ("daily", symbol.upper(), (outputsize,))
+    return market_cache.get_or_fetch(key, lambda: fetch_historical_data(symbol, outputsize), DAILY_TTL, _cacheable)
+
+
+def fetch_historical_data(symbol, outputsize="compact"):
     try:
         days = 100 if outputsize == "compact" else 365
-        df = yf.download(symbol, period=f"{days}d", interval="1d")
+        # Only bars after the last stored date are downloaded
+        ohlcv_store.refresh([symbol])
+        df = ohlcv_store.history(symbol, days)
 
         if df.empty:
             return {"error": "No historical data available"}
 
         labels = [d.strftime("%Y-%m-%d") for d in df.index]
-        closes = [round(v[0], 2) for v in df["Close"].values.tolist()]
+        closes = [round(v, 2) for v in df["Close"].tolist()]
         return {"labels": labels, "closes": closes}
 
     except Exception as e:
         return {"error": str(e)}
 
 
+@app.get("/api/cache/stats")
+def cache_stats():
+    return {
+        "market": market_cache.stats(),
+        "forecast_jobs": forecast_jobs.stats(),
+        "ohlcv_store_upstream_calls": ohlcv_store.upstream_calls,
+        "finbert_batcher": finbert_batcher.stats(),
+        "sentiment": sentiment_cache.stats(),
+        "news": news_cache.stats(),
+        "chat_responses": response_cache.stats()
+    }
+
+
 @app.get("/api/predict")
-def predict_future(symbol: str = Query(...), days: int = Query(7)):
+async def predict_future(symbol: str = Query(...), days: int = Query(7)):
+    # Same pool as the job API: the fit runs in a worker process and this
+    # handler only awaits it, so no request thread is held during the fit
     try:
-        ("In Try of api/predict")
-        df = yf.download(symbol, period="1y", interval="1d")
-        if df.empty:
-            return {"error": "No data available", "forecast": []}
+        # Workers only read the store, so bring it up to date here first
+        await asyncio.to_thread(ohlcv_store.refresh, [symbol])
+        job = forecast_jobs.submit(symbol, days)
+        if job is None:
+            return {"error": "Forecast queue is full, try again shortly", "forecast": []}
 
-        # Flatten columns if MultiIndex (fix for new yfinance)
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
+        result = await asyncio.wrap_future(job["future"])
+        # Already in the histograms (jobs.py); this only adds them to Server-Timing
+        metrics.observe_timings(result.get("timings"), histogram=False)
+        return result
 
-        df = df.reset_index()
-        df = df.rename(columns={"Date": "ds", "Close": "y"})
-        df = df[["ds", "y"]]
-        df["y"] = pd.to_numeric(df["y"], errors="coerce")
-        df = df.dropna(subset=["y"])
-        
-        if len(df) < 30:
-            return {"error": "Insufficient data for prediction (need at least 30 days)", "forecast": []}
+    except Exception as e:
+        return {"error": str(e), "forecast": []}
 
-        try:
-            model = Prophet(daily_seasonality=True)
-            model.fit(df)
-        except Exception as model_error:
-            return {"error": f"Model training failed: {str(model_error)}", "forecast": []}
 
-        future = model.make_future_dataframe(periods=days)
-        forecast = model.predict(future)
+class PredictJobRequest(BaseModel):
+    symbol: str
+    days: int = 7
+
+@app.post("/api/predict/jobs")
+def create_predict_job(request: PredictJobRequest):
+    try:
+        ohlcv_store.refresh([request.symbol])
+    except Exception as e:
+        return {"error": str(e)}
 
-        results = forecast.tail(days)[["ds", "yhat", "yhat_lower", "yhat_upper"]]
-        results["ds"] = results["ds"].dt.strftime('%Y-%m-%d')
-        forecast_points = results.to_dict(orient="records")
+    job = forecast_jobs.submit(request.symbol, request.days)
+    if job is None:
+        return {"error": "Forecast queue is full, try again shortly"}
+    return {"job_id": job["job_id"], "status": job["status"]}
+
+@app.get("/api/predict/jobs/{job_id}")
+def get_predict_job(job_id: str):
+    job = forecast_jobs.get(job_id)
+    if job is None:
+        return {"error": "Job not found"}
+    return forecast_jobs.describe(job)
+
+@app.delete("/api/predict/jobs/{job_id}")
+def cancel_predict_job(job_id: str):
+    job = forecast_jobs.get(job_id)
+    if job is None:
+        return {"error": "Job not found"}
+    if not forecast_jobs.cancel(job_id):
+        return {"error": f"Job is {job['status']} and can no longer be cancelled"}
+    return {"job_id": job_id, "status": "cancelled"}
+
+# Symbols per /api/predict/batch request
+BATCH_FORECAST_LIMIT = int(os.getenv("BATCH_FORECAST_LIMIT", 100))
+
+class BatchForecastRequest(BaseModel):
+    symbols: list[str]
+    days: int = 7
+
+@app.post("/api/predict/batch")
+def batch_forecast(request: BatchForecastRequest):
+    # NDJSON: one line per symbol, in completion order
+    symbols = parse_symbols(",".join(request.symbols))
+    if not symbols:
+        return {"error": "No symbols given"}
+    if len(symbols) > BATCH_FORECAST_LIMIT:
+        return {"error": f"At most {BATCH_FORECAST_LIMIT} symbols per batch"}
+    try:
+        symbols = [checked_symbol(s) for s in symbols]
+    except ValueError as e:
+        return {"error": str(e)}
 
-        return {"symbol": symbol, "forecast": forecast_points}
+    lines = (json.dumps(result) + "\n" for result in forecast_jobs.forecast_batch(symbols, request.days))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
 
-    except Exception as e:
-        return {"error": str(e), "forecast": []}
+@app.on_event("shutdown")
+def shutdown_forecast_jobs():
+    forecast_jobs.shutdown()
 
 
 
-from pydantic import BaseModel
-from sentiment import analyze_sentiment
-from sentiment import analyze_sentiment
-from agent import get_agent_response, finance_glossary
+with startup_timer("sentiment/agent"):
+    from sentiment import finbert_batcher, sentiment_cache
+    from glossary import glossary
+    from news import news_cache, news_prefetcher
+    from retrieval import index_headlines
+    from agent import response_cache
+    import chat_pipeline
 
 @app.get("/api/glossary")
 def lookup_term(term: str = Query(...)):
-    key = term.lower().strip()
-    if key in finance_glossary:
-        return {"term": term, "definition": finance_glossary[key]}
+    definition = glossary.get().lookup(term)
+    if definition:
+        return {"term": term, "definition": definition}
     else:
         return {"error": "Term not found"}
 
+@app.get("/api/glossary/search")
+def search_glossary(q: str = Query(...), limit: int = Query(10)):
+    # Autocomplete, typo-tolerant and full-text matches, best first (glossary.py)
+    try:
+        return {"query": q, "results": glossary.get().search(q, max(1, min(limit, 50)))}
+    except Exception as e:
+        return {"error": str(e)}
+
 class ChatRequest(BaseModel):
     message: str
 
 @app.post("/api/chat")
-def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest):
+    # Sentiment, news retrieval and the LLM run as one concurrent pipeline (chat_pipeline.py)
     try:
-        sentiment = analyze_sentiment(request.message)
-        
-        agent_resp = get_agent_response(request.message)
-
-        final_response = agent_resp
-
-        return {
-            "response": final_response,
-            "sentiment": sentiment
-        }
+        return await chat_pipeline.respond(request.message)
     except Exception as e:
         return {"error": str(e)}
 
 
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    # Server-Sent Events: sentiment as soon as it is ready, LLM tokens as they arrive, then timing stats
+    async def events():
+        try:
+            async for event, data in chat_pipeline.stream_events(request.message):
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("error", {"error": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+
+
+# Models load on first use; these let a deployment pay that cost up front
+@app.post("/api/warmup")
+def warmup():
+    loaded = {}
+    for name, resource in resources.items():
+        try:
+            resource.get()
+            loaded[name] = resource.load_seconds
+        except Exception as e:
+            loaded[name] = {"error": str(e)}
+
+    try:
+        loaded["forecast_workers"] = forecast_jobs.warm_up()
+    except Exception as e:
+        loaded["forecast_workers"] = {"error": str(e)}
+
+    return {"loaded": loaded}
+
+@app.get("/api/ready")
+def ready():
+    # Readiness probe: 503 until every lazy model and the forecast workers are loaded (POST /api/warmup)
+    models = model_status()
+    models["forecast_workers"] = {"loaded": forecast_jobs.warm}
+    is_ready = all(model["loaded"] for model in models.values())
+    return JSONResponse({"ready": is_ready, "models": models}, status_code=200 if is_ready else 503)
+
+@app.on_event("startup")
+def report_startup():
+    log_startup_breakdown()
+
+# Keep watchlist/SPY news warm so chat never waits on yfinance for them
+@app.on_event("startup")
+def start_news_prefetch():
+    # New headlines also go into the retrieval archive used as chat context
+    news_cache.on_fresh = index_headlines
+    if os.getenv("NEWS_PREFETCH", "1") == "1":
+        news_prefetcher.start()
+
+@app.on_event("shutdown")
+def stop_news_prefetch():
+    news_prefetcher.stop()
+
+
+# Same components as /api/cache/stats, as gauges next to the stage histograms
+metrics.register_stats("market", market_cache.stats)
+metrics.register_stats("forecast_jobs", forecast_jobs.stats)
+metrics.register_stats("finbert_batcher", finbert_batcher.stats)
+metrics.register_stats("sentiment", sentiment_cache.stats)
+metrics.register_stats("news", news_cache.stats)
+metrics.register_stats("chat_responses", response_cache.stats)
+metrics.register_stats("ohlcv_store", lambda: {"upstream_calls": ohlcv_store.upstream_calls})
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,122 @@
+import re
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from metrics import upstream
+
+# Default dashboard watchlist (same as frontend/app.js and streamlit_app.py)
+# Letters, digits and the . ^ = - used by share classes, indices and FX ("BRK.B", "^GSPC", "EURUSD=X");
+# at least one alphanumeric, so "." and ".." never name a directory
+SYMBOL = re.compile(r"^(?=.*[A-Z0-9])[A-Z0-9.^=-]{1,15}$")
+
+WATCHLIST = ["AAPL", "MSFT", "AMZN", "GOOGL", "TSLA", "NVDA", "JPM", "META", "INTC", "KO"]
+
+
+def parse_symbols(symbols: str):
+    # "aapl, MSFT,,aapl" -> ["AAPL", "MSFT"] (order kept, duplicates dropped)
+    parsed = []
+    for s in symbols.split(","):
+        s = s.strip().upper()
+        if s and s not in parsed:
+            parsed.append(s)
+    return parsed
+
+
+def checked_symbol(symbol: str):
+    """Upper-cased symbol, or ValueError if it isn't one; call before using a symbol in a file path."""
+    upper = symbol.strip().upper()
+    if not SYMBOL.match(upper):
+        raise ValueError(f"Invalid symbol: {symbol!r}")
+    return upper
+
+
+def field_matrix(df, symbols, field="Close"):
+    """Return a dates x symbols float frame for one OHLCV field of a yf.download result."""
+    if df.empty:
+        return pd.DataFrame(columns=symbols, dtype=float)
+
+    # yf.download returns (field, ticker) MultiIndex columns for lists of tickers,
+    # but older versions return flat columns when only one ticker is requested
+    if isinstance(df.columns, pd.MultiIndex):
+        frame = df[field]
+    else:
+        frame = df[[field]].rename(columns={field: symbols[0]})
+
+    return frame.reindex(columns=symbols).astype(float)
+
+
+def bulk_download(symbols, **kwargs):
+    # One yf.download for the whole list instead of one Ticker.history per symbol
+    kwargs.setdefault("progress", False)
+    kwargs.setdefault("group_by", "column")
+    with upstream("yfinance"):
+        return yf.download(symbols, **kwargs)
+
+
+def compute_quotes(closes, minutes=None):
+    """
+    Compute price/change/change_percent for every column of a dates x symbols
+    close matrix at once. Each symbol uses its own last two non-NaN bars, so a
+    ticker that has not traded today is compared against its own previous close.
+
+    With a matrix of the current session's minute closes, price and ts come
+    from each symbol's last minute bar (the last trade, like /api/quote);
+    symbols without one fall back to the daily bar.
+    """
+    values = closes.to_numpy(dtype=float)
+    n_rows, n_cols = values.shape
+    valid = ~np.isnan(values)
+    rows = np.arange(n_rows)[:, None]
+    cols = np.arange(n_cols)
+
+    last_idx = np.where(valid, rows, -1).max(axis=0, initial=-1)
+    prev_idx = np.where(valid & (rows < last_idx), rows, -1).max(axis=0, initial=-1)
+
+    price = values[last_idx, cols] if n_rows else np.full(n_cols, np.nan)
+    prev_close = values[prev_idx, cols] if n_rows else np.full(n_cols, np.nan)
+    ts = [int(closes.index[i].timestamp()) if i >= 0 else None for i in last_idx]
+
+    if minutes is not None and len(minutes):
+        minute_values = minutes.reindex(columns=closes.columns).to_numpy(dtype=float)
+        minute_rows = np.arange(len(minute_values))[:, None]
+        minute_idx = np.where(~np.isnan(minute_values), minute_rows, -1).max(axis=0, initial=-1)
+        traded = minute_idx >= 0
+        price = np.where(traded, minute_values[minute_idx, cols], price)
+        ts = [int(minutes.index[m].timestamp()) if m >= 0 else t for m, t in zip(minute_idx, ts)]
+
+    change = price - prev_close
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change_percent = change / prev_close * 100
+
+    price = np.round(price, 2)
+    change = np.round(change, 2)
+    change_percent = np.round(change_percent, 2)
+
+    quotes = {}
+    for i, symbol in enumerate(closes.columns):
+        if last_idx[i] < 0:
+            quotes[symbol] = {"error": "No recent data available"}
+        elif prev_idx[i] < 0:
+            quotes[symbol] = {"error": "Insufficient historical data for comparison"}
+        else:
+            quotes[symbol] = {
+                "symbol": symbol,
+                "price": float(price[i]),
+                "change": float(change[i]),
+                "change_percent": float(change_percent[i]),
+                "ts": ts[i]
+            }
+    return quotes
+
+
+def get_bulk_quotes(symbols):
+    # 5 daily bars is enough to find a previous close across weekends/holidays;
+    # the latest session's minute bars give the last trade and its time
+    daily = bulk_download(symbols, period="5d", interval="1d")
+    try:
+        minutes = field_matrix(bulk_download(symbols, period="1d", interval="1m"), symbols, "Close")
+    except Exception:
+        minutes = None  # the daily bar still carries a (less precise) live price
+    return compute_quotes(field_matrix(daily, symbols, "Close"), minutes)
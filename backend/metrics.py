@@ -0,0 +1,199 @@
+"""
+Process-wide latency histograms and upstream counters, exported by
+/metrics in the Prometheus text format (no client library needed).
+
+    with stage("vader"):          # marketvision_stage_seconds{stage="vader"}
+        ...
+    with upstream("yfinance"):    # the same histogram, plus calls/errors per source
+        ...
+
+While a request is being handled with SERVER_TIMING=1, every stage it runs
+is also collected for its Server-Timing header (see main.py). Caches and
+other components with a stats() dict are exported as gauges through
+register_stats.
+"""
+import bisect
+import contextvars
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+# Seconds: cache hits and VADER at the bottom, Prophet fits and LLM answers at the top
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+def _number(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}  # label values -> count
+        self._lock = threading.Lock()
+
+    def inc(self, *values, amount=1):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_labels(self.labels, values)} {_number(count)}" for values, count in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # label values -> [per-bucket counts (last is +Inf), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *values):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += seconds
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((values, list(counts), total) for values, (counts, total) in self._series.items())
+        for values, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), values + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, values)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, values)} {cumulative}")
+        return lines
+
+
+stage_seconds = Histogram("marketvision_stage_seconds", "Time spent in each backend stage.", ("stage",))
+upstream_calls = Counter("marketvision_upstream_calls_total", "Calls to upstream services.", ("source",))
+upstream_errors = Counter("marketvision_upstream_errors_total", "Upstream calls that raised or timed out.", ("source",))
+request_seconds = Histogram("marketvision_http_request_seconds", "HTTP request latency by route.", ("method", "route"))
+requests_total = Counter("marketvision_http_requests_total", "HTTP responses by route and status.", ("method", "route", "status"))
+METRICS = [stage_seconds, upstream_calls, upstream_errors, request_seconds, requests_total]
+
+# name -> stats() callable, exported as marketvision_<key>{component="name"} gauges
+_stats = {}
+
+# (stage, seconds) list of the request being handled, when Server-Timing is on
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def register_stats(name, stats):
+    _stats[name] = stats
+
+
+def observe(name, seconds, histogram=True):
+    """Record one stage duration; histogram=False only adds it to the current request's Server-Timing."""
+    if histogram:
+        stage_seconds.observe(seconds, name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def count_upstream(source, seconds, error=False):
+    upstream_calls.inc(source)
+    if error:
+        upstream_errors.inc(source)
+    observe(source, seconds)
+
+
+@contextmanager
+def upstream(source):
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        count_upstream(source, time.perf_counter() - start, error)
+
+
+def observe_timings(timings, histogram=True):
+    # {stage: ms} as returned by forecast workers, whose own histograms we never see
+    for name, ms in (timings or {}).items():
+        observe(name, ms / 1000.0, histogram)
+
+
+def start_request():
+    """Collect stages for the current request's Server-Timing header; returns the list they go into."""
+    timings = []
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing(timings, total):
+    # Repeated stages (e.g. two yfinance calls) are summed; total is the whole handler
+    summed = {}
+    for name, seconds in timings:
+        summed[name] = summed.get(name, 0.0) + seconds
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in summed.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def _stats_lines():
+    # One gauge per numeric stats key, e.g. marketvision_hit_rate{component="news"}
+    gauges = {}
+    for component, stats in list(_stats.items()):
+        try:
+            values = stats()
+        except Exception:
+            continue
+        for key, value in values.items():
+            if isinstance(value, (bool, int, float)):
+                gauges.setdefault(key, []).append((component, float(value)))
+
+    lines = []
+    for key, samples in sorted(gauges.items()):
+        name = f"marketvision_{key}"
+        lines += [f"# HELP {name} stats()[\"{key}\"] of each component.", f"# TYPE {name} gauge"]
+        lines += [f"{name}{_labels(('component',), (component,))} {_number(value)}" for component, value in samples]
+    return lines
+
+
+def render():
+    lines = []
+    for metric in METRICS:
+        lines += metric.render()
+    lines += _stats_lines()
+    return "\n".join(lines) + "\n"
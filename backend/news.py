@@ -0,0 +1,169 @@
+"""
+Per-symbol news cache for the chat agent.
+
+Headlines are kept per symbol, newest first, and de-duplicated across
+refreshes by a hash of title + link. A background NewsPrefetcher refreshes
+the watchlist and SPY on a schedule shorter than NEWS_TTL, so chat requests
+for those symbols never wait on yfinance.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import yfinance as yf
+
+from cache import TTLCache
+from marketdata import WATCHLIST
+from metrics import upstream
+
+NEWS_TTL = float(os.getenv("NEWS_TTL", 300))
+NEWS_MAX_ITEMS = int(os.getenv("NEWS_MAX_ITEMS", 20))
+NEWS_PREFETCH_INTERVAL = float(os.getenv("NEWS_PREFETCH_INTERVAL", 240))
+NEWS_PREFETCH_SYMBOLS = WATCHLIST + ["SPY"]
+
+logger = logging.getLogger("marketvision.news")
+
+
+def news_id(title, link):
+    return hashlib.sha1(f"{title}\n{link or ''}".encode("utf-8")).hexdigest()
+
+
+def _parse_item(item):
+    # Handle different structure versions of yfinance news
+    content = item.get("content") or {}
+    title = item.get("title") or content.get("title")
+    if not title:
+        return None
+    publisher = item.get("publisher") or (content.get("provider") or {}).get("displayName")
+    link = item.get("link") or (content.get("canonicalUrl") or {}).get("url")
+    return {"id": news_id(title, link), "title": title, "publisher": publisher, "link": link}
+
+
+def fetch_news_items(symbol):
+    """Current headlines for symbol straight from yfinance, in upstream order."""
+    items = []
+    with upstream("yfinance"):
+        raw_items = yf.Ticker(symbol).news or []
+    for raw in raw_items:
+        item = _parse_item(raw)
+        if item:
+            items.append(item)
+    return items
+
+
+class NewsCache:
+    """Symbol -> merged headline list, refreshed at most once per TTL (concurrent misses coalesce)."""
+
+    def __init__(self, ttl=NEWS_TTL, max_items=NEWS_MAX_ITEMS, fetch=fetch_news_items):
+        self.ttl = ttl
+        self.max_items = max_items
+        self.fetch = fetch
+        self._cache = TTLCache(maxsize=1024)
+        self._items = {}  # symbol -> items, kept after expiry as a fallback
+        self._fetched = {}  # symbol -> monotonic time of the last successful refresh
+        self._lock = threading.Lock()
+        self.on_fresh = None  # callback(symbol, items) for headlines not seen before
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+        self.duplicates = 0
+
+    def refresh(self, symbol):
+        """Fetch symbol's news now and merge it into the headlines we already have."""
+        symbol = symbol.upper()
+        with self._lock:
+            self.upstream_calls += 1
+        try:
+            fetched = self.fetch(symbol)
+        except Exception:
+            with self._lock:
+                self.upstream_errors += 1
+            raise
+
+        with self._lock:
+            known = self._items.get(symbol, [])
+            seen = {item["id"] for item in known}
+            fresh = []
+            for item in fetched:
+                if item["id"] in seen:
+                    self.duplicates += 1
+                    continue
+                seen.add(item["id"])
+                fresh.append(item)
+            merged = (fresh + known)[:self.max_items]
+            self._items[symbol] = merged
+            self._fetched[symbol] = time.monotonic()
+        self._cache.set(symbol, merged, self.ttl)
+        if fresh and self.on_fresh:
+            try:
+                self.on_fresh(symbol, fresh)
+            except Exception as e:
+                logger.warning("news on_fresh for %s failed: %s", symbol, e)
+        return merged
+
+    def get(self, symbol):
+        symbol = symbol.upper()
+        try:
+            return self._cache.get_or_fetch(symbol, lambda: self.refresh(symbol), self.ttl)
+        except Exception:
+            # Stale headlines beat none when yfinance is down
+            with self._lock:
+                stale = self._items.get(symbol)
+            if stale:
+                return stale
+            raise
+
+    def fresh_for(self, symbol):
+        """Seconds until symbol's headlines are due for a refresh (0 if stale or never fetched)."""
+        with self._lock:
+            fetched = self._fetched.get(symbol.upper())
+        if fetched is None:
+            return 0.0
+        return max(0.0, self.ttl - (time.monotonic() - fetched))
+
+    def stats(self):
+        with self._lock:
+            counters = {
+                "symbols": len(self._items),
+                "upstream_calls": self.upstream_calls,
+                "upstream_errors": self.upstream_errors,
+                "duplicates_dropped": self.duplicates
+            }
+        return {**self._cache.stats(), **counters}
+
+
+class NewsPrefetcher:
+    """Background thread that keeps the given symbols' news warm."""
+
+    def __init__(self, cache, symbols=NEWS_PREFETCH_SYMBOLS, interval=NEWS_PREFETCH_INTERVAL):
+        self.cache = cache
+        self.symbols = list(symbols)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.runs = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="news-prefetch", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            for symbol in self.symbols:
+                if self._stop.is_set():
+                    return
+                try:
+                    self.cache.refresh(symbol)
+                except Exception as e:
+                    logger.warning("news prefetch for %s failed: %s", symbol, e)
+            self.runs += 1
+            self._stop.wait(self.interval)
+
+
+news_cache = NewsCache()
+news_prefetcher = NewsPrefetcher(news_cache)
@@ -0,0 +1,194 @@
+"""
+Local TF-IDF retrieval over news articles, used as extra chat context.
+
+The corpus (stock_sentiment_dataset.csv, plus headlines appended as the
+news cache sees them) is held as a sparse document-term matrix in COO form:
+three NumPy arrays (doc, term, sublinear tf). IDF weights and document norms
+are recomputed lazily after an append, so appends are cheap and a query
+only touches the matrix entries of its own terms:
+
+    score(d) = sum_t tf_d[t] * tf_q[t] * idf[t]^2 / (|d| |q|)
+
+Ticker and date filters are boolean masks over per-document arrays.
+"""
+import csv
+import os
+import re
+import threading
+
+import numpy as np
+
+from lazy import lazy
+
+DATASET = os.path.join(os.path.dirname(__file__), "..", "stock_sentiment_dataset.csv")
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", 3))
+RAG_MIN_SCORE = float(os.getenv("RAG_MIN_SCORE", 0.1))
+
+TOKEN = re.compile(r"[a-z0-9][a-z0-9'&.-]*[a-z0-9]|[a-z0-9]")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+what about tell me show give news latest today any how why who which do does did can should
+""".split())
+
+
+def tokenize(text):
+    return [t for t in TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _date(value):
+    try:
+        return np.datetime64(value or "NaT", "D")
+    except ValueError:
+        return np.datetime64("NaT", "D")
+
+
+class NewsIndex:
+    def __init__(self):
+        self.vocab = {}  # token -> column
+        self.texts = []
+        self.labels = []
+        self._tickers = {}  # ticker -> code
+        self._ticker_codes = np.empty(0, dtype=np.int32)
+        self._dates = np.empty(0, dtype="datetime64[D]")
+        self._seen = set()
+        # COO chunks, concatenated on the first query after an append
+        self._chunks = []
+        self._doc = self._term = np.empty(0, dtype=np.int32)
+        self._tf = np.empty(0, dtype=np.float32)
+        self._df = np.empty(0, dtype=np.int32)
+        self._idf = self._norms = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.texts)
+
+    def append(self, docs):
+        """
+        Add documents: dicts with text, ticker and date (YYYY-MM-DD), label optional.
+        Texts already in the index are skipped. Returns the number added.
+        """
+        with self._lock:
+            rows, terms, tfs = [], [], []
+            tickers, dates = [], []
+            for doc in docs:
+                text = (doc.get("text") or "").strip()
+                if not text or text in self._seen:
+                    continue
+                counts = {}
+                for token in tokenize(text):
+                    col = self.vocab.setdefault(token, len(self.vocab))
+                    counts[col] = counts.get(col, 0) + 1
+                if not counts:
+                    continue
+                self._seen.add(text)
+                doc_id = len(self.texts)
+                self.texts.append(text)
+                self.labels.append(doc.get("label"))
+                tickers.append(self._tickers.setdefault((doc.get("ticker") or "").upper(), len(self._tickers)))
+                dates.append(_date(doc.get("date")))
+                rows += [doc_id] * len(counts)
+                terms += counts.keys()
+                tfs += counts.values()
+
+            if not rows:
+                return 0
+            term = np.array(terms, dtype=np.int32)
+            self._chunks.append((np.array(rows, dtype=np.int32), term, 1 + np.log(np.array(tfs, dtype=np.float32))))
+            self._ticker_codes = np.concatenate([self._ticker_codes, np.array(tickers, dtype=np.int32)])
+            self._dates = np.concatenate([self._dates, np.array(dates, dtype="datetime64[D]")])
+            df = np.bincount(term, minlength=len(self.vocab)).astype(np.int32)
+            df[:len(self._df)] += self._df
+            self._df = df
+            self._idf = None
+            return len(tickers)
+
+    def _weights(self):
+        # Called with the lock held; refreshes idf and document norms after appends
+        if self._chunks:
+            self._doc = np.concatenate([self._doc] + [c[0] for c in self._chunks])
+            self._term = np.concatenate([self._term] + [c[1] for c in self._chunks])
+            self._tf = np.concatenate([self._tf] + [c[2] for c in self._chunks])
+            self._chunks = []
+        if self._idf is None:
+            n = len(self.texts)
+            self._idf = (np.log((1 + n) / (1 + self._df)) + 1).astype(np.float32)
+            weighted = self._tf * self._idf[self._term]
+            self._norms = np.sqrt(np.bincount(self._doc, weights=weighted * weighted, minlength=n)).astype(np.float32)
+        return self._idf, self._norms
+
+    def search(self, query, k=RAG_TOP_K, tickers=None, start=None, end=None, min_score=0.0):
+        """
+        Top-k documents for query as [{text, ticker, date, label, score}],
+        optionally restricted to tickers and a [start, end] date range.
+        """
+        tokens = tokenize(query)
+        with self._lock:
+            counts = {}
+            for token in tokens:
+                col = self.vocab.get(token)
+                if col is not None:
+                    counts[col] = counts.get(col, 0) + 1
+            if not counts:
+                return []
+            idf, norms = self._weights()
+            doc, term, tf = self._doc, self._term, self._tf
+            ticker_codes, dates = self._ticker_codes, self._dates
+            codes = {code: ticker for ticker, code in self._tickers.items()}
+            wanted = [self._tickers[t.upper()] for t in tickers or [] if t.upper() in self._tickers]
+
+        if tickers and not wanted:
+            return []
+
+        cols = np.fromiter(counts.keys(), dtype=np.int32)
+        q = (1 + np.log(np.fromiter(counts.values(), dtype=np.float32))) * idf[cols]
+        q_weight = np.zeros(len(idf), dtype=np.float32)
+        q_weight[cols] = q * idf[cols]
+
+        hits = np.isin(term, cols)
+        scores = np.bincount(doc[hits], weights=tf[hits] * q_weight[term[hits]], minlength=len(norms))
+        scores /= np.maximum(norms, 1e-9) * np.linalg.norm(q)
+
+        mask = scores > min_score
+        if wanted:
+            mask &= np.isin(ticker_codes, wanted)
+        if start:
+            mask &= dates >= np.datetime64(start, "D")
+        if end:
+            mask &= dates <= np.datetime64(end, "D")
+
+        candidates = np.flatnonzero(mask)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return [
+            {
+                "text": self.texts[i],
+                "ticker": codes[ticker_codes[i]],
+                "date": str(dates[i]),
+                "label": self.labels[i],
+                "score": round(float(scores[i]), 4)
+            }
+            for i in candidates
+        ]
+
+
+def load_dataset(path=DATASET):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _build_index():
+    index = NewsIndex()
+    if os.path.exists(DATASET):
+        index.append(load_dataset())
+    return index
+
+
+# Built from the dataset on first use (or /api/warmup)
+news_index = lazy("news_index", _build_index)
+
+
+def index_headlines(symbol, items):
+    """Append news cache items (title, publisher) to the archive, dated today."""
+    today = str(np.datetime64("today", "D"))
+    return news_index.get().append([{"text": item["title"], "ticker": symbol, "date": today} for item in items])
@@ -1,15 +1,215 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 
-# Load FinBERT once (cached)
-# Using a pipeline is easier for inference
-finbert = pipeline("sentiment-analysis", model="ProsusAI/finbert", top_k=None)
-vader = SentimentIntensityAnalyzer()
+from finbert_backends import FINBERT_BACKEND, FINBERT_MODEL, load_finbert
+from lazy import lazy
+from metrics import stage
 
-def analyze_sentiment(text):
-    # Returns list of dicts: [{'label': 'positive', 'score': 0.9}, ...]
-    raw_results = finbert(text)[0] 
-    
+
+def _load_vader():
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+
+# Load FinBERT once (cached), on first use rather than at import
+# FINBERT_BACKEND picks torch, torch-int8, onnx or onnx-int8 (see finbert_backends.py)
+FINBERT_REVISION = os.getenv("FINBERT_REVISION", "main")
+finbert = lazy("finbert", lambda: load_finbert(FINBERT_BACKEND, FINBERT_MODEL, FINBERT_REVISION))
+vader = lazy("vader", _load_vader)
+
+# A batch is run as soon as it has FINBERT_MAX_BATCH texts or the oldest
+# request has waited FINBERT_MAX_WAIT_MS, whichever comes first
+FINBERT_MAX_BATCH = int(os.getenv("FINBERT_MAX_BATCH", 32))
+FINBERT_MAX_WAIT_MS = float(os.getenv("FINBERT_MAX_WAIT_MS", 10))
+
+SENTIMENT_CACHE_PATH = os.getenv("SENTIMENT_CACHE_PATH", os.path.join(os.path.dirname(__file__), ".sentiment_cache.sqlite3"))
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", 10000))
+# Bump when the result dict layout changes so old rows are ignored
+SENTIMENT_CACHE_VERSION = "1"
+
+
+def finbert_batch(texts):
+    # One padded forward pass for the whole list
+    model = finbert.get()
+    # The forward pass alone; "finbert" in the request path also counts the batching wait
+    with stage("finbert_batch"):
+        probs = model.predict_proba(texts)
+    # Same shape the HF pipeline gave with top_k=None: a list of {label, score} dicts per text
+    return [[{"label": label, "score": float(p)} for label, p in zip(model.labels, row)] for row in probs]
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-text requests on a background thread and runs
+    them through predict_batch together, then hands each caller its own row.
+    """
+
+    def __init__(self, predict_batch, max_batch=FINBERT_MAX_BATCH, max_wait_ms=FINBERT_MAX_WAIT_MS):
+        self.predict_batch = predict_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, text):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="finbert-batcher", daemon=True)
+                    self._thread.start()
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                results = self.predict_batch(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "queued": self._queue.qsize()
+        }
+
+
+finbert_batcher = MicroBatcher(finbert_batch)
+
+
+def normalize_text(text):
+    # Collapse whitespace only; case matters to VADER
+    return " ".join(text.split())
+
+
+class SentimentCache:
+    """
+    Sentiment results keyed by sha256 of the model tag and normalized text.
+    An in-memory LRU sits in front of a SQLite table, so repeated headlines
+    skip tokenization and the forward pass, also across restarts.
+    """
+
+    def __init__(self, path=SENTIMENT_CACHE_PATH, model_tag="", maxsize=SENTIMENT_CACHE_SIZE):
+        self.path = path
+        self.model_tag = model_tag
+        self.maxsize = maxsize
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.model_tag}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _connect(self):
+        # Caller holds the lock
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS sentiment (key TEXT PRIMARY KEY, result TEXT NOT NULL)")
+        return self._db
+
+    def _remember(self, key, result):
+        # Caller holds the lock
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """Return {key: result} for every key found in memory or on disk."""
+        found = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self.memory_hits += 1
+                else:
+                    missing.append(key)
+
+            rows = []
+            try:
+                # chunked to stay under SQLite's bound-variable limit
+                for i in range(0, len(missing), 500):
+                    chunk = missing[i:i + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows += self._connect().execute(f"SELECT key, result FROM sentiment WHERE key IN ({placeholders})", chunk).fetchall()
+            except sqlite3.Error:
+                pass
+            for key, result in rows:
+                found[key] = json.loads(result)
+                self._remember(key, found[key])
+                self.disk_hits += 1
+            self.misses += len(missing) - len(rows)
+        return found
+
+    def put_many(self, items):
+        with self._lock:
+            for key, result in items.items():
+                self._remember(key, result)
+            try:
+                with self._connect() as db:
+                    db.executemany("INSERT OR REPLACE INTO sentiment (key, result) VALUES (?, ?)",
+                                   [(key, json.dumps(result)) for key, result in items.items()])
+            except sqlite3.Error:
+                pass  # the memory tier still has them
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._memory),
+                "maxsize": self.maxsize,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0
+            }
+
+
+# Quantized backends can score slightly differently, so the backend is part of the key
+sentiment_cache = SentimentCache(model_tag=f"{FINBERT_MODEL}@{FINBERT_REVISION}/{FINBERT_BACKEND}+vader/v{SENTIMENT_CACHE_VERSION}")
+
+
+def _build_result(text, raw_results):
     # Convert to simple dict { "positive": 0.9, ... }
     scores = {item['label']: round(item['score'], 3) for item in raw_results}
     
@@ -17,7 +217,7 @@ def analyze_sentiment(text):
     dominant_label = max(scores, key=scores.get)
     dominant_score = scores[dominant_label]
 
-    vader_result = vader.polarity_scores(text)
+    vader_result = vader.get().polarity_scores(text)
 
     return {
         "FinBERT Label": dominant_label,
@@ -28,3 +228,35 @@ def analyze_sentiment(text):
         "VADER Neutral": vader_result['neu'],
         "VADER Compound": vader_result['compound']
     }
+
+
+def analyze_sentiment(text):
+    return analyze_sentiment_batch([text])[0]
+
+
+def analyze_sentiment_batch(texts):
+    """
+    Score many texts. Cached texts are answered without touching the model;
+    the rest share forward passes with any concurrent requests.
+    """
+    keys = [sentiment_cache.key(text) for text in texts]
+    results = sentiment_cache.get_many(keys)
+
+    # Score each distinct uncached text once
+    futures = {}
+    for key, text in zip(keys, texts):
+        if key not in results and key not in futures:
+            # Returns list of dicts: [{'label': 'positive', 'score': 0.9}, ...]
+            futures[key] = (text, finbert_batcher.submit(text))
+
+    computed = {}
+    if futures:
+        with stage("finbert"):
+            scores = {key: (text, future.result()) for key, (text, future) in futures.items()}
+        with stage("vader"):
+            computed = {key: _build_result(text, finbert_scores) for key, (text, finbert_scores) in scores.items()}
+    if computed:
+        sentiment_cache.put_many(computed)
+        results.update(computed)
+
+    return [results[key] for key in keys]
@@ -0,0 +1,202 @@
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+import pandas as pd
+
+from marketdata import bulk_download, checked_symbol, field_matrix
+
+STORE_DIR = os.getenv("OHLCV_STORE_DIR", os.path.join(os.path.dirname(__file__), ".ohlcv"))
+BACKFILL_PERIOD = os.getenv("OHLCV_BACKFILL_PERIOD", "2y")
+REFRESH_AGE = float(os.getenv("DAILY_TTL", 300))
+
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+ROW_BYTES = 8 * len(FIELDS)
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on path (created if missing) that also holds across processes."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    # LK_LOCK retries for ~10s and then raises; keep waiting like flock does
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class OHLCVStore:
+    """
+    Daily bars on disk, one directory per symbol holding two append-only
+    little-endian files:
+
+        dates.bin  int64 days since epoch
+        ohlcv.bin  float64 rows of Open, High, Low, Close, Volume
+
+    Reads are read-only memory maps, so slicing history is zero-copy.
+    Refreshes only download bars from the last stored date onwards. The last
+    stored bar is rewritten in place (it may have been an intraday partial
+    bar); newer bars are appended. Writes hold a per-symbol lock file, so
+    several processes (the API and the Streamlit app) can share a store.
+    """
+
+    def __init__(self, root=STORE_DIR, refresh_age=REFRESH_AGE):
+        self.root = root
+        self.refresh_age = refresh_age
+        self._refreshed = {}  # symbol -> monotonic time of last refresh
+        self._refresh_locks = {}  # symbol -> lock held while that symbol downloads
+        self._lock = threading.Lock()
+        self.upstream_calls = 0
+
+    def _paths(self, symbol):
+        directory = os.path.join(self.root, checked_symbol(symbol))
+        return directory, os.path.join(directory, "dates.bin"), os.path.join(directory, "ohlcv.bin")
+
+    def _refresh_lock(self, symbol):
+        with self._lock:
+            return self._refresh_locks.setdefault(symbol, threading.Lock())
+
+    def _rows(self, dates_path, ohlcv_path):
+        try:
+            return min(os.path.getsize(dates_path) // 8, os.path.getsize(ohlcv_path) // ROW_BYTES)
+        except OSError:
+            return 0
+
+    def read(self, symbol):
+        """Return (dates, ohlcv) memory maps; dates is datetime64[D], ohlcv is N x 5."""
+        _, dates_path, ohlcv_path = self._paths(symbol)
+        n = self._rows(dates_path, ohlcv_path)
+        if n == 0:
+            return np.empty(0, dtype="datetime64[D]"), np.empty((0, len(FIELDS)))
+
+        dates = np.memmap(dates_path, dtype="<i8", mode="r", shape=(n,)).view("datetime64[D]")
+        ohlcv = np.memmap(ohlcv_path, dtype="<f8", mode="r", shape=(n, len(FIELDS)))
+        return dates, ohlcv
+
+    def last_date(self, symbol):
+        dates, _ = self.read(symbol)
+        return dates[-1] if len(dates) else None
+
+    def history(self, symbol, days=None):
+        """Stored bars as a Date-indexed frame, optionally only the last `days` calendar days."""
+        dates, ohlcv = self.read(symbol)
+        if days is not None:
+            start = np.datetime64("today", "D") - np.timedelta64(days, "D")
+            i = np.searchsorted(dates, start)
+            dates, ohlcv = dates[i:], ohlcv[i:]
+        return pd.DataFrame(ohlcv, index=pd.DatetimeIndex(dates, name="Date"), columns=FIELDS)
+
+    def write(self, symbol, frame):
+        """Upsert a Date-indexed OHLCV frame. Returns the number of bars appended."""
+        frame = frame.reindex(columns=FIELDS).dropna(subset=["Close"])
+        index = frame.index
+        if getattr(index, "tz", None) is not None:
+            index = index.tz_localize(None)
+        new_dates = index.values.astype("datetime64[D]").astype("<i8")
+        values = frame.to_numpy(dtype="<f8")
+
+        order = np.argsort(new_dates, kind="stable")
+        new_dates, values = new_dates[order], values[order]
+        # keep the last row for any repeated date
+        keep = np.append(new_dates[1:] != new_dates[:-1], True) if len(new_dates) else np.empty(0, bool)
+        new_dates, values = new_dates[keep], values[keep]
+
+        directory, dates_path, ohlcv_path = self._paths(symbol)
+        if not len(new_dates):
+            return 0
+        os.makedirs(directory, exist_ok=True)
+        # flock conflicts between open files, so this serializes threads as well as processes
+        with file_lock(os.path.join(directory, "write.lock")):
+            return self._append(new_dates, values, dates_path, ohlcv_path)
+
+    def _append(self, new_dates, values, dates_path, ohlcv_path):
+        # Caller holds the symbol's file lock; sizes and the last date are read under it
+        n = self._rows(dates_path, ohlcv_path)
+        for path, row_bytes in ((dates_path, 8), (ohlcv_path, ROW_BYTES)):
+            # drop a half-written tail left by an interrupted append
+            if os.path.exists(path) and os.path.getsize(path) != n * row_bytes:
+                os.truncate(path, n * row_bytes)
+
+        if n:
+            last = np.fromfile(dates_path, dtype="<i8", count=1, offset=(n - 1) * 8)[0]
+            same = new_dates == last
+            if same.any():
+                # same size, so readers holding a memory map stay valid
+                with open(ohlcv_path, "r+b") as f:
+                    f.seek((n - 1) * ROW_BYTES)
+                    f.write(values[same][-1].tobytes())
+            newer = new_dates > last
+            new_dates, values = new_dates[newer], values[newer]
+
+        if len(new_dates):
+            # rows before dates, so a reader never sees a date without its row
+            with open(ohlcv_path, "ab") as f:
+                f.write(np.ascontiguousarray(values).tobytes())
+            with open(dates_path, "ab") as f:
+                f.write(new_dates.tobytes())
+        return len(new_dates)
+
+    def refresh(self, symbols, max_age=None):
+        """
+        Bring symbols up to date with one bulk download per distinct start
+        date. Symbols refreshed within max_age seconds are skipped, and
+        concurrent refreshes wait for the running one instead of re-downloading.
+        """
+        max_age = self.refresh_age if max_age is None else max_age
+        symbols = list(dict.fromkeys(checked_symbol(s) for s in symbols))
+        stale = [s for s in symbols if time.monotonic() - self._refreshed.get(s, -np.inf) >= max_age]
+        # One lock per symbol, taken in sorted order so overlapping refreshes can't deadlock;
+        # a slow download only blocks requests for its own symbols
+        with ExitStack() as held:
+            for symbol in sorted(stale):
+                held.enter_context(self._refresh_lock(symbol))
+            now = time.monotonic()
+            # Whoever held a lock before us may have just refreshed the symbol
+            stale = [s for s in stale if now - self._refreshed.get(s, -np.inf) >= max_age]
+
+            groups = {}
+            for symbol in stale:
+                last = self.last_date(symbol)
+                groups.setdefault(None if last is None else str(last), []).append(symbol)
+
+            appended = {}
+            for start, group in groups.items():
+                if start is None:
+                    df = bulk_download(group, period=BACKFILL_PERIOD, interval="1d")
+                else:
+                    # start is inclusive: the last stored bar is re-fetched in case it was partial
+                    df = bulk_download(group, start=start, interval="1d")
+                with self._lock:
+                    self.upstream_calls += 1
+
+                matrices = {field: field_matrix(df, group, field) for field in FIELDS}
+                for symbol in group:
+                    frame = pd.DataFrame({field: matrices[field][symbol] for field in FIELDS})
+                    appended[symbol] = self.write(symbol, frame)
+                    self._refreshed[symbol] = now
+            return appended
+
+
+ohlcv_store = OHLCVStore()
@@ -0,0 +1,41 @@
+import threading
+import time
+
+from cache import TTLCache
+
+
+def test_concurrent_misses_fetch_once():
+    cache = TTLCache()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("k", fetch, ttl=60))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+    assert cache.misses == 1 and cache.coalesced == 7
+    assert cache.get_or_fetch("k", fetch, ttl=60) == "value" and cache.hits == 1
+
+
+def test_uncacheable_results_are_not_stored():
+    cache = TTLCache()
+    assert cache.get_or_fetch("k", lambda: {"error": "down"}, ttl=60, cacheable=lambda v: "error" not in v) == {"error": "down"}
+    assert cache.get("k") is None
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, 60)
+    cache.set("b", 2, 60)
+    cache.get("a")
+    cache.set("c", 3, 60)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.evictions == 1
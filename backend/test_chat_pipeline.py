@@ -0,0 +1,91 @@
+"""Per-stage timeouts in the /api/chat pipeline, with stub stages that sleep past their budget."""
+import asyncio
+import time
+import types
+
+import pytest
+
+import chat_pipeline
+from agent import ResponseCache
+
+
+class StubModel:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        await asyncio.sleep(self.delay)
+        return types.SimpleNamespace(content="stub answer")
+
+    async def astream(self, prompt):
+        self.prompts.append(prompt)
+        await asyncio.sleep(self.delay)
+        for word in ("stub ", "answer"):
+            yield types.SimpleNamespace(content=word)
+
+
+def slow(seconds, value):
+    def stage(*args):
+        time.sleep(seconds)
+        return value
+    return stage
+
+
+@pytest.fixture
+def model(monkeypatch):
+    stub = StubModel()
+    monkeypatch.setattr(chat_pipeline, "llm", types.SimpleNamespace(get=lambda: stub))
+    monkeypatch.setattr(chat_pipeline, "response_cache", ResponseCache())
+    monkeypatch.setattr(chat_pipeline, "analyze_sentiment", lambda message: {"FinBERT Label": "neutral"})
+    monkeypatch.setattr(chat_pipeline, "related_articles", lambda message: [])
+    monkeypatch.setattr(chat_pipeline, "fetch_stock_news", lambda symbol: [f"- {symbol} headline (Source: Reuters)"])
+    for name in ("SENTIMENT_TIMEOUT", "NEWS_TIMEOUT", "RETRIEVAL_TIMEOUT", "LLM_TIMEOUT"):
+        monkeypatch.setattr(chat_pipeline, name, 0.1)
+    return stub
+
+
+def test_all_stages_in_time(model):
+    result = asyncio.run(chat_pipeline.respond("tesla news"))
+    assert result["response"] == "stub answer" and result["degraded"] == []
+    assert result["sentiment"] == {"FinBERT Label": "neutral"}
+    assert {"sentiment", "retrieval", "news:TSLA", "llm"} <= set(result["timings"])
+    assert "TSLA headline" in model.prompts[0]
+
+
+def test_slow_sentiment_still_answers(model, monkeypatch):
+    monkeypatch.setattr(chat_pipeline, "analyze_sentiment", slow(0.5, {"FinBERT Label": "positive"}))
+    result = asyncio.run(chat_pipeline.respond("tesla news"))
+    assert result["response"] == "stub answer"
+    assert result["sentiment"] is None and result["degraded"] == ["sentiment"]
+    assert result["timings"]["sentiment"] < 400
+
+
+def test_slow_news_and_retrieval_leave_them_out_of_the_prompt(model, monkeypatch):
+    monkeypatch.setattr(chat_pipeline, "fetch_stock_news", slow(0.5, ["- late headline"]))
+    monkeypatch.setattr(chat_pipeline, "related_articles", slow(0.5, [{"date": "2024-01-01", "ticker": "TSLA", "label": None, "text": "late"}]))
+    result = asyncio.run(chat_pipeline.respond("tesla news"))
+    assert result["response"] == "stub answer"
+    assert sorted(result["degraded"]) == ["news:TSLA", "retrieval"]
+    assert "late" not in model.prompts[0]
+
+
+def test_slow_llm_times_out_and_is_not_cached(model):
+    model.delay = 0.5
+    result = asyncio.run(chat_pipeline.respond("tesla news"))
+    assert result["response"] == chat_pipeline.LLM_TIMEOUT_REPLY and result["degraded"] == ["llm"]
+    assert chat_pipeline.response_cache.stats()["size"] == 0
+
+
+def test_stream_reports_degraded_stages(model, monkeypatch):
+    monkeypatch.setattr(chat_pipeline, "analyze_sentiment", slow(0.5, {"FinBERT Label": "positive"}))
+
+    async def collect():
+        return [event async for event in chat_pipeline.stream_events("tesla news")]
+
+    events = asyncio.run(collect())
+    assert "".join(data["text"] for name, data in events if name == "token") == "stub answer"
+    assert ("sentiment", None) in events
+    name, done = events[-1]
+    assert name == "done" and done["degraded"] == ["sentiment"] and done["tokens"] == 2
@@ -0,0 +1,48 @@
+import types
+
+import pandas as pd
+import pytest
+
+import forecast
+from forecast import ModelCache, last_bar
+
+
+def history(closes, start="2024-05-01"):
+    return pd.DataFrame({"ds": pd.date_range(start, periods=len(closes)), "y": closes})
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    fits = []
+
+    def fit_model(df, init=None):
+        fits.append((last_bar(df), init is not None))
+        params = {"k": [[0.0]], "m": [[0.0]], "sigma_obs": [[0.0]], "delta": [[0.0]], "beta": [[0.0]]}
+        return types.SimpleNamespace(mcmc_samples=0, params=params)
+
+    monkeypatch.setattr(forecast, "fit_model", fit_model)
+    cache = ModelCache(cache_dir=str(tmp_path))
+    # The disk tier needs real Prophet models; this covers the in-memory key
+    cache._load = lambda symbol: None
+    cache._save = lambda symbol, bar, model: None
+    cache.fits_log = fits
+    return cache
+
+
+def test_last_bar():
+    assert last_bar(history([10.0, 11.5])) == "2024-05-02@11.5"
+
+
+def test_same_bar_reuses_the_model(cache):
+    model = cache.get_model("aapl", history([10.0, 11.0, 12.0]))
+    assert cache.get_model("AAPL", history([10.0, 11.0, 12.0])) is model
+    assert (cache.fits, cache.hits) == (1, 1)
+
+
+def test_rewritten_partial_bar_refits(cache):
+    cache.get_model("AAPL", history([10.0, 11.0, 12.0]))
+    # Same date, new intraday close: the store rewrote the last bar
+    cache.get_model("AAPL", history([10.0, 11.0, 12.4]))
+    cache.get_model("AAPL", history([10.0, 11.0, 12.4, 12.6]))
+    assert cache.fits_log == [("2024-05-03@12.0", False), ("2024-05-03@12.4", True), ("2024-05-04@12.6", True)]
+    assert (cache.fits, cache.warm_fits, cache.hits) == (3, 2, 0)
@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from bench_glossary import synthetic_entries
+from glossary import Glossary, load_entries
+
+
+@pytest.fixture(scope="module", params=["csv", "padded"])
+def glossary(request):
+    entries = load_entries()
+    if request.param == "padded":
+        # The real terms among 5k made-up ones, as bench_glossary indexes them
+        entries = synthetic_entries(entries, 5_000, random.Random(0))
+    return Glossary(entries)
+
+
+def test_lookup(glossary):
+    assert glossary.lookup("  EBITDA ").startswith("EBITDA stands for")
+    assert glossary.lookup("not a term") is None
+
+
+def test_exact_match_ranks_first(glossary):
+    top = glossary.search("Dividend Yield")[0]
+    assert (top["term"], top["match"]) == ("dividend yield", "exact")
+
+
+def test_prefix(glossary):
+    results = glossary.search("dividend y")
+    assert results[0]["term"] == "dividend yield" and results[0]["match"] == "prefix"
+
+
+@pytest.mark.parametrize("query, term", [("ebtida", "ebitda"), ("market capitalisation", "market capitalization"), ("dividnd yield", "dividend yield")])
+def test_typo(glossary, query, term):
+    assert term in [r["term"] for r in glossary.search(query, limit=3)]
+
+
+def test_definition_keywords():
+    # Only on the real terms: padded definitions are made of the same words
+    results = Glossary(load_entries()).search("depreciation amortization", limit=10)
+    assert "ebitda" in [r["term"] for r in results]
+
+
+def test_empty_query(glossary):
+    assert glossary.search("   ") == []
@@ -0,0 +1,166 @@
+"""
+ForecastJobs scheduling rules, with a stub fit on a thread pool instead of
+Prophet in worker processes. Fits block until the test opens `gate`.
+"""
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import jobs
+from jobs import CANCELLED_RESULT, ForecastJobs
+
+
+class StubFits:
+    def __init__(self):
+        self.gate = threading.Event()
+        self.calls = []
+        self.running = Counter()
+        self.max_per_symbol = Counter()
+        self._lock = threading.Lock()
+
+    def fit(self, symbol, days):
+        with self._lock:
+            self.calls.append((symbol, days))
+            self.running[symbol] += 1
+            self.max_per_symbol[symbol] = max(self.max_per_symbol[symbol], self.running[symbol])
+        self.gate.wait(5)
+        with self._lock:
+            self.running[symbol] -= 1
+        return {"symbol": symbol, "forecast": [days]}
+
+    def forecast_symbol(self, symbol, days):
+        return self.fit(symbol, days)
+
+    def forecast_history(self, symbol, history, days):
+        return self.fit(symbol, days)
+
+
+@pytest.fixture
+def fits(monkeypatch):
+    stub = StubFits()
+    monkeypatch.setattr(jobs, "forecast_symbol", stub.forecast_symbol)
+    monkeypatch.setattr(jobs, "forecast_history", stub.forecast_history)
+    yield stub
+    stub.gate.set()
+
+
+def make_jobs(workers, max_queue=32):
+    forecast_jobs = ForecastJobs(workers=workers, max_queue=max_queue)
+    forecast_jobs._executor.shutdown()
+    forecast_jobs._executor = ThreadPoolExecutor(max_workers=workers)
+    return forecast_jobs
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_same_symbol_and_days_returns_the_running_job(fits):
+    forecast_jobs = make_jobs(workers=2)
+    first = forecast_jobs.submit("aapl", 7)
+    assert forecast_jobs.submit("AAPL", 7) is first
+    assert forecast_jobs.stats()["deduplicated"] == 1
+    fits.gate.set()
+    assert first["future"].result(5) == {"symbol": "AAPL", "forecast": [7]}
+    assert fits.calls == [("AAPL", 7)]
+
+
+def test_one_fit_per_symbol_at_a_time(fits):
+    forecast_jobs = make_jobs(workers=3)
+    week = forecast_jobs.submit("AAPL", 7)
+    month = forecast_jobs.submit("AAPL", 30)
+    other = forecast_jobs.submit("MSFT", 7)
+    # A free worker doesn't start the second AAPL horizon, but does start MSFT
+    wait_until(lambda: other["status"] == "running")
+    assert (week["status"], month["status"]) == ("running", "queued")
+
+    fits.gate.set()
+    for job in (week, month, other):
+        job["future"].result(5)
+    assert month["status"] == "done"
+    assert fits.max_per_symbol == {"AAPL": 1, "MSFT": 1}
+
+
+def test_full_queue_rejects(fits):
+    forecast_jobs = make_jobs(workers=1, max_queue=1)
+    running = forecast_jobs.submit("AAPL", 7)
+    queued = forecast_jobs.submit("MSFT", 7)
+    assert forecast_jobs.submit("NVDA", 7) is None
+    assert forecast_jobs.stats()["rejected"] == 1
+    fits.gate.set()
+    running["future"].result(5)
+    queued["future"].result(5)
+    # Room again once the queue drains
+    assert forecast_jobs.submit("NVDA", 7) is not None
+
+
+def test_cancel_queued_but_not_running(fits):
+    forecast_jobs = make_jobs(workers=1)
+    running = forecast_jobs.submit("AAPL", 7)
+    queued = forecast_jobs.submit("MSFT", 7)
+    assert forecast_jobs.cancel(queued["job_id"])
+    assert queued["status"] == "cancelled" and queued["future"].result(0) == CANCELLED_RESULT
+    assert not forecast_jobs.cancel(running["job_id"])
+    assert not forecast_jobs.cancel("no-such-job")
+
+    # A cancelled (symbol, days) can be submitted again as a new job
+    again = forecast_jobs.submit("MSFT", 7)
+    assert again is not queued
+    fits.gate.set()
+    assert again["future"].result(5)["forecast"] == [7]
+    assert ("MSFT", 7) in fits.calls and fits.calls.count(("MSFT", 7)) == 1
+
+
+def consume(batch, results):
+    thread = threading.Thread(target=lambda: results.extend(batch))
+    thread.start()
+    return thread
+
+
+def test_batch_leaves_a_slot_for_interactive_jobs(fits, monkeypatch):
+    monkeypatch.setattr(jobs, "load_histories", lambda symbols: {symbol: None for symbol in symbols})
+    forecast_jobs = make_jobs(workers=3)
+    assert forecast_jobs.max_batch_running == 2
+    symbols = ["AAPL", "MSFT", "NVDA", "AMZN", "META"]
+    results = []
+    thread = consume(forecast_jobs.forecast_batch(symbols, 7), results)
+    wait_until(lambda: forecast_jobs.stats()["batch_running"] == 2)
+    assert forecast_jobs.stats()["batch_queued"] == 3
+
+    # The third worker is free for /api/predict, even for a symbol the batch hasn't reached yet
+    job = forecast_jobs.submit("META", 30)
+    wait_until(lambda: job["status"] == "running")
+    assert forecast_jobs.stats()["running"] == 3
+
+    fits.gate.set()
+    thread.join(5)
+    assert sorted(r["symbol"] for r in results) == sorted(symbols)
+    assert all(r["forecast"] == [7] and "seconds" in r for r in results)
+    assert fits.max_per_symbol["META"] == 1
+    assert forecast_jobs.stats()["running"] == 0
+
+
+def test_batch_download_error_ends_every_symbol(fits, monkeypatch):
+    def fail(symbols):
+        raise RuntimeError("download failed")
+
+    monkeypatch.setattr(jobs, "load_histories", fail)
+    results = list(make_jobs(workers=2).forecast_batch(["AAPL", "MSFT"], 7))
+    assert results == [{"symbol": s, "error": "download failed", "forecast": []} for s in ("AAPL", "MSFT")]
+    assert fits.calls == []
+
+
+def test_unread_batch_fits_are_dropped(fits, monkeypatch):
+    monkeypatch.setattr(jobs, "load_histories", lambda symbols: {symbol: None for symbol in symbols})
+    forecast_jobs = make_jobs(workers=2)
+    batch = forecast_jobs.forecast_batch(["AAPL", "MSFT", "NVDA"], 7)
+    fits.gate.set()
+    next(batch)
+    batch.close()
+    assert forecast_jobs.stats()["batch_queued"] == 0
@@ -0,0 +1,72 @@
+import contextvars
+
+import pytest
+
+import metrics
+from metrics import Counter, Histogram
+
+
+def test_counter_exposition_and_label_escaping():
+    counter = Counter("test_calls_total", "Calls.", ("source",))
+    counter.inc('say "hi"\\\n')
+    counter.inc("yfinance", amount=2)
+    assert counter.render() == [
+        "# HELP test_calls_total Calls.",
+        "# TYPE test_calls_total counter",
+        'test_calls_total{source="say \\"hi\\"\\\\\\n"} 1',
+        'test_calls_total{source="yfinance"} 2',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(seconds, "fit")
+    assert histogram.render() == [
+        "# HELP test_seconds Latency.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{stage="fit",le="0.1"} 2',
+        'test_seconds_bucket{stage="fit",le="1.0"} 3',
+        'test_seconds_bucket{stage="fit",le="+Inf"} 4',
+        'test_seconds_sum{stage="fit"} 2.65',
+        'test_seconds_count{stage="fit"} 4',
+    ]
+
+
+def test_render_includes_stats_gauges(monkeypatch):
+    monkeypatch.setattr(metrics, "_stats", {})
+    metrics.register_stats("news", lambda: {"hit_rate": 0.5, "size": 3, "name": "skipped"})
+    metrics.register_stats("broken", lambda: 1 / 0)
+    text = metrics.render()
+    assert text.endswith("\n") and "# TYPE marketvision_stage_seconds histogram" in text
+    assert 'marketvision_hit_rate{component="news"} 0.5' in text
+    assert 'marketvision_size{component="news"} 3.0' in text
+    assert "marketvision_name" not in text and "broken" not in text
+
+
+def test_server_timing_sums_repeated_stages():
+    def request():
+        timings = metrics.start_request()
+        metrics.observe("yfinance", 0.010)
+        metrics.observe("yfinance", 0.005)
+        metrics.observe("prophet_fit", 0.2, histogram=False)
+        with metrics.stage("vader"):
+            pass
+        return timings
+
+    timings = contextvars.copy_context().run(request)
+    assert [name for name, _ in timings] == ["yfinance", "yfinance", "prophet_fit", "vader"]
+    header = metrics.server_timing(timings, 0.25)
+    parts = header.split(", ")
+    assert parts[:2] == ["yfinance;dur=15.0", "prophet_fit;dur=200.0"]
+    assert parts[2].startswith("vader;dur=") and parts[-1] == "total;dur=250.0"
+
+
+def test_stages_outside_a_request_only_hit_the_histogram():
+    assert contextvars.copy_context().run(metrics._request_timings.get) is None
+    with pytest.raises(ValueError):
+        with metrics.upstream("test_source"):
+            raise ValueError("down")
+    text = metrics.render()
+    assert 'marketvision_upstream_errors_total{source="test_source"} 1' in text
+    assert 'marketvision_stage_seconds_count{stage="test_source"} 1' in text
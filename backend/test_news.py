@@ -0,0 +1,72 @@
+import time
+
+import pytest
+import yfinance as yf
+
+from news import NewsCache, fetch_news_items, news_id
+
+
+def item(title, link=None):
+    return {"id": news_id(title, link), "title": title, "publisher": "Wire", "link": link}
+
+
+class Upstream:
+    """fetch stand-in returning whatever the test queues next (an exception is raised)."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def __call__(self, symbol):
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_fetch_from_fake_market_is_cached():
+    cache = NewsCache(fetch=fetch_news_items)
+    calls = yf.market.calls
+    items = cache.get("aapl")
+    assert len(items) == 5 and all(i["publisher"] == "Fake Wire" and i["id"] == news_id(i["title"], i["link"]) for i in items)
+    assert cache.get("AAPL") is items
+    assert yf.market.calls == calls + 1
+
+
+def test_refresh_merges_newest_first_and_drops_duplicates():
+    upstream = Upstream(
+        [item("Apple beats", "https://a/1"), item("Apple guides up", "https://a/2")],
+        [item("Apple hits a record", "https://a/3"), item("Apple beats", "https://a/1"), item("Apple beats", "https://b/1")]
+    )
+    cache = NewsCache(fetch=upstream, max_items=4)
+    cache.refresh("AAPL")
+    merged = cache.refresh("AAPL")
+    # Same title from another link is a different story; same title + link is the same one
+    assert [(i["title"], i["link"]) for i in merged] == [
+        ("Apple hits a record", "https://a/3"), ("Apple beats", "https://b/1"), ("Apple beats", "https://a/1"), ("Apple guides up", "https://a/2")
+    ]
+    assert cache.stats()["duplicates_dropped"] == 1
+
+
+def test_stale_headlines_when_upstream_fails():
+    upstream = Upstream([item("Apple beats")], RuntimeError("yfinance down"))
+    cache = NewsCache(ttl=0.05, fetch=upstream)
+    first = cache.get("AAPL")
+    time.sleep(0.1)
+    assert cache.fresh_for("AAPL") == 0.0
+    assert cache.get("AAPL") == first
+    assert (upstream.calls, cache.stats()["upstream_errors"]) == (2, 1)
+
+
+def test_failure_without_stale_headlines_raises():
+    cache = NewsCache(fetch=Upstream(RuntimeError("yfinance down")))
+    with pytest.raises(RuntimeError):
+        cache.get("MSFT")
+
+
+def test_fresh_for_counts_down_from_the_last_refresh():
+    cache = NewsCache(ttl=60, fetch=Upstream([item("Apple beats")]))
+    assert cache.fresh_for("AAPL") == 0.0
+    cache.get("aapl")
+    assert 59 < cache.fresh_for("AAPL") <= 60
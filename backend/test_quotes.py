@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+import yfinance as yf
+from fastapi.testclient import TestClient
+
+import main
+from marketdata import compute_quotes
+
+NAN = np.nan
+
+
+def daily(rows):
+    return pd.DataFrame(rows, index=pd.DatetimeIndex(["2024-05-01", "2024-05-02", "2024-05-03"]), columns=["AAPL", "MSFT", "IPO", "GONE"])
+
+
+def test_daily_closes_only():
+    quotes = compute_quotes(daily([[100.0, 400.0, NAN, NAN], [101.0, 410.0, NAN, NAN], [99.0, NAN, 20.0, NAN]]))
+    assert quotes["AAPL"] == {"symbol": "AAPL", "price": 99.0, "change": -2.0, "change_percent": -1.98, "ts": int(pd.Timestamp("2024-05-03").timestamp())}
+    # No bar today: compared against its own previous close
+    assert quotes["MSFT"]["price"] == 410.0 and quotes["MSFT"]["change"] == 10.0
+    assert quotes["IPO"] == {"error": "Insufficient historical data for comparison"}
+    assert quotes["GONE"] == {"error": "No recent data available"}
+
+
+def test_minute_bars_override_price_and_ts():
+    closes = daily([[100.0, 400.0, NAN, NAN], [101.0, 410.0, NAN, NAN], [99.0, 405.0, NAN, NAN]])
+    index = pd.DatetimeIndex(["2024-05-03 13:30", "2024-05-03 13:31", "2024-05-03 13:32"], tz="UTC")
+    minutes = pd.DataFrame({"AAPL": [98.5, 98.9, NAN], "MSFT": [NAN, NAN, NAN]}, index=index)
+    quotes = compute_quotes(closes, minutes)
+    # Last non-NaN minute; the previous close still comes from the daily bars
+    assert quotes["AAPL"]["price"] == 98.9 and quotes["AAPL"]["change"] == pytest.approx(-2.1)
+    assert quotes["AAPL"]["ts"] == int(index[1].timestamp())
+    # No minute bars: the daily bar's price and date
+    assert quotes["MSFT"]["price"] == 405.0 and quotes["MSFT"]["ts"] == int(pd.Timestamp("2024-05-03").timestamp())
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "market_cache", main.TTLCache())
+    return TestClient(main.app)
+
+
+def test_quotes_endpoint(client):
+    quotes = client.get("/api/quotes", params={"symbols": "aapl, MSFT,aapl"}).json()["quotes"]
+    assert list(quotes) == ["AAPL", "MSFT"]
+    assert all(q["price"] > 0 and q["ts"] for q in quotes.values())
+
+
+def test_quotes_are_bounded_and_validated(client, monkeypatch):
+    monkeypatch.setattr(main, "QUOTES_LIMIT", 3)
+    calls = yf.market.calls
+    assert client.get("/api/quotes", params={"symbols": "A,B,C,D"}).json() == {"error": "At most 3 symbols per request"}
+    assert client.get("/api/quotes", params={"symbols": "AAPL,../etc"}).json() == {"error": "Invalid symbol: '../ETC'"}
+    assert client.get("/api/quotes", params={"symbols": " , "}).json() == {"error": "No symbols given"}
+    assert yf.market.calls == calls
@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import pytest
+
+import agent
+import chat_pipeline
+from agent import ResponseCache
+
+NEWS = {"TSLA": ["- Tesla deliveries beat estimates (Source: Reuters)"]}
+
+
+@pytest.fixture(autouse=True)
+def fresh_news(monkeypatch):
+    monkeypatch.setattr(agent.news_cache, "fresh_for", lambda symbol: 600.0)
+
+
+def test_exact_hit_after_normalization():
+    cache = ResponseCache()
+    cache.store("What is the news on Tesla?", NEWS, "answer")
+    reply, meta = cache.lookup("tesla news?", NEWS)
+    assert reply == "answer" and meta["match"] == "exact"
+    assert cache.lookup("how about tesla", NEWS)[0] == "answer"
+
+
+def test_near_duplicate_hit():
+    cache = ResponseCache()
+    cache.store("should I buy tesla stock", NEWS, "answer")
+    reply, meta = cache.lookup("should i buy tesla stocks", NEWS)
+    assert reply == "answer" and meta["match"] == "similar" and meta["similarity"] >= cache.similarity
+
+
+def test_different_context_misses():
+    cache = ResponseCache()
+    cache.store("tesla news", NEWS, "answer")
+    assert cache.lookup("tesla news", {"TSLA": ["- Tesla recalls cars (Source: AP)"]}) == (None, {"hit": False})
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("tesla price target 2025", "tesla price target 2026"),
+    ("should I buy tesla stock", "should I sell tesla stock"),
+    ("will tesla go up this week", "will tesla go down this week"),
+    ("is tesla overvalued", "is tesla undervalued"),
+    ("is tesla a good long term hold", "is tesla not a good long term hold"),
+    ("compare tesla and apple", "compare tesla and microsoft"),
+])
+def test_numbers_tickers_and_polarity_must_match(cached, asked):
+    cache = ResponseCache(similarity=0.5)
+    cache.store(cached, NEWS, "answer")
+    assert cache.lookup(asked, NEWS) == (None, {"hit": False})
+
+
+def test_ttl_capped_by_news_freshness(monkeypatch):
+    monkeypatch.setattr(agent.news_cache, "fresh_for", lambda symbol: 0.05)
+    cache = ResponseCache(ttl=600)
+    assert cache.ttl_for(NEWS) == 0.05
+    cache.store("tesla news", NEWS, "answer")
+    assert cache.lookup("tesla news", NEWS)[0] == "answer"
+    time.sleep(0.1)
+    assert cache.lookup("tesla news", NEWS)[0] is None
+
+    # Stale headlines: not cached at all
+    monkeypatch.setattr(agent.news_cache, "fresh_for", lambda symbol: 0.0)
+    cache.store("tesla news", NEWS, "answer")
+    assert cache.stats()["size"] == 1
+
+
+def test_lru_eviction():
+    cache = ResponseCache(maxsize=2)
+    for question in ["why did apple fall", "why did nvidia rise", "why did tesla fall"]:
+        cache.store(question, {}, question)
+        if question == "why did nvidia rise":
+            cache.lookup("why did apple fall", {})  # apple is now the most recently used
+    assert cache.lookup("why did nvidia rise", {})[0] is None
+    assert cache.lookup("why did apple fall", {})[0] == "why did apple fall"
+    assert cache.stats()["evictions"] == 1 and not cache._buckets.get((agent.context_key(), agent.answer_signature("why did nvidia rise")))
+
+
+def test_chat_response_reports_cache(monkeypatch):
+    monkeypatch.setattr(chat_pipeline, "response_cache", ResponseCache())
+    monkeypatch.setattr(chat_pipeline, "analyze_sentiment", lambda message: {"label": "neutral"})
+    monkeypatch.setattr(chat_pipeline, "related_articles", lambda message: [])
+    monkeypatch.setattr(chat_pipeline, "fetch_stock_news", lambda symbol: NEWS.get(symbol, []))
+
+    first = asyncio.run(chat_pipeline.respond("What is the news on Tesla?"))
+    second = asyncio.run(chat_pipeline.respond("tesla news"))
+    assert first["cache"] == {"hit": False}
+    assert second["cache"]["hit"] and second["cache"]["match"] == "exact"
+    assert second["response"] == first["response"] and "llm" not in second["timings"]
@@ -0,0 +1,79 @@
+import types
+
+import pytest
+
+import retrieval
+from news import NewsCache, news_id
+from retrieval import NewsIndex, index_headlines
+
+DOCS = [
+    {"text": "Apple iPhone sales beat estimates", "ticker": "AAPL", "date": "2024-01-10", "label": "positive"},
+    {"text": "Apple faces iPhone antitrust probe", "ticker": "AAPL", "date": "2024-03-01", "label": "negative"},
+    {"text": "Microsoft cloud sales beat estimates", "ticker": "MSFT", "date": "2024-01-12", "label": "positive"},
+    {"text": "Tesla deliveries miss estimates", "ticker": "TSLA", "date": "2024-02-02", "label": "negative"},
+    {"text": "Nvidia unveils new data center chips", "ticker": "NVDA", "date": "2024-03-18", "label": None},
+]
+
+
+@pytest.fixture
+def index():
+    index = NewsIndex()
+    assert index.append(DOCS) == 5
+    return index
+
+
+def texts(results):
+    return [r["text"] for r in results]
+
+
+def test_ranks_by_tfidf(index):
+    results = index.search("iphone sales", k=5)
+    assert texts(results)[0] == "Apple iPhone sales beat estimates"
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+    assert results[0] == {**DOCS[0], "score": results[0]["score"]}
+
+
+def test_ticker_mask(index):
+    assert texts(index.search("sales beat estimates", k=5, tickers=["msft"])) == ["Microsoft cloud sales beat estimates"]
+    assert index.search("sales beat estimates", tickers=["ZZZZ"]) == []
+
+
+def test_date_range(index):
+    results = index.search("estimates", k=5, start="2024-01-11", end="2024-02-28")
+    assert sorted(texts(results)) == ["Microsoft cloud sales beat estimates", "Tesla deliveries miss estimates"]
+
+
+def test_min_score(index):
+    scores = [r["score"] for r in index.search("apple iphone sales", k=5)]
+    assert len(scores) == 3  # the Microsoft story matches on "sales"
+    assert len(index.search("apple iphone sales", k=5, min_score=(scores[0] + scores[1]) / 2)) == 1
+    assert index.search("what is the news today") == []  # stopwords only
+
+
+def test_append_after_search_skips_duplicates(index):
+    index.search("chips")
+    assert index.append([DOCS[4], {"text": "Nvidia chips sold out", "ticker": "NVDA", "date": "2024-04-01"}]) == 1
+    assert len(index) == 6
+    # The shorter new document scores higher, so idf and norms were recomputed after the append
+    assert texts(index.search("chips", k=5)) == ["Nvidia chips sold out", "Nvidia unveils new data center chips"]
+
+
+def test_news_cache_appends_fresh_headlines(index, monkeypatch):
+    monkeypatch.setattr(retrieval, "news_index", types.SimpleNamespace(get=lambda: index))
+    batches = [
+        [{"id": news_id("Tesla recalls robotaxis", None), "title": "Tesla recalls robotaxis", "publisher": "AP", "link": None}],
+        [{"id": news_id("Tesla recalls robotaxis", None), "title": "Tesla recalls robotaxis", "publisher": "AP", "link": None}]
+    ]
+    cache = NewsCache(fetch=lambda symbol: batches.pop(0))
+    cache.on_fresh = index_headlines
+    cache.refresh("TSLA")
+    cache.refresh("TSLA")  # nothing new: on_fresh isn't called again
+    assert len(index) == 6
+    result = index.search("robotaxis recall", tickers=["TSLA"])[0]
+    assert result["text"] == "Tesla recalls robotaxis" and result["ticker"] == "TSLA" and result["label"] is None
+
+
+def test_on_fresh_errors_do_not_fail_the_refresh():
+    cache = NewsCache(fetch=lambda symbol: [{"id": "1", "title": "Tesla news", "publisher": "AP", "link": None}])
+    cache.on_fresh = lambda symbol, items: 1 / 0
+    assert len(cache.refresh("TSLA")) == 1
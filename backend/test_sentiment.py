@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+import sentiment
+from sentiment import MicroBatcher, SentimentCache
+
+
+class RecordingScorer:
+    """predict_batch stand-in: remembers each batch and scores a text as its length."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        return [len(text) for text in texts]
+
+
+def test_full_batch_runs_without_waiting():
+    scorer = RecordingScorer()
+    batcher = MicroBatcher(scorer, max_batch=4, max_wait_ms=10_000)
+    start = time.monotonic()
+    futures = [batcher.submit("x" * n) for n in range(1, 5)]
+    assert [f.result(5) for f in futures] == [1, 2, 3, 4]
+    assert time.monotonic() - start < 5
+    assert scorer.batches == [["x", "xx", "xxx", "xxxx"]]
+
+
+def test_partial_batch_runs_after_max_wait():
+    scorer = RecordingScorer()
+    batcher = MicroBatcher(scorer, max_batch=100, max_wait_ms=50)
+    start = time.monotonic()
+    futures = [batcher.submit("a"), batcher.submit("bb")]
+    assert [f.result(5) for f in futures] == [1, 2]
+    assert time.monotonic() - start >= 0.045
+    assert scorer.batches == [["a", "bb"]]
+    assert batcher.stats()["avg_batch"] == 2.0
+
+
+def test_concurrent_callers_get_their_own_rows():
+    scorer = RecordingScorer()
+    batcher = MicroBatcher(scorer, max_batch=8, max_wait_ms=20)
+    results = {}
+
+    def call(n):
+        results[n] = batcher.submit("y" * n).result(5)
+
+    threads = [threading.Thread(target=call, args=(n,)) for n in range(1, 41)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == {n: n for n in range(1, 41)}
+    assert all(len(batch) <= 8 for batch in scorer.batches) and len(scorer.batches) < 40
+
+
+def test_failed_batch_fails_its_callers_only():
+    def predict_batch(texts):
+        if "boom" in texts:
+            raise RuntimeError("model failed")
+        return [len(text) for text in texts]
+
+    batcher = MicroBatcher(predict_batch, max_batch=1)
+    with pytest.raises(RuntimeError):
+        batcher.submit("boom").result(5)
+    assert batcher.submit("fine").result(5) == 4
+
+
+def test_stub_finbert_batches_match_single_texts():
+    texts = ["Stocks rally on earnings", "Shares slump after guidance cut", "Fed holds rates"]
+    batched = sentiment.finbert_batch(texts)
+    assert batched == [sentiment.finbert_batch([text])[0] for text in texts]
+    assert {item["label"] for item in batched[0]} == {"positive", "negative", "neutral"}
+
+
+def test_key_changes_with_model_tag(tmp_path):
+    path = str(tmp_path / "sentiment.sqlite3")
+    fp32 = SentimentCache(path, model_tag="ProsusAI/finbert@main/torch+vader/v1")
+    int8 = SentimentCache(path, model_tag="ProsusAI/finbert@main/torch-int8+vader/v1")
+    assert fp32.key("Stocks  rally\n") == fp32.key("Stocks rally")
+    assert fp32.key("Stocks rally") != int8.key("Stocks rally")
+    assert fp32.key("Stocks rally") != fp32.key("stocks rally")  # case matters to VADER
+
+
+def test_memory_miss_falls_through_to_sqlite_and_is_promoted(tmp_path):
+    cache = SentimentCache(str(tmp_path / "sentiment.sqlite3"), maxsize=1)
+    cache.put_many({"a": {"label": "positive"}})
+    cache.put_many({"b": {"label": "negative"}})  # evicts "a" from memory only
+    assert list(cache._memory) == ["b"]
+
+    assert cache.get_many(["a"]) == {"a": {"label": "positive"}}
+    assert (cache.disk_hits, cache.memory_hits) == (1, 0)
+    assert list(cache._memory) == ["a"]
+    cache.get_many(["a"])
+    assert (cache.disk_hits, cache.memory_hits) == (1, 1)
+    cache.get_many(["c"])
+    assert cache.misses == 1
+
+
+def test_results_survive_a_restart(tmp_path):
+    path = str(tmp_path / "sentiment.sqlite3")
+    SentimentCache(path).put_many({"a": {"label": "neutral"}})
+    reopened = SentimentCache(path)
+    assert reopened.get_many(["a", "b"]) == {"a": {"label": "neutral"}}
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_cached_texts_skip_the_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(sentiment, "sentiment_cache", SentimentCache(str(tmp_path / "sentiment.sqlite3"), model_tag="test"))
+    scored = []
+    submit = sentiment.finbert_batcher.submit
+    monkeypatch.setattr(sentiment.finbert_batcher, "submit", lambda text: scored.append(text) or submit(text))
+
+    first = sentiment.analyze_sentiment_batch(["Stocks rally", "Stocks  rally", "Fed holds rates"])
+    assert scored == ["Stocks rally", "Fed holds rates"]
+    assert first[0] == first[1]
+    assert sentiment.analyze_sentiment_batch(["Fed holds rates", "Stocks rally"]) == [first[2], first[0]]
+    assert len(scored) == 2
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from store import FIELDS, OHLCVStore
+
+
+def bars(start, n, close=100.0):
+    index = pd.date_range(start, periods=n, freq="D", name="Date")
+    values = close + np.arange(n, dtype=float)
+    return pd.DataFrame({"Open": values, "High": values + 1, "Low": values - 1, "Close": values, "Volume": 1000.0}, index=index)
+
+
+def test_upsert_rewrites_last_bar_and_appends(tmp_path):
+    store = OHLCVStore(root=str(tmp_path))
+    assert store.write("AAPL", bars("2024-01-01", 5)) == 5
+    # Overlaps the stored range: 01-05 is rewritten (it was partial), 01-06.. are new
+    assert store.write("AAPL", bars("2024-01-03", 6, close=200.0)) == 3
+
+    dates, ohlcv = store.read("AAPL")
+    assert len(dates) == len(ohlcv) == 8
+    assert list(dates.astype(str)) == [str(d.date()) for d in pd.date_range("2024-01-01", periods=8)]
+    closes = ohlcv[:, FIELDS.index("Close")]
+    # Bars before the stored last date are left alone
+    np.testing.assert_array_equal(closes[:4], [100.0, 101.0, 102.0, 103.0])
+    np.testing.assert_array_equal(closes[4:], [202.0, 203.0, 204.0, 205.0])
+
+
+def test_duplicate_dates_keep_last_row(tmp_path):
+    store = OHLCVStore(root=str(tmp_path))
+    frame = pd.concat([bars("2024-01-01", 2), bars("2024-01-02", 1, close=50.0)])
+    assert store.write("MSFT", frame) == 2
+    assert store.history("MSFT")["Close"].tolist() == [100.0, 50.0]
+
+
+def test_half_written_tail_is_dropped(tmp_path):
+    store = OHLCVStore(root=str(tmp_path))
+    store.write("IBM", bars("2024-01-01", 3))
+    _, dates_path, ohlcv_path = store._paths("IBM")
+    with open(ohlcv_path, "ab") as f:
+        f.write(b"\0" * 12)  # interrupted append: part of a row, no date
+    store.write("IBM", bars("2024-01-04", 1, close=300.0))
+    dates, ohlcv = store.read("IBM")
+    assert len(dates) == len(ohlcv) == 4
+    assert ohlcv[-1, FIELDS.index("Close")] == 300.0
+
+
+def test_invalid_symbol_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        OHLCVStore(root=str(tmp_path)).write("../etc", bars("2024-01-01", 1))
@@ -0,0 +1,14 @@
+import pytest
+
+from bench_tickers import CASES
+from tickers import TickerMatcher, load_universe
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return TickerMatcher(load_universe())
+
+
+@pytest.mark.parametrize("message, expected", CASES)
+def test_find(matcher, message, expected):
+    assert matcher.find(message) == expected
@@ -0,0 +1,171 @@
+"""
+Ticker / company-name extraction for chat messages.
+
+An Aho-Corasick automaton over every symbol and company alias in the local
+universe (tickers.csv, or TICKER_UNIVERSE_PATH) is built once and matched in
+a single pass over the lowercased message. Matches must sit on word
+boundaries; overlapping matches keep the longest ("bank of america" beats
+"america"). The universe's strict column says how a bare symbol may be
+written:
+
+    0  any case ("aapl")
+    1  in capitals or as a cashtag ("KO", "$KO"), for short symbols that
+       look like abbreviations
+    2  only as a cashtag ("$ON", "$NOW"), for symbols that are English
+       words and so show up in capitals at the start of a sentence or in
+       shouted text ("A quick update", "Any news? ON tesla")
+
+One-letter symbols are always 2. Company names and aliases match in any
+case. Class shares are listed with a dash, as yfinance spells them
+(BRK-B), with the dotted form as an alias; a dotted cashtag ($BRK.B) maps
+to the dashed symbol when that is in the universe. Other cashtags for
+symbols outside the universe are accepted as-is ($SHOP.TO), and those
+symbols are not found without the "$".
+"""
+import csv
+import os
+import re
+from collections import deque
+
+TICKER_UNIVERSE_PATH = os.getenv("TICKER_UNIVERSE_PATH", os.path.join(os.path.dirname(__file__), "tickers.csv"))
+
+# strict level of symbols that only count as $SYMBOL
+CASHTAG_ONLY = 2
+
+CASHTAG = re.compile(r"\$([A-Za-z]{1,5}(?:[.-][A-Za-z]{1,3})?)\b")
+
+
+def _lower(text):
+    # str.lower() can change the length of a few non-ASCII characters; offsets must line up with text
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def _is_word_char(c):
+    return c.isalnum() or c == "_"
+
+
+class TickerMatcher:
+    """Aho-Corasick automaton mapping symbols and aliases to tickers."""
+
+    def __init__(self, entries):
+        """entries: iterable of (symbol, aliases, strict level 0-2)."""
+        self._goto = [{}]  # node -> {char: node}
+        self._fail = [0]
+        self._out = [[]]  # node -> [(pattern length, symbol, is_symbol)]
+        self.symbols = {}  # symbol -> strict
+        for symbol, aliases, strict in entries:
+            symbol = symbol.upper()
+            self.symbols[symbol] = CASHTAG_ONLY if len(symbol) == 1 else int(strict)
+            self._add(symbol.lower(), symbol, True)
+            for alias in aliases:
+                self._add(alias.lower(), symbol, False)
+        self._build()
+
+    def _add(self, pattern, symbol, is_symbol):
+        if not pattern:
+            return
+        node = 0
+        for c in pattern:
+            nxt = self._goto[node].get(c)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][c] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), symbol, is_symbol))
+
+    def _build(self):
+        # Breadth-first so every fail link points at an already finished node
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for c, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and c not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(c, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] += self._out[self._fail[child]]
+        # Fold fail links into the goto tables so matching is one dict lookup per character
+        order = deque([0])
+        while order:
+            node = order.popleft()
+            children = list(self._goto[node].items())
+            if node:
+                self._goto[node] = {**self._goto[self._fail[node]], **self._goto[node]}
+            order.extend(child for _, child in children)
+
+    def _candidates(self, text):
+        lowered = _lower(text)
+        n = len(text)
+        goto, out = self._goto, self._out
+        node = 0
+        for end, c in enumerate(lowered, 1):
+            node = goto[node].get(c, 0)
+            if not out[node]:
+                continue
+            for length, symbol, is_symbol in out[node]:
+                start = end - length
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if end < n and _is_word_char(text[end]):
+                    continue
+                strict = self.symbols[symbol] if is_symbol else 0
+                if strict:
+                    cashtag = start > 0 and text[start - 1] == "$"
+                    if not cashtag and (strict == CASHTAG_ONLY or not text[start:end].isupper()):
+                        continue
+                yield start, end, symbol
+
+    def _cashtag_symbol(self, tag):
+        # $BRK.B -> BRK-B; exchange suffixes such as SHOP.TO are left alone
+        symbol = tag.upper()
+        dashed = symbol.replace(".", "-")
+        return dashed if dashed != symbol and dashed in self.symbols else symbol
+
+    def find(self, text):
+        """Tickers mentioned in text, unique, in order of first mention."""
+        matches = [(m.start(1), m.end(1), self._cashtag_symbol(m.group(1))) for m in CASHTAG.finditer(text)]
+        matches += self._candidates(text)
+        # Longest match wins where matches overlap
+        matches.sort(key=lambda m: (m[0], m[0] - m[1]))
+        found = []
+        taken_until = 0
+        for start, end, symbol in matches:
+            if start < taken_until:
+                continue
+            taken_until = end
+            if symbol not in found:
+                found.append(symbol)
+        return found
+
+
+def load_universe(path=TICKER_UNIVERSE_PATH):
+    """(symbol, aliases, strict) rows from a symbol,name,aliases,strict CSV; strict is 0, 1 or 2."""
+    entries = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            aliases = [a.strip() for a in (row.get("aliases") or "").split("|") if a.strip()]
+            entries.append((row["symbol"].strip(), aliases, int((row.get("strict") or "0").strip())))
+    return entries
+
+
+_matcher = None
+
+
+def get_matcher():
+    # Built on first use, then shared
+    global _matcher
+    if _matcher is None:
+        _matcher = TickerMatcher(load_universe())
+    return _matcher
+
+
+def find_tickers(text):
+    return get_matcher().find(text)
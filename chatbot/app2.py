@@ -1,3 +1,6 @@
+import os
+import sys
+
 import streamlit as st
 from langchain.agents import create_agent
 from langchain_ollama import ChatOllama
@@ -21,17 +24,17 @@ st.subheader("📚 FinKnowledge Search (Keyword Based Lookup)")
 
 fin_search = st.text_input("Search Financial Term / Company / Market Concept:", placeholder="Example: EBITDA, Liquidity ratio, Derivatives...")
 
-# Here you can later connect RAG, DB, APIs. For now, we provide a placeholder.
-finance_glossary = {
-    "ebitda": "EBITDA stands for Earnings Before Interest, Taxes, Depreciation, and Amortization. It measures operating profitability.",
-    "liquidity ratio": "Liquidity ratios measure a company's ability to pay short-term financial obligations.",
-    "derivatives": "Derivatives are financial contracts whose value is linked to an underlying asset like stocks, bonds, or commodities.",
-    "repo rate": "Repo rate is the rate at which a central bank lends short-term funds to commercial banks."
-}
+# Shared glossary index (backend/glossary.py)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+from glossary import glossary
 
 if fin_search:
-    key = fin_search.lower()
-    if key in finance_glossary:
-        st.success(finance_glossary[key])
+    definition = glossary.get().lookup(fin_search)
+    if definition:
+        st.success(definition)
     else:
-        st.info("Term not found in local glossary. You can connect external market APIs later.")
+        suggestions = glossary.get().search(fin_search, limit=3)
+        if suggestions:
+            st.info("Did you mean: " + ", ".join(r["term"] for r in suggestions))
+        else:
+            st.info("Term not found in local glossary. You can connect external market APIs later.")
@@ -1,3 +1,6 @@
+import os
+import sys
+
 import streamlit as st
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
@@ -54,17 +57,17 @@ elif st.button("Analyze Sentiment"):
 st.subheader("📚 Financial Knowledge Search")
 fin_search = st.text_input("Search Financial Term:", placeholder="Example: EBITDA")
 
-finance_glossary = {
-    # Your glossary terms here
-    "ebitda": "EBITDA stands for Earnings Before Interest, Taxes, Depreciation, and Amortization.",
-    "liquidity ratio": "Liquidity ratios measure a company's ability to pay short-term obligations.",
-    "derivatives": "Derivatives are financial contracts linked to underlying assets.",
-    "repo rate": "Repo rate is the rate at which a central bank lends short-term funds."
-}
+# Shared glossary index (backend/glossary.py)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+from glossary import glossary
 
 if fin_search:
-    key = fin_search.lower()
-    if key in finance_glossary:
-        st.success(finance_glossary[key])
+    definition = glossary.get().lookup(fin_search)
+    if definition:
+        st.success(definition)
     else:
-        st.info("Term not found in local glossary. You can connect external APIs later.")
+        suggestions = glossary.get().search(fin_search, limit=3)
+        if suggestions:
+            st.info("Did you mean: " + ", ".join(r["term"] for r in suggestions))
+        else:
+            st.info("Term not found in local glossary. You can connect external APIs later.")
@@ -0,0 +1,96 @@
+"""
+Benchmark the vectorized SMA crossover backtest against the old per-row loop.
+
+    python bench_backtest.py                          # 10k .. 5M bars
+    python bench_backtest.py --sizes 100000 2000000 --legacy-max 200000
+
+For every size the two engines must produce the same trade log and equity
+curve; the old loop is only timed up to --legacy-max bars (it needs minutes
+for millions of rows).
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from file1 import run_crossover, sma, trade_log
+
+
+def bars(n, seed=42):
+    # Minute bars: geometric random walk with small steps
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2000-01-03", periods=n, freq="min")
+    return pd.Series(100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.0008, n))), index=index)
+
+
+def legacy_backtest(prices, short_sma, long_sma):
+    # The loop /backtest used before run_crossover (iteritems -> items for pandas 2)
+    position = 0
+    cash = 100000.0
+    shares = 0
+    portfolio_values = []
+    trades = []
+    for date, price in prices.items():
+        s = short_sma.loc[date]
+        l = long_sma.loc[date]
+        if np.isnan(s) or np.isnan(l):
+            portfolio_values.append(cash + shares * price)
+            continue
+        if s > l and position == 0:
+            shares = cash // price
+            cash -= shares * price
+            position = 1
+            trades.append({"date": str(date.date()), "type": "BUY", "price": float(price), "shares": int(shares)})
+        elif s < l and position == 1:
+            cash += shares * price
+            trades.append({"date": str(date.date()), "type": "SELL", "price": float(price), "shares": int(shares)})
+            shares = 0
+            position = 0
+        portfolio_values.append(cash + shares * price)
+    return trades, np.array(portfolio_values)
+
+
+def vectorized_backtest(prices, short_sma, long_sma):
+    fills, equity = run_crossover(prices.to_numpy(), short_sma.to_numpy(), long_sma.to_numpy())
+    return trade_log(fills, prices.index), equity
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--sma-short", type=int, default=10)
+    parser.add_argument("--sma-long", type=int, default=50)
+    parser.add_argument("--legacy-max", type=int, default=100_000)
+    parser.add_argument("--output", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    report = []
+    print(f"{'bars':>10}{'trades':>9}{'vectorized s':>14}{'loop s':>10}{'speedup':>9}  match")
+    for n in args.sizes:
+        prices = bars(n)
+        short_sma, long_sma = sma(prices, args.sma_short), sma(prices, args.sma_long)
+        (trades, equity), fast = timed(vectorized_backtest, prices, short_sma, long_sma)
+        row = {"bars": n, "trades": len(trades), "vectorized_s": round(fast, 4), "loop_s": None, "match": None}
+        if n <= args.legacy_max:
+            (old_trades, old_equity), slow = timed(legacy_backtest, prices, short_sma, long_sma)
+            row["loop_s"] = round(slow, 4)
+            row["match"] = old_trades == trades and np.array_equal(old_equity, equity)
+        report.append(row)
+        speedup = f"{row['loop_s'] / fast:.0f}x" if row["loop_s"] else "-"
+        print(f"{n:>10}{len(trades):>9}{fast:>14.4f}{str(row['loop_s'] or '-'):>10}{speedup:>9}  {row['match'] if row['match'] is not None else '-'}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
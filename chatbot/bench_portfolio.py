@@ -0,0 +1,83 @@
+"""
+Benchmark the multi-asset portfolio backtest against per-ticker loops.
+
+    python bench_portfolio.py                         # 1 .. 500 assets, 10 years of days
+    python bench_portfolio.py --assets 100 1000 --days 5040 --output bench_portfolio.json
+
+For every asset count the matrix run (SMAs, crossovers, rebalancing and
+metrics for all assets at once) is timed against looping run_crossover over
+the tickers one by one; "x single" is the matrix run's cost in one-ticker
+runs of the old per-row /backtest loop. Positions must match the per-ticker
+crossovers.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from bench_backtest import legacy_backtest
+from file1 import crossover_positions, return_metrics, run_crossover, run_portfolio, sma, sma_matrix, synthetic_price_matrix
+
+
+def matrix_run(prices, short, long, cost_bps):
+    close = prices.to_numpy()
+    result = run_portfolio(close, sma_matrix(close, short), sma_matrix(close, long), cost_bps=cost_bps)
+    return_metrics(result["returns"])
+    return_metrics(result["sleeve_returns"])
+    return result
+
+
+def ticker_loop(prices, short, long):
+    positions = []
+    for symbol in prices.columns:
+        close = prices[symbol]
+        short_sma, long_sma = sma(close, short), sma(close, long)
+        run_crossover(close.to_numpy(), short_sma.to_numpy(), long_sma.to_numpy())
+        positions.append(crossover_positions(short_sma.to_numpy(), long_sma.to_numpy()))
+    return np.column_stack(positions)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assets", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--days", type=int, default=2520)
+    parser.add_argument("--sma-short", type=int, default=10)
+    parser.add_argument("--sma-long", type=int, default=50)
+    parser.add_argument("--cost-bps", type=float, default=10.0)
+    parser.add_argument("--output", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    one = synthetic_price_matrix(1, args.days).iloc[:, 0]
+    _, single = timed(legacy_backtest, one, sma(one, args.sma_short), sma(one, args.sma_long))
+    print(f"one ticker, old per-row loop: {single:.4f} s")
+
+    report = {"days": args.days, "single_ticker_loop_s": round(single, 4), "runs": []}
+    print(f"{'assets':>8}{'matrix s':>10}{'per-ticker s':>14}{'speedup':>9}{'x single':>10}  match")
+    for n in args.assets:
+        prices = synthetic_price_matrix(n, args.days)
+        result, fast = timed(matrix_run, prices, args.sma_short, args.sma_long, args.cost_bps)
+        positions, slow = timed(ticker_loop, prices, args.sma_short, args.sma_long)
+        row = {
+            "assets": n,
+            "matrix_s": round(fast, 4),
+            "per_ticker_s": round(slow, 4),
+            "single_ticker_equivalents": round(fast / single, 1),
+            "match": bool(np.array_equal(positions, result["positions"]))
+        }
+        report["runs"].append(row)
+        print(f"{n:>8}{fast:>10.4f}{slow:>14.4f}{slow / fast:>8.1f}x{row['single_ticker_equivalents']:>10}  {row['match']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,20 @@
 #FinBERT Sentiment Dashboard using Streamlit
 
+import os
+import sys
+
 import streamlit as st
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
 
-# Load model
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+from finbert_backends import BACKENDS, FINBERT_BACKEND, load_finbert
+
+# Load model (one cached instance per backend)
 @st.cache_resource
-def load_model():
-    tokenizer = AutoTokenizer.from_pretrained("ProsusAI/finbert")
-    model = AutoModelForSequenceClassification.from_pretrained("ProsusAI/finbert")
-    return tokenizer, model
+def load_model(backend):
+    return load_finbert(backend)
 
-tokenizer, model = load_model()
+backend = st.sidebar.selectbox("Inference backend", BACKENDS, index=BACKENDS.index(FINBERT_BACKEND))
+model = load_model(backend)
 
 # App title
 st.title("💹 FinBERT Financial Sentiment Dashboard")
@@ -22,13 +25,11 @@ text = st.text_area("Enter a financial statement or headline:")
 
 if st.button("Analyze Sentiment"):
     with st.spinner("Analyzing..."):
-        inputs = tokenizer(text, return_tensors="pt", truncation=True)
-        outputs = model(**inputs)
-        probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
+        probs = model.predict_proba([text])[0]
 
-        labels = ["positive", "negative", "neutral"]
-        sentiment = labels[torch.argmax(probs)]
-        prob_dict = dict(zip(labels, probs[0].tolist()))
+        labels = model.labels
+        sentiment = labels[int(probs.argmax())]
+        prob_dict = dict(zip(labels, probs.tolist()))
 
         # Display results
         st.subheader("📊 Sentiment Result")
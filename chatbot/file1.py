@@ -2,10 +2,17 @@
 from flask import Flask, request, jsonify
 import pandas as pd
 import numpy as np
+import hashlib
 import io
 import json
+import multiprocessing
+import os
 import random
-from datetime import datetime, timedelta
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 
 app = Flask(__name__)
 
@@ -23,9 +30,85 @@ def synthetic_price_series(days=365, start_price=100.0, seed=42):
     df.set_index("date", inplace=True)
     return df
 
+def synthetic_price_matrix(symbols=10, days=365, start_price=100.0, correlation=0.3, seed=42):
+    """
+    Correlated synthetic closes for several assets: a DataFrame indexed by date
+    with one column per symbol (an int makes up SYN1..SYNn). One-factor model:
+    every daily return mixes a shared market shock with the asset's own noise,
+    so each pair of assets has the given correlation.
+    """
+    names = [f"SYN{i + 1}" for i in range(symbols)] if isinstance(symbols, int) else [str(s) for s in symbols]
+    rng = np.random.default_rng(seed)
+    market = rng.standard_normal((days, 1))
+    own = rng.standard_normal((days, len(names)))
+    returns = 0.0005 + 0.02 * (np.sqrt(correlation) * market + np.sqrt(1.0 - correlation) * own)
+    prices = start_price * np.exp(np.cumsum(returns, axis=0))
+    dates = pd.date_range(end=pd.Timestamp.today(), periods=days, name="date")
+    return pd.DataFrame(prices, index=dates, columns=names)
+
 def sma(series, window):
     return series.rolling(window).mean()
 
+def crossover_positions(short_sma, long_sma):
+    """
+    0/1 position after each bar of an SMA crossover: go long when short > long,
+    go flat when short < long, otherwise (equal or NaN SMAs) hold. Works on
+    (bars,) arrays and on (bars, assets) matrices, one crossover per column.
+    """
+    up = short_sma > long_sma
+    has_signal = up | (short_sma < long_sma)
+    # Every bar takes the state of the last bar with a signal (bar 0 when there is none yet)
+    bars = np.arange(len(up)).reshape((-1,) + (1,) * (up.ndim - 1))
+    last = np.maximum.accumulate(np.where(has_signal, bars, 0), axis=0)
+    return np.take_along_axis(up, last, axis=0).astype(np.int8)
+
+def run_crossover(close, short_sma, long_sma, cash=100000.0):
+    """
+    Vectorized SMA crossover backtest over NumPy arrays. Each BUY spends all
+    cash on whole shares, each SELL closes the position.
+    Returns (fills, equity); fills holds parallel arrays index, buy, price, shares.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    position = crossover_positions(np.asarray(short_sma), np.asarray(long_sma))
+    changed = np.diff(position, prepend=0) != 0
+    index = np.flatnonzero(changed)
+    buy = position[index] == 1
+    price = close[index]
+
+    # Whole-share sizing depends on the cash left by the previous round trip,
+    # so this walks the fills (few) rather than the bars (many)
+    fill_cash = [cash]
+    fill_shares = [0.0]
+    shares = 0.0
+    for is_buy, p in zip(buy.tolist(), price.tolist()):
+        if is_buy:
+            shares = cash // p
+            cash -= shares * p
+        else:
+            cash += shares * p
+        fill_shares.append(shares)
+        fill_cash.append(cash)
+        if not is_buy:
+            shares = 0.0
+    fill_cash = np.array(fill_cash)
+    fill_shares = np.array(fill_shares)
+    # Shares are reported on SELL fills too, but the position is flat afterwards
+    held = np.where(np.append(True, buy), fill_shares, 0.0)
+
+    # Cash and shares are constant between fills: map every bar to the last fill at or before it
+    segment = np.cumsum(changed)
+    equity = fill_cash[segment] + held[segment] * close
+    fills = {"index": index, "buy": buy, "price": price, "shares": fill_shares[1:].astype(np.int64)}
+    return fills, equity
+
+def trade_log(fills, dates):
+    """The /backtest trade list for fills from run_crossover; dates is the price index."""
+    days = np.datetime_as_string(np.asarray(dates)[fills["index"]].astype("datetime64[D]"))
+    return [
+        {"date": day, "type": "BUY" if buy else "SELL", "price": price, "shares": shares}
+        for day, buy, price, shares in zip(days.tolist(), fills["buy"].tolist(), fills["price"].tolist(), fills["shares"].tolist())
+    ]
+
 def compute_metrics(trades, portfolio_values):
     # Simple metrics: total return, max drawdown
     if len(portfolio_values) == 0:
@@ -73,82 +156,588 @@ def sentiment():
         label = "neutral"
     return jsonify({"score": score, "label": label, "pos_count": pos, "neg_count": neg})
 
+# ----------------------------
+# Dataset uploads (large CSVs, parsed once)
+# ----------------------------
+# Parsed uploads: <id>.dates.bin (int64 ns), <id>.close.bin (float32), <id>.json (metadata)
+DATASET_DIR = os.getenv("BACKTEST_DATASET_DIR", os.path.join(tempfile.gettempdir(), "backtest-datasets"))
+UPLOAD_CHUNK_BYTES = 1 << 20
+CSV_CHUNK_ROWS = 500_000
+# Datasets unused for longer than this are deleted, then the least recently used until the directory fits
+DATASET_MAX_AGE_S = float(os.getenv("BACKTEST_DATASET_MAX_AGE_DAYS", 7)) * 86400
+DATASET_MAX_BYTES = int(float(os.getenv("BACKTEST_DATASET_MAX_MB", 2048)) * (1 << 20))
+DATASET_SUFFIXES = ("json", "dates.bin", "close.bin")
+# First 24 hex digits of the upload's sha256 (see ingest_upload)
+DATASET_ID = re.compile(r"[0-9a-f]{24}")
+
+def dataset_path(dataset_id, suffix):
+    return os.path.join(DATASET_DIR, f"{dataset_id}.{suffix}")
+
+def valid_dataset_id(dataset_id):
+    # JSON bodies can carry anything here (numbers, lists, "../x"); only real IDs touch the filesystem
+    return isinstance(dataset_id, str) and DATASET_ID.fullmatch(dataset_id) is not None
+
+def dataset_info(dataset_id):
+    if not valid_dataset_id(dataset_id):
+        return None
+    try:
+        with open(dataset_path(dataset_id, "json")) as f:
+            info = json.load(f)
+        # The metadata file's mtime is the dataset's last use, for prune_datasets
+        os.utime(dataset_path(dataset_id, "json"))
+        return info
+    except FileNotFoundError:
+        return None
+
+def prune_datasets(keep=None):
+    """
+    Delete datasets unused for DATASET_MAX_AGE_S, then the least recently
+    used ones until DATASET_MAX_BYTES is met, never `keep`. Upload temp files
+    left behind by a crash are dropped after the same age.
+    """
+    now = time.time()
+    datasets = {}  # id -> (last used, bytes)
+    for entry in os.scandir(DATASET_DIR):
+        if entry.name.endswith(".json"):
+            dataset_id = entry.name[:-len(".json")]
+            size = sum(os.path.getsize(p) for p in (dataset_path(dataset_id, s) for s in DATASET_SUFFIXES) if os.path.exists(p))
+            datasets[dataset_id] = (entry.stat().st_mtime, size)
+        elif entry.name.endswith(".tmp") and now - entry.stat().st_mtime > DATASET_MAX_AGE_S:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    total = sum(size for _, size in datasets.values())
+    for dataset_id, (used, size) in sorted(datasets.items(), key=lambda item: item[1][0]):
+        if dataset_id == keep or (now - used <= DATASET_MAX_AGE_S and total <= DATASET_MAX_BYTES):
+            continue
+        try:
+            # metadata first, so the dataset is gone before its columns are
+            for suffix in DATASET_SUFFIXES:
+                if os.path.exists(dataset_path(dataset_id, suffix)):
+                    os.remove(dataset_path(dataset_id, suffix))
+            total -= size
+        except OSError:
+            pass  # e.g. still memory-mapped on Windows; try again next time
+
+def parse_csv_to_dataset(csv_path, dataset_id):
+    """Parse date,close in chunks straight into the dataset's binary columns; returns its metadata."""
+    os.makedirs(DATASET_DIR, exist_ok=True)
+    # Unique temp names: two uploads of the same content may be parsed at once
+    tmp_paths = []
+    for suffix in ("dates.bin", "close.bin"):
+        fd, path = tempfile.mkstemp(prefix=f"{dataset_id}.{suffix}.", suffix=".tmp", dir=DATASET_DIR)
+        os.close(fd)
+        tmp_paths.append(path)
+    rows, first, last = 0, None, None
+    try:
+        with open(tmp_paths[0], "wb") as dates_f, open(tmp_paths[1], "wb") as close_f:
+            chunks = pd.read_csv(csv_path, usecols=["date", "close"], dtype={"close": "float32"}, parse_dates=["date"], chunksize=CSV_CHUNK_ROWS)
+            for chunk in chunks:
+                if not pd.api.types.is_datetime64_any_dtype(chunk["date"]):
+                    raise ValueError("could not parse the 'date' column as dates")
+                if chunk.empty:
+                    continue
+                dates = chunk["date"].to_numpy(dtype="datetime64[ns]")
+                dates_f.write(dates.view(np.int64).tobytes())
+                close_f.write(chunk["close"].to_numpy(dtype=np.float32).tobytes())
+                first = dates[0] if first is None else first
+                last = dates[-1]
+                rows += len(dates)
+        if not rows:
+            raise ValueError("CSV has no rows")
+        for tmp_path, suffix in zip(tmp_paths, ("dates.bin", "close.bin")):
+            os.replace(tmp_path, dataset_path(dataset_id, suffix))
+    finally:
+        for tmp_path in tmp_paths:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    info = {"dataset_id": dataset_id, "rows": rows, "start": str(pd.Timestamp(first)), "end": str(pd.Timestamp(last))}
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{dataset_id}.json.", suffix=".tmp", dir=DATASET_DIR)
+    with os.fdopen(fd, "w") as f:
+        json.dump(info, f)
+    os.replace(tmp_path, dataset_path(dataset_id, "json"))
+    return info
+
+def upload_stream():
+    """
+    The request's CSV as a stream: multipart field "file", otherwise the raw
+    body. Only multipart bodies go through form parsing, so a raw CSV sent
+    as application/x-www-form-urlencoded (curl --data-binary) is read
+    intact. None when there is no upload.
+    """
+    if request.mimetype == "multipart/form-data":
+        upload = request.files.get("file")
+        return upload.stream if upload else None
+    chunked = "chunked" in request.headers.get("Transfer-Encoding", "").lower()
+    if request.content_length or chunked:
+        return request.stream
+    return None
+
+def ingest_upload(source):
+    """
+    Stream an upload_stream() to a temp file in fixed-size chunks, hashing it
+    on the way. Identical uploads map to the same dataset ID and are only
+    parsed once.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    os.makedirs(DATASET_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".csv.tmp", dir=DATASET_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                block = source.read(UPLOAD_CHUNK_BYTES)
+                if not block:
+                    break
+                digest.update(block)
+                out.write(block)
+                size += len(block)
+        if not size:
+            # e.g. a chunked body on a server that doesn't pass those through to WSGI
+            raise ValueError("the upload was empty; send the CSV with a Content-Length")
+        dataset_id = digest.hexdigest()[:24]
+        info = dataset_info(dataset_id) or parse_csv_to_dataset(tmp_path, dataset_id)
+    finally:
+        os.remove(tmp_path)
+    prune_datasets(keep=dataset_id)
+    return info
+
+def load_dataset(dataset_id):
+    # Columns are memory-mapped; only close is copied, widened to float64 for the engine
+    info = dataset_info(dataset_id)
+    if info is None:
+        return None
+    dates = np.memmap(dataset_path(dataset_id, "dates.bin"), dtype=np.int64, mode="r")
+    close = np.memmap(dataset_path(dataset_id, "close.bin"), dtype=np.float32, mode="r")
+    index = pd.DatetimeIndex(np.asarray(dates).view("datetime64[ns]"), name="date")
+    return pd.DataFrame({"close": close.astype(np.float64)}, index=index)
+
+def request_payload():
+    """
+    Backtest options for this request: the JSON body, or for a CSV upload
+    (multipart or raw body) the query string plus the uploaded dataset.
+    """
+    payload = request.get_json(silent=True)
+    if payload is not None:
+        return payload, None
+    payload = request.args.to_dict()
+    source = upload_stream()
+    if source is not None:
+        try:
+            info = ingest_upload(source)
+        except (ValueError, pd.errors.ParserError) as e:
+            return None, f"could not read the CSV upload (needs 'date' and 'close' columns): {e}"
+        payload.update(mode="dataset", dataset_id=info["dataset_id"])
+    return payload, None
+
+@app.route("/datasets", methods=["POST"])
+def upload_dataset():
+    """
+    Upload a date,close CSV (multipart field "file" or raw text/csv body).
+    Returns {"dataset_id", "rows", "start", "end"}; pass
+    {"mode": "dataset", "dataset_id": ...} to /backtest or /backtest/sweep.
+    """
+    source = upload_stream()
+    if source is None:
+        return jsonify({"error": "no CSV uploaded"}), 400
+    try:
+        return jsonify(ingest_upload(source))
+    except (ValueError, pd.errors.ParserError) as e:
+        return jsonify({"error": f"could not read the CSV upload (needs 'date' and 'close' columns): {e}"}), 400
+
+@app.route("/datasets/<dataset_id>", methods=["GET"])
+def get_dataset(dataset_id):
+    info = dataset_info(dataset_id)
+    if info is None:
+        return jsonify({"error": "unknown dataset_id"}), 404
+    return jsonify(info)
+
 # ----------------------------
 # Backtest endpoint (simple SMA crossover)
 # ----------------------------
+def load_prices(payload):
+    """(DataFrame with a close column, None) for a backtest payload, or (None, error message)."""
+    mode = payload.get("mode", "synthetic")
+    if mode == "csv" and "csv" in payload:
+        # payload['csv'] is a CSV text
+        csv_text = payload["csv"]
+        df = pd.read_csv(io.StringIO(csv_text), parse_dates=["date"])
+        df.set_index("date", inplace=True)
+        if "close" not in df.columns:
+            return None, "CSV must contain 'close' column."
+        return df, None
+    elif mode == "dataset":
+        if not valid_dataset_id(payload.get("dataset_id")):
+            return None, "dataset_id must be the 24-character ID returned by /datasets"
+        df = load_dataset(payload["dataset_id"])
+        if df is None:
+            return None, "unknown dataset_id"
+        return df, None
+    elif mode == "synthetic":
+        days = int(payload.get("days", 365))
+        return synthetic_price_series(days=days, start_price=float(payload.get("start_price", 100.0))), None
+    return None, "unknown mode"
+
 @app.route("/backtest", methods=["POST"])
 def backtest():
     """
     POST JSON or form-data:
-      - Option A: send CSV file (as raw body or form file) with columns date,close
+      - Option A: send CSV file (as raw body or form file "file") with columns date,close;
+        strategy options then go in the query string
       - Option B: send JSON {"mode":"synthetic","days":365,"start_price":100}
+      - Option C: send JSON {"mode":"dataset","dataset_id":"..."} for an earlier upload
       - Options for strategy: sma_short (int), sma_long (int)
-    Returns: basic metrics and an example equity curve
+    Returns: basic metrics and an example equity curve (plus dataset_id for uploads)
     """
-    payload = request.get_json(silent=True) or {}
+    payload, error = request_payload()
+    if error:
+        return jsonify({"error": error}), 400
     # strategy params
     sma_short = int(payload.get("sma_short", 10))
     sma_long = int(payload.get("sma_long", 50))
-    mode = payload.get("mode", "synthetic")
 
-    # load data
-    if mode == "csv" and "csv" in payload:
-        # payload['csv'] is a CSV text
-        csv_text = payload["csv"]
-        df = pd.read_csv(io.StringIO(csv_text), parse_dates=["date"])
-        df.set_index("date", inplace=True)
-        if "close" not in df.columns:
-            return jsonify({"error": "CSV must contain 'close' column."}), 400
-    elif mode == "synthetic":
-        days = int(payload.get("days", 365))
-        df = synthetic_price_series(days=days, start_price=float(payload.get("start_price", 100.0)))
-    else:
-        return jsonify({"error": "unknown mode"}), 400
+    df, error = load_prices(payload)
+    if error:
+        return jsonify({"error": error}), 400
 
     prices = df["close"].copy()
     # compute SMAs
     short_sma = sma(prices, sma_short)
     long_sma = sma(prices, sma_long)
 
-    position = 0  # 0 = no pos, 1 = long
-    entry_price = 0.0
-    cash = 100000.0
-    shares = 0
-    portfolio_values = []
-    trades = []
-
-    for date, price in prices.iteritems():
-        s = short_sma.loc[date]
-        l = long_sma.loc[date]
-        # require both SMA exist
-        if np.isnan(s) or np.isnan(l):
-            # record portfolio value
-            pv = cash + shares * price
-            portfolio_values.append(pv)
-            continue
-        # buy signal
-        if s > l and position == 0:
-            # buy as many shares as fixed fraction (here we buy full position for demo)
-            shares = cash // price
-            cash -= shares * price
-            position = 1
-            entry_price = price
-            trades.append({"date": str(date.date()), "type": "BUY", "price": float(price), "shares": int(shares)})
-        # sell signal
-        elif s < l and position == 1:
-            cash += shares * price
-            trades.append({"date": str(date.date()), "type": "SELL", "price": float(price), "shares": int(shares)})
-            shares = 0
-            position = 0
-        pv = cash + shares * price
-        portfolio_values.append(pv)
+    fills, portfolio_values = run_crossover(prices.to_numpy(), short_sma.to_numpy(), long_sma.to_numpy())
+    dates = prices.index
+    trades = trade_log(fills, dates)
 
     metrics = compute_metrics(trades, portfolio_values)
     # include small equity series (sample to limit size)
-    equity_series = [{"date": str(d.date()), "equity": float(v)} for d, v in zip(prices.index, portfolio_values)[-100:]]
+    equity_series = [{"date": str(d.date()), "equity": float(v)} for d, v in zip(dates[-100:], portfolio_values[-100:])]
     response = {"metrics": metrics, "trades": trades, "equity_sample": equity_series}
+    if payload.get("mode") == "dataset":
+        response["dataset_id"] = payload["dataset_id"]
     return jsonify(response)
 
+# ----------------------------
+# Parameter sweep endpoint
+# ----------------------------
+SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", max(1, min(4, (os.cpu_count() or 2) - 1))))
+SWEEP_MAX_COMBOS = int(os.getenv("SWEEP_MAX_COMBOS", 5000))
+# Grids smaller than this run in the request process; the pool only pays off for bigger ones
+SWEEP_MIN_PARALLEL = 16
+SWEEP_RANK_KEYS = {"total_return", "max_drawdown"}
+
+_sweep_pool = None
+
+def sweep_pool():
+    # spawn, not fork: the Flask dev server may have threads running
+    global _sweep_pool
+    if _sweep_pool is None:
+        _sweep_pool = ProcessPoolExecutor(max_workers=SWEEP_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _sweep_pool
+
+def parse_grid(value):
+    """[windows] from an int, a list of ints or {"start", "stop", "step"} (stop inclusive)."""
+    if isinstance(value, dict):
+        return list(range(int(value["start"]), int(value["stop"]) + 1, int(value.get("step", 1))))
+    if isinstance(value, (list, tuple)):
+        return [int(v) for v in value]
+    if isinstance(value, str):
+        # Query string form: "5,10,20"
+        return [int(v) for v in value.split(",") if v.strip()]
+    return [int(value)]
+
+def parse_top(value):
+    """Row limit from an int or numeric string; None, "" and 0 mean every row."""
+    if value is None or value == "":
+        return None
+    top = int(value)
+    if top < 0:
+        raise ValueError("top must not be negative")
+    return top or None
+
+def sweep_chunk(path, windows, combos):
+    """
+    Backtest (short, long) pairs against the series saved at path: row 0 is
+    close, row i + 1 the SMA for windows[i]. Opened read-only via memmap, so
+    every worker shares the same pages instead of receiving a copy.
+    """
+    matrix = np.load(path, mmap_mode="r")
+    row = {w: i + 1 for i, w in enumerate(windows)}
+    close = matrix[0]
+    results = []
+    for short, long in combos:
+        fills, equity = run_crossover(close, matrix[row[short]], matrix[row[long]])
+        metrics = compute_metrics(len(fills["index"]), equity)
+        results.append({"sma_short": short, "sma_long": long, **metrics})
+    return results
+
+@app.route("/backtest/sweep", methods=["POST"])
+def backtest_sweep():
+    """
+    POST JSON (or a CSV upload with these in the query string): the /backtest
+    data options (mode, csv / dataset_id / days, start_price) plus
+      - sma_short, sma_long: int, list of ints or {"start","stop","step"}
+      - rank_by: total_return (default) or max_drawdown; top: limit rows
+    Every short < long pair is backtested on one load of the series.
+    Returns the compute_metrics results ranked best first ("trades" is the fill count).
+    """
+    payload, error = request_payload()
+    if error:
+        return jsonify({"error": error}), 400
+    try:
+        shorts = parse_grid(payload.get("sma_short", [5, 10, 20]))
+        longs = parse_grid(payload.get("sma_long", [50, 100, 200]))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"bad parameter grid: {e}"}), 400
+    try:
+        top = parse_top(payload.get("top"))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"bad top: {e}"}), 400
+    rank_by = payload.get("rank_by", "total_return")
+    if rank_by not in SWEEP_RANK_KEYS:
+        return jsonify({"error": f"rank_by must be one of {sorted(SWEEP_RANK_KEYS)}"}), 400
+
+    combos = [(s, l) for s in sorted(set(shorts)) for l in sorted(set(longs)) if 0 < s < l]
+    if not combos:
+        return jsonify({"error": "no sma_short < sma_long combinations"}), 400
+    if len(combos) > SWEEP_MAX_COMBOS:
+        return jsonify({"error": f"{len(combos)} combinations, at most {SWEEP_MAX_COMBOS} allowed"}), 400
+
+    df, error = load_prices(payload)
+    if error:
+        return jsonify({"error": error}), 400
+
+    start = time.perf_counter()
+    prices = df["close"].astype(float)
+    # Every SMA window the grid needs, computed once
+    windows = sorted({w for combo in combos for w in combo})
+    matrix = np.vstack([prices.to_numpy()] + [sma(prices, w).to_numpy() for w in windows])
+
+    fd, path = tempfile.mkstemp(suffix=".npy", prefix="sweep-")
+    os.close(fd)
+    try:
+        np.save(path, matrix)
+        del matrix
+        if len(combos) < SWEEP_MIN_PARALLEL or SWEEP_WORKERS == 1:
+            results = sweep_chunk(path, windows, combos)
+        else:
+            size = max(1, len(combos) // (SWEEP_WORKERS * 4))
+            chunks = [combos[i:i + size] for i in range(0, len(combos), size)]
+            results = [r for part in sweep_pool().map(sweep_chunk, [path] * len(chunks), [windows] * len(chunks), chunks) for r in part]
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # Higher is better for every rank key (max_drawdown is negative)
+    results.sort(key=lambda r: r[rank_by], reverse=True)
+    for rank, r in enumerate(results, 1):
+        r["rank"] = rank
+    return jsonify({
+        "bars": len(prices),
+        "combinations": len(combos),
+        "windows": len(windows),
+        "elapsed_s": round(time.perf_counter() - start, 3),
+        "results": results[:top],
+        "dataset_id": payload.get("dataset_id")
+    })
+
+# ----------------------------
+# Portfolio backtest endpoint (many assets at once)
+# ----------------------------
+PERIODS_PER_YEAR = 252
+PORTFOLIO_MAX_ASSETS = int(os.getenv("PORTFOLIO_MAX_ASSETS", 2000))
+
+def run_portfolio(close, short_sma, long_sma, weights=None, cost_bps=0.0, cash=100000.0):
+    """
+    Vectorized SMA crossover portfolio over (bars, assets) arrays. Asset i gets
+    weights[i] of the book while its crossover is long; a flat asset's sleeve
+    sits in cash. The book is rebalanced to those targets at every close and
+    pays cost_bps on the traded notional (turnover).
+    Returns a dict: returns, equity, turnover (per bar) plus the (bars, assets)
+    positions and sleeve_returns (each asset traded all-in on its own).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n_assets = close.shape[1]
+    weights = np.full(n_assets, 1.0 / n_assets) if weights is None else np.asarray(weights, dtype=np.float64)
+    position = crossover_positions(np.asarray(short_sma), np.asarray(long_sma))
+
+    # Positions set at one close earn the next bar's return; missing prices (NaN) earn nothing
+    sleeve_returns = np.zeros_like(close)
+    np.divide(close[1:], close[:-1], out=sleeve_returns[1:])
+    sleeve_returns[1:] -= 1.0
+    np.nan_to_num(sleeve_returns, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    sleeve_returns[1:] *= position[:-1]
+    gross = sleeve_returns @ weights
+
+    # During a bar the held weights drift to w * (held + return) / (1 + gross);
+    # turnover is the trade back to the new targets
+    drift = np.zeros_like(sleeve_returns)
+    drift[1:] = position[:-1]
+    drift += sleeve_returns
+    drift /= (1.0 + gross)[:, None]
+    drift -= position
+    np.abs(drift, out=drift)
+    turnover = drift @ weights
+    returns = gross - turnover * cost_bps / 10000.0
+    return {
+        "returns": returns,
+        "equity": cash * np.cumprod(1.0 + returns),
+        "turnover": turnover,
+        "positions": position,
+        "sleeve_returns": sleeve_returns
+    }
+
+def sma_matrix(close, window):
+    """SMA of every column of a (bars, assets) array, same values as sma() on each column."""
+    close = np.asarray(close, dtype=np.float64)
+    if np.isnan(close).any():
+        return sma(pd.DataFrame(close), window).to_numpy()
+    # No gaps: one cumulative sum over the whole matrix instead of a rolling pass per column
+    csum = np.cumsum(close, axis=0)
+    out = np.full_like(close, np.nan)
+    if window <= len(close):
+        out[window - 1] = csum[window - 1]
+        np.subtract(csum[window:], csum[:-window], out=out[window:])
+        out[window - 1:] /= window
+    return out
+
+def return_metrics(returns, periods_per_year=PERIODS_PER_YEAR):
+    """
+    total_return, max_drawdown and annualized Sharpe (zero risk-free rate) of
+    per-bar returns; a (bars, assets) matrix gives one value per column.
+    """
+    growth = np.cumprod(1.0 + returns, axis=0)
+    running_max = np.maximum.accumulate(growth, axis=0)
+    std = returns.std(axis=0)
+    sharpe = returns.mean(axis=0) / np.where(std > 0, std, np.inf) * np.sqrt(periods_per_year)
+    return {
+        "total_return": growth[-1] - 1.0,
+        "max_drawdown": ((growth - running_max) / running_max).min(axis=0),
+        "sharpe": sharpe
+    }
+
+def load_price_matrix(payload):
+    """(DataFrame of closes, one column per symbol, None) for a portfolio payload, or (None, error message)."""
+    mode = payload.get("mode", "synthetic")
+    if mode == "csv" and "csv" in payload:
+        # Wide (date,AAPL,MSFT,...) or long (date,symbol,close) CSV text
+        df = pd.read_csv(io.StringIO(payload["csv"]), parse_dates=["date"])
+        if {"symbol", "close"} <= set(df.columns):
+            df = df.pivot_table(index="date", columns="symbol", values="close", aggfunc="last")
+        else:
+            df = df.set_index("date")
+        df = df.sort_index().apply(pd.to_numeric, errors="coerce")
+        if df.shape[1] == 0:
+            return None, "CSV must contain date plus one column per symbol, or date,symbol,close."
+        # Gaps (holidays, late listings) carry the last close forward
+        return df.ffill(), None
+    elif mode == "synthetic":
+        symbols = payload.get("symbols", 10)
+        correlation = float(payload.get("correlation", 0.3))
+        if not 0.0 <= correlation < 1.0:
+            return None, "correlation must be in [0, 1)"
+        df = synthetic_price_matrix(
+            symbols=int(symbols) if isinstance(symbols, (int, str)) else symbols,
+            days=int(payload.get("days", 365)),
+            start_price=float(payload.get("start_price", 100.0)),
+            correlation=correlation,
+            seed=int(payload.get("seed", 42))
+        )
+        return df, None
+    return None, "unknown mode"
+
+def parse_weights(value, symbols):
+    """Weights aligned with symbols from None (equal), a list or a {symbol: weight} dict, summing to 1."""
+    if value is None or value == "equal":
+        weights = np.ones(len(symbols))
+    elif isinstance(value, dict):
+        weights = np.array([float(value.get(s, 0.0)) for s in symbols])
+    else:
+        weights = np.array([float(v) for v in value])
+        if len(weights) != len(symbols):
+            raise ValueError(f"{len(weights)} weights for {len(symbols)} symbols")
+    if (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError("weights must be non-negative with a positive sum")
+    return weights / weights.sum()
+
+@app.route("/backtest/portfolio", methods=["POST"])
+def backtest_portfolio():
+    """
+    POST JSON:
+      - {"mode":"synthetic","symbols":500 or ["A","B"],"days":365,"correlation":0.3,"seed":42}
+      - {"mode":"csv","csv":"date,AAPL,MSFT\\n..."} (or long date,symbol,close rows)
+      - sma_short, sma_long (int), weights (list or {symbol: weight}, default equal),
+        cost_bps (per unit of turnover, default 10), top: limit the per-asset rows
+    Every asset's crossover and the rebalanced portfolio run as one set of
+    matrix operations. Returns portfolio metrics (total_return, max_drawdown,
+    sharpe, annualized turnover), per-asset sleeve metrics and an equity sample.
+    """
+    payload = request.get_json(silent=True) or {}
+    sma_short = int(payload.get("sma_short", 10))
+    sma_long = int(payload.get("sma_long", 50))
+    cost_bps = float(payload.get("cost_bps", 10.0))
+
+    try:
+        df, error = load_price_matrix(payload)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"bad price data: {e}"}), 400
+    if error:
+        return jsonify({"error": error}), 400
+    if df.shape[1] > PORTFOLIO_MAX_ASSETS:
+        return jsonify({"error": f"{df.shape[1]} symbols, at most {PORTFOLIO_MAX_ASSETS} allowed"}), 400
+    if len(df) < 2:
+        return jsonify({"error": "need at least two bars"}), 400
+    symbols = [str(c) for c in df.columns]
+    try:
+        weights = parse_weights(payload.get("weights"), symbols)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"bad weights: {e}"}), 400
+    try:
+        top = parse_top(payload.get("top"))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"bad top: {e}"}), 400
+
+    start = time.perf_counter()
+    close = df.to_numpy(dtype=np.float64)
+    result = run_portfolio(close, sma_matrix(close, sma_short), sma_matrix(close, sma_long), weights, cost_bps)
+
+    years = len(df) / PERIODS_PER_YEAR
+    metrics = {k: float(v) for k, v in return_metrics(result["returns"]).items()}
+    metrics["turnover"] = float(result["turnover"].sum() / years)
+    metrics["costs"] = float(result["turnover"].sum() * cost_bps / 10000.0)
+
+    # Each asset traded on its own (all-in while long), as columns of one matrix
+    sleeves = return_metrics(result["sleeve_returns"])
+    fills = np.count_nonzero(np.diff(result["positions"], axis=0, prepend=0), axis=0)
+    order = np.argsort(-sleeves["total_return"], kind="stable")[:top]
+    assets = [
+        {
+            "symbol": symbols[i],
+            "weight": float(weights[i]),
+            "total_return": float(sleeves["total_return"][i]),
+            "max_drawdown": float(sleeves["max_drawdown"][i]),
+            "sharpe": float(sleeves["sharpe"][i]),
+            "trades": int(fills[i]),
+            "long": bool(result["positions"][-1, i])
+        }
+        for i in order.tolist()
+    ]
+    equity = result["equity"]
+    equity_series = [{"date": str(d.date()), "equity": float(v)} for d, v in zip(df.index[-100:], equity[-100:])]
+    return jsonify({
+        "bars": len(df),
+        "assets": len(symbols),
+        "elapsed_s": round(time.perf_counter() - start, 3),
+        "metrics": metrics,
+        "per_asset": assets,
+        "equity_sample": equity_series
+    })
+
 # ----------------------------
 # Prediction endpoint (dummy example)
 # ----------------------------
@@ -1,17 +1,23 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
+import os
+import sys
+
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
-# Load FinBERT once (cached)
-finbert = pipeline("sentiment-analysis", model="ProsusAI/finbert")
+# Shared FinBERT backends live in backend/
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+from finbert_backends import load_finbert
+
+# Load FinBERT once (cached); FINBERT_BACKEND selects torch, torch-int8, onnx or onnx-int8
+finbert = load_finbert()
 vader = SentimentIntensityAnalyzer()
 
 def analyze_sentiment(text):
-    finbert_result = finbert(text)[0]
+    finbert_label, finbert_score = finbert.predict([text])[0]
     vader_result = vader.polarity_scores(text)
 
     return {
-        "FinBERT Label": finbert_result['label'],
-        "FinBERT Confidence": round(finbert_result['score'], 3),
+        "FinBERT Label": finbert_label,
+        "FinBERT Confidence": round(finbert_score, 3),
         "VADER Positive": vader_result['pos'],
         "VADER Negative": vader_result['neg'],
         "VADER Neutral": vader_result['neu'],
@@ -0,0 +1,105 @@
+"""The vectorized backtests: /backtest against the per-row loop it replaced, /backtest/sweep and /backtest/portfolio against run_crossover."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import file1
+from bench_backtest import bars, legacy_backtest, vectorized_backtest
+from file1 import run_crossover, sma, sma_matrix
+
+
+@pytest.mark.parametrize("n, short_window, long_window", [(2_000, 10, 50), (5_000, 5, 20), (3_000, 20, 100), (40, 10, 50)])
+def test_crossover_matches_legacy_loop(n, short_window, long_window):
+    prices = bars(n, seed=n)
+    short_sma, long_sma = sma(prices, short_window), sma(prices, long_window)
+    old_trades, old_equity = legacy_backtest(prices, short_sma, long_sma)
+    trades, equity = vectorized_backtest(prices, short_sma, long_sma)
+    assert trades == old_trades
+    np.testing.assert_array_equal(equity, old_equity)
+
+
+def test_sma_matrix_matches_sma():
+    close = np.column_stack([bars(500, seed=s).to_numpy() for s in range(3)])
+    expected = np.column_stack([sma(pd.Series(close[:, j]), 20).to_numpy() for j in range(3)])
+    np.testing.assert_allclose(sma_matrix(close, 20), expected, equal_nan=True)
+
+
+def test_sweep_matches_run_crossover_per_grid_point(monkeypatch):
+    # 24 combinations on 2 workers, so the process pool path runs too
+    monkeypatch.setattr(file1, "SWEEP_WORKERS", 2)
+    monkeypatch.setattr(file1, "_sweep_pool", None)
+    shorts, longs = [3, 5, 8, 10, 15, 20], [25, 40, 60, 90]
+    client = file1.app.test_client()
+    try:
+        response = client.post("/backtest/sweep", json={"mode": "synthetic", "days": 400, "sma_short": shorts, "sma_long": longs})
+    finally:
+        if file1._sweep_pool is not None:
+            file1._sweep_pool.shutdown()
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert len(results) == 24 and [r["rank"] for r in results] == list(range(1, 25))
+
+    prices = file1.synthetic_price_series(days=400)["close"]
+    by_pair = {(r["sma_short"], r["sma_long"]): r for r in results}
+    for short in shorts:
+        for long in longs:
+            fills, equity = run_crossover(prices.to_numpy(), sma(prices, short).to_numpy(), sma(prices, long).to_numpy())
+            expected = file1.compute_metrics(len(fills["index"]), equity)
+            got = by_pair[(short, long)]
+            assert got["trades"] == expected["trades"]
+            assert got["total_return"] == pytest.approx(expected["total_return"])
+            assert got["max_drawdown"] == pytest.approx(expected["max_drawdown"])
+
+
+@pytest.mark.parametrize("top, status, rows", [(3, 200, 3), ("2", 200, 2), (0, 200, 6), (100, 200, 6), ("abc", 400, None), (-1, 400, None), ([1], 400, None)])
+def test_sweep_top(top, status, rows):
+    response = file1.app.test_client().post("/backtest/sweep", json={"mode": "synthetic", "days": 200, "sma_short": [5, 10], "sma_long": [20, 30, 40], "top": top})
+    assert response.status_code == status
+    if rows is not None:
+        assert len(response.get_json()["results"]) == rows
+
+
+def reference_portfolio(close, short_window, long_window, weights, cost_bps, cash=100000.0):
+    """Per-asset run_crossover positions, then a bar-by-bar rebalance of the weighted book."""
+    bars_count, n_assets = close.shape
+    positions = np.zeros((bars_count, n_assets))
+    for i in range(n_assets):
+        column = pd.Series(close[:, i])
+        fills, _ = run_crossover(close[:, i], sma(column, short_window).to_numpy(), sma(column, long_window).to_numpy())
+        for index, buy in zip(fills["index"], fills["buy"]):
+            positions[index:, i] = 1.0 if buy else 0.0
+
+    value, held_positions, equity = cash, np.zeros(n_assets), []
+    for t in range(bars_count):
+        returns = np.zeros(n_assets) if t == 0 else (close[t] / close[t - 1] - 1.0) * held_positions
+        gross = weights @ returns
+        drifted = weights * (held_positions + returns) / (1.0 + gross)
+        turnover = np.abs(drifted - weights * positions[t]).sum()
+        value *= 1.0 + gross - turnover * cost_bps / 10000.0
+        equity.append(value)
+        held_positions = positions[t]
+    return positions, np.array(equity)
+
+
+def test_portfolio_matches_per_asset_crossovers():
+    close = file1.synthetic_price_matrix(symbols=4, days=400, seed=7).to_numpy()
+    weights = np.array([0.4, 0.3, 0.2, 0.1])
+    result = file1.run_portfolio(close, sma_matrix(close, 10), sma_matrix(close, 30), weights, cost_bps=10.0)
+    positions, equity = reference_portfolio(close, 10, 30, weights, cost_bps=10.0)
+    np.testing.assert_array_equal(result["positions"], positions)
+    np.testing.assert_allclose(result["equity"], equity, rtol=1e-10)
+
+
+def test_portfolio_endpoint_long_csv_and_dict_weights():
+    wide = file1.synthetic_price_matrix(symbols=["AAA", "BBB", "CCC"], days=300, seed=3)
+    long_rows = wide.reset_index().melt(id_vars="date", var_name="symbol", value_name="close").sample(frac=1.0, random_state=0)
+    payload = {"mode": "csv", "csv": long_rows.to_csv(index=False), "sma_short": 5, "sma_long": 20, "weights": {"AAA": 2, "BBB": 1}}
+    response = file1.app.test_client().post("/backtest/portfolio", json=payload)
+    assert response.status_code == 200
+    body = response.get_json()
+
+    # CSV text round-trips the closes at full precision, so this matches the wide frame exactly
+    _, equity = reference_portfolio(wide.to_numpy(), 5, 20, np.array([2 / 3, 1 / 3, 0.0]), cost_bps=10.0)
+    assert body["metrics"]["total_return"] == pytest.approx(equity[-1] / 100000.0 - 1.0, rel=1e-9)
+    assert {a["symbol"]: a["weight"] for a in body["per_asset"]} == pytest.approx({"AAA": 2 / 3, "BBB": 1 / 3, "CCC": 0.0})
+    assert file1.app.test_client().post("/backtest/portfolio", json={**payload, "top": "x"}).status_code == 400
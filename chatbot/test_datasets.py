@@ -0,0 +1,65 @@
+"""/datasets uploads and dataset-mode backtests through the Flask test client."""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import file1
+
+CSV = "date,close\n" + "\n".join(f"{d.date()},{100 + 5 * np.sin(i / 7):.4f}" for i, d in enumerate(pd.date_range("2023-01-01", periods=300)))
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(file1, "DATASET_DIR", str(tmp_path))
+    return file1.app.test_client()
+
+
+def test_upload_and_reuse_by_id(client, tmp_path):
+    uploaded = client.post("/datasets", data={"file": (io.BytesIO(CSV.encode()), "prices.csv")}, content_type="multipart/form-data")
+    assert uploaded.status_code == 200
+    info = uploaded.get_json()
+    assert (info["rows"], info["start"], info["end"]) == (300, "2023-01-01 00:00:00", "2023-10-27 00:00:00")
+
+    # The same bytes as a raw body map to the same dataset, parsed only once
+    raw = client.post("/datasets", data=CSV, content_type="text/csv")
+    assert raw.get_json() == info
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(f"{info['dataset_id']}.{s}" for s in file1.DATASET_SUFFIXES)
+    assert client.get(f"/datasets/{info['dataset_id']}").get_json() == info
+
+    by_id = client.post("/backtest", json={"mode": "dataset", "dataset_id": info["dataset_id"], "sma_short": 5, "sma_long": 20})
+    inline = client.post("/backtest", json={"mode": "csv", "csv": CSV, "sma_short": 5, "sma_long": 20})
+    assert by_id.status_code == 200 and by_id.get_json()["dataset_id"] == info["dataset_id"]
+    # Datasets store close as float32, so prices match to float32 precision
+    strip = lambda trades: [(t["date"], t["type"], t["shares"]) for t in trades]
+    assert strip(by_id.get_json()["trades"]) == strip(inline.get_json()["trades"])
+    assert by_id.get_json()["metrics"]["total_return"] == pytest.approx(inline.get_json()["metrics"]["total_return"], rel=1e-6)
+
+
+def test_raw_upload_to_backtest(client):
+    response = client.post("/backtest?sma_short=5&sma_long=20", data=CSV, content_type="application/x-www-form-urlencoded")
+    assert response.status_code == 200 and "dataset_id" in response.get_json()
+
+
+def test_empty_upload(client, tmp_path):
+    response = client.post("/datasets", data=b"", content_type="text/csv")
+    assert response.status_code == 400 and response.get_json() == {"error": "no CSV uploaded"}
+    response = client.post("/datasets", data=io.BytesIO(b""), content_type="text/csv", headers={"Transfer-Encoding": "chunked"})
+    assert response.status_code == 400 and "empty" in response.get_json()["error"]
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("body", ["day,price\n2024-01-01,1\n", "date,close\nyesterday,1\n", "date,close\n"])
+def test_bad_csv(client, tmp_path, body):
+    response = client.post("/datasets", data=body, content_type="text/csv")
+    assert response.status_code == 400
+    assert response.get_json()["error"].startswith("could not read the CSV upload (needs 'date' and 'close' columns)")
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("dataset_id", [5, None, ["abc"], "../../etc/passwd", "ABCDEF0123456789ABCDEF01", "0" * 24])
+def test_bad_dataset_id(client, dataset_id):
+    for endpoint in ("/backtest", "/backtest/sweep"):
+        response = client.post(endpoint, json={"mode": "dataset", "dataset_id": dataset_id})
+        assert response.status_code == 400, endpoint
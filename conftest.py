@@ -0,0 +1,2 @@
+# Manual scripts that hit the network or a running server at import; not pytest tests
+collect_ignore = ["test.py", "test_api.py", "backend/test_fix.py", "backend/test_predict.py"]
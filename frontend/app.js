@@ -58,44 +58,63 @@ async function fetchJSON(path) {
   return res.json();
 }
 
+function renderQuote(symbol, data) {
+  if (!data || data.error) return;
+  const card = cardsContainer.querySelector(`[data-symbol="${symbol}"]`);
+  if (!card) return;
+  const priceEl = card.querySelector("[data-price]");
+  const pctEl = card.querySelector("[data-pct]");
+  const lastEl = card.querySelector("[data-last]");
+
+  priceEl.textContent = `$${data.price.toFixed(2)}`;
+  pctEl.textContent = `${data.change >= 0 ? "+" : ""}${data.change.toFixed(
+    2
+  )} (${data.change_percent >= 0 ? "+" : ""}${data.change_percent.toFixed(
+    2
+  )}%)`;
+  pctEl.classList.remove("positive", "negative", "neutral");
+  if (data.change_percent > 0.1) pctEl.classList.add("positive");
+  else if (data.change_percent < -0.1) pctEl.classList.add("negative");
+  else pctEl.classList.add("neutral");
+  lastEl.textContent = new Date(data.ts * 1000).toLocaleTimeString();
+
+  if (symbol === currentSymbol) {
+    selectedPriceEl.textContent = `$${data.price.toFixed(2)}`;
+    selectedChangeEl.textContent = `${
+      data.change >= 0 ? "▲" : "▼"
+    } ${data.change.toFixed(2)} (${
+      data.change_percent >= 0 ? "+" : ""
+    }${data.change_percent.toFixed(2)}%)`;
+    selectedChangeEl.className =
+      data.change_percent > 0.1
+        ? "positive"
+        : data.change_percent < -0.1
+        ? "negative"
+        : "neutral";
+  }
+}
+
 async function updateQuote(symbol) {
   try {
     const data = await fetchJSON(
       `/api/quote?symbol=${encodeURIComponent(symbol)}`
     );
-    if (!data || data.error) return;
-    const card = cardsContainer.querySelector(`[data-symbol="${symbol}"]`);
-    if (!card) return;
-    const priceEl = card.querySelector("[data-price]");
-    const pctEl = card.querySelector("[data-pct]");
-    const lastEl = card.querySelector("[data-last]");
-
-    priceEl.textContent = `$${data.price.toFixed(2)}`;
-    pctEl.textContent = `${data.change >= 0 ? "+" : ""}${data.change.toFixed(
-      2
-    )} (${data.change_percent >= 0 ? "+" : ""}${data.change_percent.toFixed(
-      2
-    )}%)`;
-    pctEl.classList.remove("positive", "negative", "neutral");
-    if (data.change_percent > 0.1) pctEl.classList.add("positive");
-    else if (data.change_percent < -0.1) pctEl.classList.add("negative");
-    else pctEl.classList.add("neutral");
-    lastEl.textContent = new Date(data.ts * 1000).toLocaleTimeString();
-
-    if (symbol === currentSymbol) {
-      selectedPriceEl.textContent = `$${data.price.toFixed(2)}`;
-      selectedChangeEl.textContent = `${
-        data.change >= 0 ? "▲" : "▼"
-      } ${data.change.toFixed(2)} (${
-        data.change_percent >= 0 ? "+" : ""
-      }${data.change_percent.toFixed(2)}%)`;
-      selectedChangeEl.className =
-        data.change_percent > 0.1
-          ? "positive"
-          : data.change_percent < -0.1
-          ? "negative"
-          : "neutral";
-    }
+    renderQuote(symbol, data);
+  } catch (e) {
+    console.error(e);
+  }
+}
+
+// One request for the whole watchlist instead of one /api/quote per card
+async function refreshQuotes() {
+  try {
+    const data = await fetchJSON(
+      `/api/quotes?symbols=${encodeURIComponent(watchlist.join(","))}`
+    );
+    if (!data || data.error || !data.quotes) return;
+    Object.entries(data.quotes).forEach(([symbol, quote]) =>
+      renderQuote(symbol, quote)
+    );
   } catch (e) {
     console.error(e);
   }
@@ -288,7 +307,7 @@ document.getElementById("applyWatchlistBtn").addEventListener("click", () => {
 });
 
 document.getElementById("refreshNowBtn").addEventListener("click", () => {
-  watchlist.forEach((s) => updateQuote(s));
+  refreshQuotes();
 });
 
 document.getElementById("predictBtn").addEventListener("click", async () => {
@@ -299,6 +318,12 @@ document.getElementById("predictBtn").addEventListener("click", async () => {
   await predict(currentSymbol, days);
 });
 
+async function fetchGlossary(query, limit) {
+  const base = baseUrlInput.value.replace(/\/+$/, "");
+  const res = await fetch(`${base}/api/glossary/search?q=${encodeURIComponent(query)}&limit=${limit}`);
+  return res.json();
+}
+
 async function searchGlossary() {
   const term = document.getElementById("glossaryInput").value.trim();
   const resEl = document.getElementById("glossaryResult");
@@ -308,15 +333,15 @@ async function searchGlossary() {
   resEl.className = "mt-2 text-xs text-slate-400 italic";
   
   try {
-    const base = baseUrlInput.value.replace(/\/+$/, "");
-    const res = await fetch(`${base}/api/glossary?term=${encodeURIComponent(term)}`);
-    const data = await res.json();
+    // Best ranked match: exact, then prefix, typo-tolerant, then definition text
+    const data = await fetchGlossary(term, 1);
     
-    if (data.error) {
+    if (data.error || !data.results.length) {
        resEl.textContent = "Definition not found.";
        resEl.className = "mt-2 text-xs text-red-400";
     } else {
-       resEl.textContent = data.definition;
+       const best = data.results[0];
+       resEl.textContent = best.match === "exact" ? best.definition : `${best.term}: ${best.definition}`;
        resEl.className = "mt-2 text-xs text-emerald-400 font-medium";
     }
   } catch (e) {
@@ -324,13 +349,35 @@ async function searchGlossary() {
     resEl.textContent = "Error fetching definition";
   }
 }
+
+// Autocomplete suggestions while typing
+let glossaryTimer = null;
+document.getElementById("glossaryInput").addEventListener("input", (e) => {
+  clearTimeout(glossaryTimer);
+  const query = e.target.value.trim();
+  if (!query) return;
+  glossaryTimer = setTimeout(async () => {
+    try {
+      const data = await fetchGlossary(query, 8);
+      const list = document.getElementById("glossaryTerms");
+      list.innerHTML = "";
+      for (const r of data.results || []) {
+        const option = document.createElement("option");
+        option.value = r.term;
+        list.appendChild(option);
+      }
+    } catch (err) {
+      console.error(err);
+    }
+  }, 150);
+});
 document.getElementById("searchGlossaryBtn").addEventListener("click", searchGlossary);
 
 async function init() {
   renderWatchlist();
   const first = cardsContainer.querySelector(`[data-symbol="${watchlist[0]}"]`);
   if (first) first.click();
-  watchlist.forEach((s) => updateQuote(s));
+  refreshQuotes();
 }
 init();
 
@@ -378,6 +425,48 @@ function appendMessage(role, text, details = null) {
 
   chatMessages.appendChild(div);
   chatMessages.scrollTop = chatMessages.scrollHeight;
+  return div;
+}
+
+function formatSentiment(sentiment) {
+  const s = sentiment["FinBERT Scores"] || {};
+  const breakdown = Object.entries(s)
+     .map(([k, v]) => `${k}: ${(v*100).toFixed(1)}%`)
+     .join(", ");
+  return `\nFinBERT: ${sentiment["FinBERT Label"]} (Conf: ${sentiment["FinBERT Confidence"]})\n[${breakdown}]\nVADER: ${sentiment["VADER Compound"]}`;
+}
+
+// POST /api/chat/stream and call onEvent(event, data) for each Server-Sent Event
+async function streamChat(message, onEvent) {
+  const base = baseUrlInput.value.replace(/\/+$/, "");
+  const res = await fetch(`${base}/api/chat/stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ message }),
+  });
+  if (!res.ok || !res.body) throw new Error(`${res.status} ${await res.text()}`);
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) !== -1) {
+      const raw = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+      let event = "message";
+      let data = "";
+      raw.split("\n").forEach((line) => {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      });
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
 }
 
 if (chatForm) {
@@ -399,31 +488,35 @@ if (chatForm) {
     chatMessages.scrollTop = chatMessages.scrollHeight;
 
     try {
-      const base = baseUrlInput.value.replace(/\/+$/, "");
-      const res = await fetch(`${base}/api/chat`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ message: text }),
+      let bubble = null;
+      let answer = "";
+      let details = null;
+
+      // Render the reply token by token; sentiment arrives first as its own event
+      await streamChat(text, (event, data) => {
+        if (event === "sentiment") {
+          // null when sentiment timed out; the reply still streams
+          details = data && !data.error ? formatSentiment(data) : null;
+          return;
+        }
+        if (!bubble) {
+          const loadingEl = document.getElementById("chatLoading");
+          if (loadingEl) loadingEl.remove();
+          bubble = appendMessage("assistant", "");
+        }
+        if (event === "token") {
+          answer += data.text;
+          bubble.firstChild.textContent = answer;
+        } else if (event === "error") {
+          bubble.firstChild.textContent = `Error: ${data.error}`;
+        } else if (event === "done" && details) {
+          const detailsDiv = document.createElement("div");
+          detailsDiv.className = "mt-1 text-xs text-slate-300 whitespace-pre-wrap";
+          detailsDiv.textContent = details;
+          bubble.appendChild(detailsDiv);
+        }
+        chatMessages.scrollTop = chatMessages.scrollHeight;
       });
-
-      const data = await res.json();
-      
-      // Remove loading
-      const loadingEl = document.getElementById("chatLoading");
-      if (loadingEl) loadingEl.remove();
-
-      if (data.error) {
-        appendMessage("assistant", `Error: ${data.error}`);
-      } else {
-        const sentiment = data.sentiment;
-        const s = sentiment["FinBERT Scores"] || {};
-        const breakdown = Object.entries(s)
-           .map(([k, v]) => `${k}: ${(v*100).toFixed(1)}%`)
-           .join(", ");
-           
-        const details = `\nFinBERT: ${sentiment["FinBERT Label"]} (Conf: ${sentiment["FinBERT Confidence"]})\n[${breakdown}]\nVADER: ${sentiment["VADER Compound"]}`;
-        appendMessage("assistant", data.response, details);
-      }
     } catch (err) {
       const loadingEl = document.getElementById("chatLoading");
       if (loadingEl) loadingEl.remove();
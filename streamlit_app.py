@@ -10,8 +10,10 @@ import os
 # Ensure backend modules can be imported
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
-from agent import get_agent_response, finance_glossary
+from agent import get_agent_response
+from glossary import glossary
 from sentiment import analyze_sentiment
+from store import ohlcv_store
 
 # Set Page Config
 st.set_page_config(page_title="MarketVision Pro", page_icon="📈", layout="wide")
@@ -88,7 +90,9 @@ def main():
             st.subheader(f"History & Forecast ({days_forecast} days)")
             
             with st.spinner("Fetching data & Training Prophet model..."):
-                df = yf.download(selected_ticker, period="1y", interval="1d")
+                # Served from the shared local store; only new bars are downloaded
+                ohlcv_store.refresh([selected_ticker])
+                df = ohlcv_store.history(selected_ticker, 365)
                 
                 if isinstance(df.columns, pd.MultiIndex):
                     df.columns = df.columns.get_level_values(0)
@@ -138,11 +142,15 @@ def main():
         st.subheader("📚 Financial Glossary")
         term = st.text_input("Lookup term (e.g., EBITDA)")
         if st.button("Search Glossary"):
-            res = finance_glossary.get(term.lower().strip())
+            res = glossary.get().lookup(term)
             if res:
                 st.success(res)
             else:
-                st.error("Term not found.")
+                suggestions = glossary.get().search(term, limit=3)
+                if suggestions:
+                    st.info("Did you mean: " + ", ".join(r["term"] for r in suggestions))
+                else:
+                    st.error("Term not found.")
 
     with col_chat:
         st.subheader("🤖 Market Bot (with News)")